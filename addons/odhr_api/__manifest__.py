@@ -8,7 +8,10 @@
     'website': '',
     'license': 'LGPL-3',
     'depends': ['base', 'hr', 'hr_attendance', 'hr_holidays'],
-    'data': [],
+    'data': [
+        'security/ir.model.access.csv',
+        'data/ir_cron.xml',
+    ],
     'installable': True,
     'application': False,
 }
@@ -1,12 +1,130 @@
 # -*- coding: utf-8 -*-
 from odoo import http, fields
+from odoo.exceptions import ValidationError
 from odoo.http import request
-import base64
+from urllib.parse import parse_qsl
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.routing import Map, Rule
+import datetime
 import json
+import logging
+import os
+import psycopg2.errors
+import time
 
+from ..tools import metrics, ratelimit
+from ..tools.auth import authenticate, issue_token, parse_basic_auth
+from ..tools.avatars import AVATAR_SIZES, AVATAR_URL, avatar_hashes, avatar_url
+from ..tools.conditional import CACHE_IMMUTABLE, CACHE_PRIVATE, CACHE_REFERENCE, cacheable, etag, not_modified, record_version, table_version
+from ..tools.fastjson import dumps
+from ..tools.pagination import fetch_page
+from ..tools.serializers import Computed, Serializer
+from ..tools.sync import CursorExpired, sync_changes
+
+_logger = logging.getLogger(__name__)
+
+BATCH_MAX_REQUESTS = 20
+AVATAR_MANIFEST_MAX = 200
+ATTENDANCE_BULK_MAX = 100
+SYNC_DEFAULT_LIMIT = 200
+SYNC_MAX_LIMIT = 1000
+ANALYTICS_MAX_DAYS = 366
+LEAVE_CALENDAR_MAX_DAYS = 366
+
+EMPLOYEE = Serializer({
+    'id': 'id',
+    'name': 'name',
+    'work_email': 'work_email',
+    'work_phone': 'work_phone',
+    'mobile_phone': 'mobile_phone',
+    'job_title': 'job_title',
+    'department_id': 'department_id.id',
+    'department_name': 'department_id.name',
+    'manager_id': 'parent_id.id',
+    'manager_name': 'parent_id.name',
+    'work_location_id': 'work_location_id.id',
+    'join_date': ('first_contract_date', 'create_date'),
+    # pictures are served by the avatar endpoint, never inlined
+    'image_url': AVATAR_URL,
+})
+DEPARTMENT = Serializer({
+    'id': 'id',
+    'name': 'name',
+    'parent_id': 'parent_id.id',
+})
+ATTENDANCE = Serializer({
+    'id': 'id',
+    'check_in': 'check_in',
+    'check_out': 'check_out',
+    'worked_hours': 'worked_hours',
+    'manual': Computed(lambda att: True),
+    'reason': Computed(lambda att: None),
+})
+LEAVE = Serializer({
+    'id': 'id',
+    'type_id': 'holiday_status_id.id',
+    'type_name': 'holiday_status_id.name',
+    'date_from': ('request_date_from', 'date_from'),
+    'date_to': ('request_date_to', 'date_to'),
+    'duration': 'number_of_days',
+    'reason': 'name',
+    'state': 'state',
+    'employee_id': 'employee_id.id',
+})
+LEAVE_TYPE = Serializer({
+    'id': 'id',
+    'name': 'name',
+    'code': 'code',
+})
+ANNOUNCEMENT = Serializer({
+    'id': 'id',
+    'subject': Computed(lambda msg: (msg.subject or msg.record_name or '')[:120], 'subject', 'record_name'),
+    'body_html': 'body',
+    'body_text': Computed(lambda msg: (msg.body or '').replace('<br>', '\n'), 'body'),
+    'date': 'date',
+    'author_name': 'author_id.name',
+})
+PAYSLIP = Serializer({
+    'id': 'id',
+    'name': 'name',
+    'date_from': 'date_from',
+    'date_to': 'date_to',
+    'net_wage': 'net_wage',
+    'state': 'state',
+})
+PAYSLIP_LINE = Serializer({
+    'code': 'code',
+    'name': 'name',
+    'amount': 'total',
+})
+JOB = Serializer({
+    'id': 'id',
+    'type': 'job_type',
+    'state': 'state',
+    'error': 'error',
+    'created_at': 'create_date',
+    'done_at': 'done_at',
+    'download_url': Computed(
+        lambda job: f'/odhr/api/jobs/{job.id}/download?db={job.env.cr.dbname}' if job.state == 'done' else None,
+        'state',
+    ),
+})
+# serializer of the records behind a team KPI, by model
+TEAM_KPI_DRILLDOWN = {
+    'hr.employee': EMPLOYEE,
+    'hr.leave': LEAVE,
+}
+# /odhr/api/sync name -> (model, serializer, restricted to the user's employee)
+SYNC_MODELS = {
+    'employees': ('hr.employee', EMPLOYEE, False),
+    'departments': ('hr.department', DEPARTMENT, False),
+    'leave_types': ('hr.leave.type', LEAVE_TYPE, False),
+    'attendances': ('hr.attendance', ATTENDANCE, True),
+    'leaves': ('hr.leave', LEAVE, True),
+}
 
 def _json_response(data=None, status=200):
-    content = json.dumps(data or {}, default=str)
+    content = dumps({} if data is None else data)
     return request.make_response(
         content,
         headers=[('Content-Type', 'application/json')],
@@ -18,37 +136,118 @@ def _error(message: str, status=400):
     return _json_response({'error': message}, status=status)
 
 
-def _parse_basic_auth(auth_header: str):
+def _json_payload():
+    """JSON body of the current call; sub-requests of a batch carry their own."""
+    payload = getattr(request, 'odhr_batch_payload', None)
+    if payload is not None:
+        return payload
     try:
-        if not auth_header or not auth_header.lower().startswith('basic '):
-            return None, None
-        token = auth_header.split(' ', 1)[1].strip()
-        raw = base64.b64decode(token).decode('utf-8')
-        login, password = raw.split(':', 1)
-        return login, password
+        return json.loads(request.httprequest.data.decode('utf-8') or '{}')
     except Exception:
-        return None, None
+        return {}
+
+
+def _paginate(Model, domain, payload, order, default_limit):
+    """Fetch one page of ``Model`` records matching ``domain``.
+
+    Accepts ``limit``/``offset`` or ``cursor`` paging and the ``count`` mode
+    (exact, estimate, none) described in odhr_api.tools.pagination.  Offset
+    pages count exactly by default, as they always did.
+    Returns ``(records, meta, error_response)``.
+    """
+    try:
+        records, meta = fetch_page(Model, domain, order, payload, default_limit=default_limit)
+    except ValueError:
+        return Model.browse(), None, _error('Invalid paging parameters', status=400)
+    return records, meta, None
+
+
+def _requested_fields(kwargs, payload, serializer):
+    """Keys of ``serializer`` selected by the ``fields`` parameter.
+
+    Returns ``(keys, error_response)``.
+    """
+    try:
+        return serializer.select(kwargs.get('fields') or payload.get('fields')), None
+    except ValueError as e:
+        return None, _error(str(e), status=400)
 
 
 def _authenticate_from_request():
+    # Sub-requests of /odhr/api/batch reuse the batch's authentication
+    batch_env = getattr(request, 'odhr_batch_env', None)
+    if batch_env is not None:
+        return batch_env, None
     db = request.params.get('db') or request.httprequest.args.get('db')
     if not db:
         return None, _error('Missing db parameter', status=400)
-    auth = request.httprequest.headers.get('Authorization')
-    login, pwd = _parse_basic_auth(auth)
-    if not login or not pwd:
+    uid, reason = authenticate(db)
+    if reason in ('missing_authorization', 'malformed_authorization'):
         return None, _error('Missing or invalid Authorization header', status=401)
-    try:
-        uid = request.session.authenticate(db, login, pwd)
-        if not uid:
-            return None, _error('Unauthorized', status=401)
-        env = request.env(user=uid)
-        return env, None
-    except Exception:
+    if not uid:
         return None, _error('Unauthorized', status=401)
+    if ratelimit.user_limited(request.env, uid):
+        return None, _error('Too many requests', status=429)
+    return request.env(user=uid), None
+
+
+def _current_employee(env):
+    """Employee linked to the authenticated user (sudo), possibly empty."""
+    return env['hr.employee'].sudo().browse(env['hr.employee']._odhr_employee_id_for_user(env.uid))
+
+
+def _parse_timestamp(value):
+    """ISO 8601 timestamp (``2024-03-04T08:00:00Z``) as a naive UTC datetime; raises ValueError."""
+    if not isinstance(value, str):
+        raise ValueError('timestamp must be a string')
+    if value.endswith(('Z', 'z')):
+        value = value[:-1] + '+00:00'
+    value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo:
+        try:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        except OverflowError:
+            raise ValueError('timestamp out of range')
+    return value.replace(microsecond=0)
+
+
+def _parse_punch(item):
+    """Validated ``(uid, kind, at, latitude, longitude)`` of a bulk punch; raises ValueError."""
+    if not isinstance(item, dict):
+        raise ValueError('item must be an object')
+    uid = item.get('uid')
+    if not isinstance(uid, str) or not uid or len(uid) > 64:
+        raise ValueError('uid must be a string of 1 to 64 characters')
+    kind = item.get('kind')
+    if kind not in ('checkin', 'checkout'):
+        raise ValueError('kind must be checkin or checkout')
+    coords = []
+    for key in ('lat', 'lng'):
+        value = item.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f'{key} must be a number')
+        coords.append(value)
+    return uid, kind, _parse_timestamp(item.get('at')), *coords
 
 
 class OdhrApiController(http.Controller):
+    @http.route('/odhr/api/auth/token', type='http', auth='none', methods=['POST'], csrf=False)
+    def auth_token(self, **kwargs):
+        """Exchange Basic credentials for a short-lived signed bearer token."""
+        login, _pwd = parse_basic_auth(request.httprequest.headers.get('Authorization'))
+        if not login:
+            return _error('Basic Authorization header required', status=401)
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        token, expires_at = issue_token(env, env.uid)
+        return _json_response({
+            'access_token': token,
+            'token_type': 'Bearer',
+            'expires_at': expires_at,
+            'expires_in': expires_at - int(time.time()),
+        })
+
     @http.route('/odhr/api/auth/me', type='http', auth='none', methods=['GET'], csrf=False)
     def auth_me(self, **kwargs):
         env, err = _authenticate_from_request()
@@ -69,7 +268,11 @@ class OdhrApiController(http.Controller):
         if not roles:
             roles.append('employee')
 
-        employee = env['hr.employee'].sudo().search([('user_id', '=', user.id)], limit=1)
+        employee = _current_employee(env)
+        tag = etag('auth_me', roles, employee.id, record_version(user, 'company_id'))
+        resp = not_modified(tag)
+        if resp:
+            return resp
         company = user.company_id
         data = {
             'user_id': user.id,
@@ -80,65 +283,88 @@ class OdhrApiController(http.Controller):
             'company_id': company.id if company else None,
             'company_name': company.name if company else None,
         }
-        return _json_response(data)
+        return cacheable(_json_response(data), tag)
 
     @http.route('/odhr/api/employees/team', type='http', auth='none', methods=['POST'], csrf=False)
     def employees_team(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
+        payload = _json_payload()
+        manager_id = payload.get('manager_id')
+        if manager_id:
+            manager = env['hr.employee'].sudo().browse(int(manager_id))
+        else:
+            manager = _current_employee(env)
+        if not manager or not manager.exists():
+            return _error('Manager not found', status=404)
+        names, err = _requested_fields(kwargs, payload, EMPLOYEE)
+        if err:
+            return err
+        members = env['hr.employee']._odhr_team(manager, payload.get('include_indirect')).sorted('name')
+        items = EMPLOYEE.serialize(manager | members, names)
+        return _json_response({'manager': items[0], 'members': items[1:]})
+
+    @http.route('/odhr/api/employees/tree', type='http', auth='none', methods=['POST'], csrf=False)
+    def employees_tree(self, **kwargs):
+        """Subtree of a manager (default: the user) down to ``depth`` levels,
+        as a flat list of reports linked by ``manager_id``."""
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        payload = _json_payload()
         manager_id = payload.get('manager_id')
         if manager_id:
             manager = env['hr.employee'].sudo().browse(int(manager_id))
         else:
-            manager = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+            manager = _current_employee(env)
         if not manager or not manager.exists():
             return _error('Manager not found', status=404)
-        members = env['hr.employee'].sudo().search([('parent_id', '=', manager.id)], order='name')
-        return _json_response({'manager': self._serialize_employee(manager), 'members': [self._serialize_employee(e) for e in members]})
+        depth = payload.get('depth')
+        if depth is not None and (isinstance(depth, bool) or not isinstance(depth, int) or depth < 1):
+            return _error('depth must be a positive integer', status=400)
+        names, err = _requested_fields(kwargs, payload, EMPLOYEE)
+        if err:
+            return err
+        # the links are what the client builds the tree from
+        names = ['id', 'manager_id'] + [name for name in names if name not in ('id', 'manager_id')]
+        rows = env['hr.employee']._odhr_subtree(manager.ids, depth)
+        reports = env['hr.employee'].sudo().browse([row[0] for row in rows])
+        items = EMPLOYEE.serialize(manager | reports, names)
+        for item, (_id, _parent_id, level) in zip(items[1:], rows):
+            item['depth'] = level
+        return _json_response({'manager': items[0], 'items': items[1:]})
 
     # ===== Employees =====
-    def _serialize_employee(self, emp):
-        return {
-            'id': emp.id,
-            'name': emp.name,
-            'work_email': emp.work_email,
-            'work_phone': emp.work_phone,
-            'mobile_phone': emp.mobile_phone,
-            'job_title': emp.job_title,
-            'department_id': emp.department_id.id if emp.department_id else None,
-            'department_name': emp.department_id.name if emp.department_id else None,
-            'manager_id': emp.parent_id.id if emp.parent_id else None,
-            'manager_name': emp.parent_id.name if emp.parent_id else None,
-            'work_location_id': emp.work_location_id.id if hasattr(emp, 'work_location_id') and emp.work_location_id else None,
-            'join_date': emp.first_contract_date or emp.create_date,
-            'image_128': emp.image_128,
-        }
+    def _employee_response(self, emp, kwargs):
+        """Serialized ``emp``, or 304 when unchanged since the client's copy."""
+        names, err = _requested_fields(kwargs, {}, EMPLOYEE)
+        if err:
+            return err
+        # names shown for the department and manager come from those records
+        tag = etag('employee', names, record_version(emp, 'department_id', 'parent_id'))
+        resp = not_modified(tag)
+        if resp:
+            return resp
+        return cacheable(_json_response(EMPLOYEE.serialize_one(emp, names)), tag)
 
     @http.route('/odhr/api/employees/me', type='http', auth='none', methods=['GET'], csrf=False)
     def employees_me(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
-        return _json_response(self._serialize_employee(emp))
+        return self._employee_response(emp, kwargs)
 
     @http.route('/odhr/api/employees/me/update', type='http', auth='none', methods=['POST'], csrf=False)
     def employees_me_update(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        payload = _json_payload()
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
         # Limit editable fields
@@ -149,7 +375,7 @@ class OdhrApiController(http.Controller):
             allowed.pop('work_location_id', None)
         if allowed:
             emp.write(allowed)
-        return _json_response(self._serialize_employee(emp))
+        return _json_response(EMPLOYEE.serialize_one(emp))
 
     @http.route('/odhr/api/employees/<int:emp_id>', type='http', auth='none', methods=['GET'], csrf=False)
     def employees_get(self, emp_id, **kwargs):
@@ -159,17 +385,65 @@ class OdhrApiController(http.Controller):
         emp = env['hr.employee'].sudo().browse(emp_id)
         if not emp.exists():
             return _error('Employee not found', status=404)
-        return _json_response(self._serialize_employee(emp))
+        return self._employee_response(emp, kwargs)
+
+    @http.route([
+        '/odhr/api/employees/<int:emp_id>/avatar',
+        '/odhr/api/employees/<int:emp_id>/avatar/<int:size>',
+    ], type='http', auth='none', methods=['GET'], csrf=False)
+    def employees_avatar(self, emp_id, size=128, h=None, **kwargs):
+        """Employee picture variant as raw image bytes (placeholder when unset).
+
+        URLs built by ``image_url`` or the avatar manifest carry the content
+        hash ``h``: while it matches the current picture the response may be
+        cached forever.
+        """
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        if size not in AVATAR_SIZES:
+            return _error('Unsupported avatar size', status=404)
+        emp = env['hr.employee'].sudo().browse(emp_id)
+        if not emp.exists():
+            return _error('Employee not found', status=404)
+        stream = env['ir.binary']._get_image_stream_from(emp, f'image_{size}')
+        resp = stream.get_response()
+        current = h and h == avatar_hashes(env, [emp.id], [size])[emp.id, size]
+        resp.headers['Cache-Control'] = CACHE_IMMUTABLE if current else CACHE_PRIVATE
+        return resp
+
+    @http.route('/odhr/api/employees/avatars', type='http', auth='none', methods=['POST'], csrf=False)
+    def employees_avatars(self, **kwargs):
+        """Avatar manifest: content-addressed avatar URLs of many employees in one query.
+
+        Body: ``{"ids": [1, 2, ...], "sizes": [128, 256]}``; returns
+        ``{"items": {"<id>": {"<size>": url}}}``.
+        """
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        payload = _json_payload()
+        try:
+            ids = [int(emp_id) for emp_id in payload.get('ids') or []]
+            sizes = [int(size) for size in payload.get('sizes') or [128]]
+        except (TypeError, ValueError):
+            return _error('ids and sizes must be lists of integers', status=400)
+        if len(ids) > AVATAR_MANIFEST_MAX:
+            return _error(f'At most {AVATAR_MANIFEST_MAX} ids per call', status=400)
+        if any(size not in AVATAR_SIZES for size in sizes):
+            return _error(f"sizes must be among {', '.join(map(str, AVATAR_SIZES))}", status=400)
+        hashes = avatar_hashes(env, ids, sizes)
+        return _json_response({'items': {
+            str(emp_id): {str(size): avatar_url(env, emp_id, size, hashes[emp_id, size]) for size in sizes}
+            for emp_id in ids
+        }})
 
     @http.route('/odhr/api/employees/search', type='http', auth='none', methods=['POST'], csrf=False)
     def employees_search(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
+        payload = _json_payload()
         domain = []
         q = payload.get('q')
         if q:
@@ -180,17 +454,13 @@ class OdhrApiController(http.Controller):
         manager_id = payload.get('manager_id')
         if manager_id:
             domain.append(('parent_id', '=', int(manager_id)))
-        limit = int(payload.get('limit') or 20)
-        offset = int(payload.get('offset') or 0)
-        Employee = env['hr.employee'].sudo()
-        count = Employee.search_count(domain)
-        items = Employee.search(domain, limit=limit, offset=offset, order='name')
-        data = {
-            'total': count,
-            'limit': limit,
-            'offset': offset,
-            'items': [self._serialize_employee(e) for e in items],
-        }
+        names, err = _requested_fields(kwargs, payload, EMPLOYEE)
+        if err:
+            return err
+        items, data, err = _paginate(env['hr.employee'].sudo(), domain, payload, 'name, id', 20)
+        if err:
+            return err
+        data['items'] = EMPLOYEE.serialize(items, names)
         return _json_response(data)
 
     @http.route('/odhr/api/departments', type='http', auth='none', methods=['POST'], csrf=False)
@@ -198,77 +468,121 @@ class OdhrApiController(http.Controller):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
+        payload = _json_payload()
         domain = []
         search = payload.get('search')
         if search:
             domain.append(('name', 'ilike', search))
-        limit = int(payload.get('limit') or 50)
-        offset = int(payload.get('offset') or 0)
-        Department = env['hr.department'].sudo()
-        count = Department.search_count(domain)
-        items = Department.search(domain, limit=limit, offset=offset, order='name')
-        data = {
-            'total': count,
-            'limit': limit,
-            'offset': offset,
-            'items': [{'id': d.id, 'name': d.name, 'parent_id': d.parent_id.id or None} for d in items],
-        }
-        return _json_response(data)
+        tag = etag('departments', sorted(payload.items()), table_version(env['hr.department']))
+        resp = not_modified(tag, CACHE_REFERENCE)
+        if resp:
+            return resp
+        items, data, err = _paginate(env['hr.department'].sudo(), domain, payload, 'name, id', 50)
+        if err:
+            return err
+        data['items'] = DEPARTMENT.serialize(items)
+        return cacheable(_json_response(data), tag, CACHE_REFERENCE)
 
     # ===== Attendance =====
-    def _serialize_attendance(self, att):
-        return {
-            'id': att.id,
-            'check_in': att.check_in,
-            'check_out': att.check_out,
-            'worked_hours': att.worked_hours,
-            'manual': True,
-            'reason': None,
-        }
+    def _attendance_punch(self, kind):
+        """Check-in or check-out of the current employee, now.
 
-    @http.route('/odhr/api/attendance/checkin', type='http', auth='none', methods=['POST'], csrf=False)
-    def attendance_checkin(self, **kwargs):
+        An optional ``uid`` in the body makes the call idempotent: a retry
+        of a recorded punch returns the same attendance.
+        """
         env, err = _authenticate_from_request()
         if err:
             return err
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
-        # close any open attendance before new check-in
-        open_att = env['hr.attendance'].sudo().search([('employee_id', '=', emp.id), ('check_out', '=', False)], limit=1)
-        if open_att:
-            open_att.write({'check_out': fields.Datetime.now()})
-        att = env['hr.attendance'].sudo().create({'employee_id': emp.id, 'check_in': fields.Datetime.now()})
-        return _json_response(self._serialize_attendance(att))
+        payload = _json_payload()
+        uid = payload.get('uid')
+        if uid is not None and (not isinstance(uid, str) or not uid or len(uid) > 64):
+            return _error('uid must be a string of 1 to 64 characters', status=400)
+        coords = [payload.get(key) for key in ('lat', 'lng')]
+        coords = [value if isinstance(value, (int, float)) and not isinstance(value, bool) else None for value in coords]
+        Attendance = env['hr.attendance'].sudo()
+        attendance = Attendance._odhr_punched(emp, [uid]).get(uid)
+        if not attendance:
+            try:
+                with env.cr.savepoint():
+                    attendance = Attendance._odhr_punch(emp, kind, uid=uid, latitude=coords[0], longitude=coords[1])
+            except ValidationError as e:
+                return _error(str(e), status=400)
+        return _json_response(ATTENDANCE.serialize_one(attendance))
+
+    @http.route('/odhr/api/attendance/checkin', type='http', auth='none', methods=['POST'], csrf=False)
+    def attendance_checkin(self, **kwargs):
+        return self._attendance_punch('checkin')
 
     @http.route('/odhr/api/attendance/checkout', type='http', auth='none', methods=['POST'], csrf=False)
     def attendance_checkout(self, **kwargs):
+        return self._attendance_punch('checkout')
+
+    @http.route('/odhr/api/attendance/bulk', type='http', auth='none', methods=['POST'], csrf=False)
+    def attendance_bulk(self, **kwargs):
+        """Record punches queued offline, with their original time.
+
+        Body: ``{"items": [{"uid", "kind": "checkin"|"checkout", "at", "lat", "lng"}, ...]}``.
+        Punches are applied in time order, each in its own savepoint; a
+        ``uid`` already recorded is answered ``duplicate`` instead of being
+        applied again, so the queue can be replayed safely.  Results come
+        back in request order.
+        """
         env, err = _authenticate_from_request()
         if err:
             return err
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
-        open_att = env['hr.attendance'].sudo().search([('employee_id', '=', emp.id), ('check_out', '=', False)], limit=1)
-        if not open_att:
-            return _error('No open attendance to checkout', status=400)
-        open_att.write({'check_out': fields.Datetime.now()})
-        return _json_response(self._serialize_attendance(open_att))
+        items = _json_payload().get('items')
+        if not isinstance(items, list) or not items:
+            return _error('items must be a non-empty list', status=400)
+        if len(items) > ATTENDANCE_BULK_MAX:
+            return _error(f'At most {ATTENDANCE_BULK_MAX} items per request', status=400)
+        results, punches = [], []
+        for index, item in enumerate(items):
+            try:
+                punches.append((index, *_parse_punch(item)))
+                results.append({'uid': item['uid']})
+            except ValueError as e:
+                uid = item.get('uid') if isinstance(item, dict) else None
+                results.append({'uid': uid, 'status': 'error', 'error': str(e)})
+        Attendance = env['hr.attendance'].sudo()
+        punched = Attendance._odhr_punched(emp, [punch[1] for punch in punches])
+        attendances = {}
+        for index, uid, kind, at, latitude, longitude in sorted(punches, key=lambda punch: (punch[3], punch[0])):
+            if uid in punched:
+                results[index]['status'] = 'duplicate'
+                attendances[index] = punched[uid]
+                continue
+            try:
+                with env.cr.savepoint():
+                    attendance = Attendance._odhr_punch(emp, kind, at, uid, latitude, longitude)
+            except ValidationError as e:
+                results[index].update(status='error', error=str(e))
+                continue
+            except psycopg2.errors.UniqueViolation:
+                # recorded meanwhile by a concurrent request: the retry reports it
+                results[index].update(status='error', error='Concurrent punch, retry')
+                continue
+            results[index]['status'] = 'created'
+            punched[uid] = attendances[index] = attendance
+        # serialized last: a later punch may have closed an attendance
+        serialized = dict(zip(attendances, ATTENDANCE.serialize(Attendance.concat(*attendances.values()))))
+        for index, result in enumerate(results):
+            if 'status' in result and result['status'] != 'error':
+                result['attendance'] = serialized[index]
+        return _json_response({'results': results})
 
     @http.route('/odhr/api/attendance/history', type='http', auth='none', methods=['POST'], csrf=False)
     def attendance_history(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        payload = _json_payload()
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
         domain = [('employee_id', '=', emp.id)]
@@ -278,52 +592,79 @@ class OdhrApiController(http.Controller):
             domain.append(('check_in', '>=', from_str))
         if to_str:
             domain.append(('check_in', '<=', to_str))
-        limit = int(payload.get('limit') or 50)
-        offset = int(payload.get('offset') or 0)
-        Attendance = env['hr.attendance'].sudo()
-        count = Attendance.search_count(domain)
-        items = Attendance.search(domain, limit=limit, offset=offset, order='check_in desc')
+        items, data, err = _paginate(env['hr.attendance'].sudo(), domain, payload, 'check_in desc, id desc', 50)
+        if err:
+            return err
+        data['items'] = ATTENDANCE.serialize(items)
+        return _json_response(data)
+
+    @http.route('/odhr/api/attendance/analytics', type='http', auth='none', methods=['POST'], csrf=False)
+    def attendance_analytics(self, **kwargs):
+        """Attendance totals over ``from``..``to`` (default: this month so far)
+        of the user, of ``employee_id`` or of the user's ``team``, optionally
+        split per ``period`` (week, month or year)."""
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        payload = _json_payload()
+        emp = _current_employee(env)
+        is_hr = env.user.has_group('hr.group_hr_user')
+        if payload.get('team'):
+            if not emp:
+                return _error('No employee linked to current user', status=404)
+            employees = env['hr.employee']._odhr_team(emp, payload.get('include_indirect'))
+        elif payload.get('employee_id'):
+            employees = env['hr.employee'].sudo().browse(int(payload['employee_id'])).exists()
+            if not employees:
+                return _error('Employee not found', status=404)
+            if not is_hr and not (emp and (employees == emp or emp.id in employees._odhr_managers(employees)[1])):
+                return _error('Forbidden', status=403)
+        else:
+            if not emp:
+                return _error('No employee linked to current user', status=404)
+            employees = emp
+        period = payload.get('period')
+        if period not in (None, 'week', 'month', 'year'):
+            return _error('period must be week, month or year', status=400)
+        today = fields.Date.context_today(env['res.users'].with_user(env.user))
+        try:
+            date_from = fields.Date.to_date(payload.get('from')) or today.replace(day=1)
+            date_to = fields.Date.to_date(payload.get('to')) or today
+        except ValueError:
+            return _error('from and to must be YYYY-MM-DD dates', status=400)
+        if date_from > date_to or (date_to - date_from).days >= ANALYTICS_MAX_DAYS:
+            return _error(f'from..to must span 1 to {ANALYTICS_MAX_DAYS} days', status=400)
+        totals, periods = env['odhr.api.attendance.day'].summary(employees, date_from, date_to, period)
         data = {
-            'total': count,
-            'limit': limit,
-            'offset': offset,
-            'items': [self._serialize_attendance(a) for a in items],
+            'from': str(date_from),
+            'to': str(date_to),
+            'employee_count': len(employees),
+            **totals,
         }
+        if period:
+            data['periods'] = [{'start': str(start), **values} for start, values in periods]
         return _json_response(data)
 
     # ===== Leave (Time Off) =====
-    def _serialize_leave(self, leave):
-        return {
-            'id': leave.id,
-            'type_id': leave.holiday_status_id.id if hasattr(leave, 'holiday_status_id') and leave.holiday_status_id else None,
-            'type_name': leave.holiday_status_id.name if hasattr(leave, 'holiday_status_id') and leave.holiday_status_id else None,
-            'date_from': getattr(leave, 'request_date_from', None) or getattr(leave, 'date_from', None),
-            'date_to': getattr(leave, 'request_date_to', None) or getattr(leave, 'date_to', None),
-            'duration': getattr(leave, 'number_of_days', 0.0) or 0.0,
-            'reason': getattr(leave, 'name', None),
-            'state': leave.state,
-            'employee_id': leave.employee_id.id if leave.employee_id else None,
-        }
-
     @http.route('/odhr/api/leave/types', type='http', auth='none', methods=['GET'], csrf=False)
     def leave_types(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
+        tag = etag('leave_types', env.lang, table_version(env['hr.leave.type']))
+        resp = not_modified(tag, CACHE_REFERENCE)
+        if resp:
+            return resp
         types = env['hr.leave.type'].sudo().search([])
-        data = [{'id': t.id, 'name': t.name, 'code': getattr(t, 'code', None)} for t in types]
-        return _json_response(data)
+        return cacheable(_json_response(LEAVE_TYPE.serialize(types)), tag, CACHE_REFERENCE)
 
     @http.route('/odhr/api/leave/apply', type='http', auth='none', methods=['POST'], csrf=False)
     def leave_apply(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        payload = _json_payload()
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
         type_id = int(payload.get('type_id') or 0) or None
@@ -347,35 +688,25 @@ class OdhrApiController(http.Controller):
                 leave.action_confirm()
         except Exception:
             pass
-        return _json_response(self._serialize_leave(leave))
+        return _json_response(LEAVE.serialize_one(leave))
 
     @http.route('/odhr/api/leave/my', type='http', auth='none', methods=['POST'], csrf=False)
     def leave_my(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        payload = _json_payload()
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
         domain = [('employee_id', '=', emp.id)]
         states = payload.get('state')
         if states and isinstance(states, list):
             domain.append(('state', 'in', states))
-        limit = int(payload.get('limit') or 20)
-        offset = int(payload.get('offset') or 0)
-        Leave = env['hr.leave'].sudo()
-        count = Leave.search_count(domain)
-        items = Leave.search(domain, limit=limit, offset=offset, order='request_date_from desc')
-        data = {
-            'total': count,
-            'limit': limit,
-            'offset': offset,
-            'items': [self._serialize_leave(l) for l in items],
-        }
+        items, data, err = _paginate(env['hr.leave'].sudo(), domain, payload, 'request_date_from desc, id desc', 20)
+        if err:
+            return err
+        data['items'] = LEAVE.serialize(items)
         return _json_response(data)
 
     @http.route('/odhr/api/leave/balances', type='http', auth='none', methods=['GET'], csrf=False)
@@ -383,13 +714,41 @@ class OdhrApiController(http.Controller):
         env, err = _authenticate_from_request()
         if err:
             return err
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
-        # Basic placeholder: remaining = 0; extend with proper computation later
+        return _json_response(env['odhr.api.leave.balance'].get_balances(emp)[emp.id])
+
+    @http.route('/odhr/api/leave/balances/team', type='http', auth='none', methods=['POST'], csrf=False)
+    def leave_balances_team(self, **kwargs):
+        """Balance matrix of a manager's team (default: the user's): one row
+        per employee, one column per leave type."""
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        payload = _json_payload()
+        emp = _current_employee(env)
+        manager_id = payload.get('manager_id')
+        manager = env['hr.employee'].sudo().browse(int(manager_id)) if manager_id else emp
+        if not manager or not manager.exists():
+            return _error('Manager not found', status=404)
+        if not env.user.has_group('hr.group_hr_user') and not (
+            emp and (manager == emp or emp.id in manager._odhr_managers(manager)[1])
+        ):
+            return _error('Forbidden', status=403)
+        team = env['hr.employee']._odhr_team(manager, payload.get('include_indirect')).sorted('name')
         types = env['hr.leave.type'].sudo().search([])
-        data = [{'type_id': t.id, 'type_name': t.name, 'remaining': 0, 'unit': 'days'} for t in types]
-        return _json_response(data)
+        balances = env['odhr.api.leave.balance'].get_balances(team, types)
+        columns = ('allocated', 'taken', 'pending', 'remaining', 'virtual_remaining')
+        return _json_response({
+            'types': [{'id': t.id, 'name': t.name, 'unit': 'hours' if t.request_unit == 'hour' else 'days'} for t in types],
+            'columns': list(columns),
+            'rows': [{
+                'employee_id': member.id,
+                'employee_name': member.name,
+                'balances': [[item[column] for column in columns] for item in balances[member.id]],
+            } for member in team],
+        })
 
     @http.route('/odhr/api/leave/<int:leave_id>/approve', type='http', auth='none', methods=['POST'], csrf=False)
     def leave_approve(self, leave_id, **kwargs):
@@ -408,7 +767,7 @@ class OdhrApiController(http.Controller):
                 leave.action_validate()
         except Exception:
             return _error('Unable to approve leave', status=400)
-        return _json_response(self._serialize_leave(leave))
+        return _json_response(LEAVE.serialize_one(leave))
 
     @http.route('/odhr/api/leave/<int:leave_id>/reject', type='http', auth='none', methods=['POST'], csrf=False)
     def leave_reject(self, leave_id, **kwargs):
@@ -417,10 +776,7 @@ class OdhrApiController(http.Controller):
             return err
         if not (env.user.has_group('hr.group_hr_user') or env.user.has_group('hr.group_hr_manager')):
             return _error('Forbidden', status=403)
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
+        payload = _json_payload()
         reason = payload.get('reason')
         leave = env['hr.leave'].sudo().browse(leave_id)
         if not leave.exists():
@@ -432,32 +788,61 @@ class OdhrApiController(http.Controller):
                 leave.action_refuse()
         except Exception:
             return _error('Unable to reject leave', status=400)
-        return _json_response(self._serialize_leave(leave))
+        return _json_response(LEAVE.serialize_one(leave))
 
     @http.route('/odhr/api/leave/calendar', type='http', auth='none', methods=['POST'], csrf=False)
     def leave_calendar(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
+        payload = _json_payload()
         manager_id = payload.get('team_manager_id')
         if manager_id:
-            employees = env['hr.employee'].sudo().search([('parent_id', '=', int(manager_id))])
+            manager = env['hr.employee'].sudo().browse(int(manager_id))
         else:
-            me = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
-            employees = env['hr.employee'].sudo().search([('parent_id', '=', me.id)]) if me else env['hr.employee'].sudo().browse([])
+            manager = _current_employee(env)
+        if payload.get('mode') == 'days':
+            return self._leave_calendar_days(env, manager, payload)
+        employees = env['hr.employee']._odhr_team(manager, payload.get('include_indirect'))
         from_str = payload.get('from')
         to_str = payload.get('to')
         domain = [('employee_id', 'in', employees.ids)]
+        # leaves overlapping the window, including those across its edges
         if from_str:
-            domain.append(('request_date_from', '>=', from_str))
+            domain.append(('request_date_to', '>=', from_str))
         if to_str:
-            domain.append(('request_date_to', '<=', to_str))
+            domain.append(('request_date_from', '<=', to_str))
         leaves = env['hr.leave'].sudo().search(domain, order='request_date_from')
-        return _json_response([self._serialize_leave(l) for l in leaves])
+        return _json_response(LEAVE.serialize(leaves))
+
+    def _leave_calendar_days(self, env, manager, payload):
+        """Who is off on each day from ``from`` to ``to``."""
+        try:
+            date_from = fields.Date.to_date(payload.get('from'))
+            date_to = fields.Date.to_date(payload.get('to'))
+        except ValueError:
+            date_from = date_to = None
+        if not date_from or not date_to or date_from > date_to:
+            return _error('from and to must be YYYY-MM-DD dates', status=400)
+        if (date_to - date_from).days >= LEAVE_CALENDAR_MAX_DAYS:
+            return _error(f'from..to must span at most {LEAVE_CALENDAR_MAX_DAYS} days', status=400)
+        days = env['odhr.api.leave.calendar'].get_days(manager, date_from, date_to, payload.get('include_indirect')) if manager else {}
+        entries = [entry for day_entries in days.values() for entry in day_entries]
+        employees = env['hr.employee'].sudo().browse(sorted({entry[0] for entry in entries}))
+        types = env['hr.leave.type'].sudo().browse(sorted({entry[2] for entry in entries}))
+        return _json_response({
+            'from': str(date_from),
+            'to': str(date_to),
+            'employees': [{'id': e.id, 'name': e.name} for e in employees],
+            'types': [{'id': t.id, 'name': t.name} for t in types],
+            'days': [{
+                'date': day,
+                'off': [
+                    {'employee_id': emp_id, 'leave_id': leave_id, 'type_id': type_id, 'state': state}
+                    for emp_id, leave_id, type_id, state in day_entries
+                ],
+            } for day, day_entries in days.items()],
+        })
 
     # ===== Devices / Notifications =====
     @http.route('/odhr/api/devices/register', type='http', auth='none', methods=['POST'], csrf=False)
@@ -465,10 +850,7 @@ class OdhrApiController(http.Controller):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
+        payload = _json_payload()
         platform = payload.get('platform')
         token = payload.get('token')
         if not platform or not token:
@@ -485,33 +867,42 @@ class OdhrApiController(http.Controller):
             icp.set_param(f'odhr.push.{platform}.{env.user.id}', token)
         return _json_response({'ok': True})
 
-    # ===== Manager Overview (stub) =====
+    # ===== Manager Overview =====
     @http.route('/odhr/api/manager/team_overview', type='http', auth='none', methods=['POST'], csrf=False)
     def manager_team_overview(self, **kwargs):
+        """KPI snapshot of a manager's team, or with ``drilldown`` the records
+        behind one KPI."""
         env, err = _authenticate_from_request()
         if err:
             return err
         if not (env.user.has_group('hr.group_hr_user') or env.user.has_group('hr.group_hr_manager')):
             return _error('Forbidden', status=403)
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
+        payload = _json_payload()
         manager_id = payload.get('manager_id')
         if manager_id:
             manager = env['hr.employee'].sudo().browse(int(manager_id))
         else:
-            manager = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+            manager = _current_employee(env)
         if not manager.exists():
             return _error('Manager not found', status=404)
-        team = env['hr.employee'].sudo().search([('parent_id', '=', manager.id)])
-        # Simple KPIs
-        today = fields.Date.today()
-        Attendance = env['hr.attendance'].sudo()
-        Leave = env['hr.leave'].sudo()
-        att_count = Attendance.search_count([('employee_id', 'in', team.ids), ('check_in', '>=', f'{today} 00:00:00')])
-        leaves_count = Leave.search_count([('employee_id', 'in', team.ids), ('state', 'in', ['confirm', 'validate1', 'validate'])])
-        return _json_response({'team_size': len(team), 'today_attendance_count': att_count, 'open_leaves_count': leaves_count})
+        Kpi = env['odhr.api.team.kpi']
+        kpis = Kpi._kpi_names()
+        indirect = bool(payload.get('include_indirect'))
+        drilldown = payload.get('drilldown')
+        if drilldown:
+            if drilldown not in kpis:
+                return _error(f"drilldown must be one of: {', '.join(kpis)}", status=400)
+            records = Kpi._kpi_records(manager, Kpi._today(manager), indirect)[drilldown]
+            serializer = TEAM_KPI_DRILLDOWN[records._name]
+            return _json_response({'kpi': drilldown, 'model': records._name, 'items': serializer.serialize(records)})
+        snapshot = Kpi.get_snapshot(manager, indirect)
+        return _json_response({
+            'manager_id': manager.id,
+            'include_indirect': indirect,
+            'day': snapshot.day,
+            'computed_at': snapshot.computed_at,
+            **{kpi: snapshot[kpi] for kpi in kpis},
+        })
 
     # ===== Announcements / News =====
     @http.route('/odhr/api/announcements', type='http', auth='none', methods=['POST'], csrf=False)
@@ -519,12 +910,7 @@ class OdhrApiController(http.Controller):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
-        limit = int(payload.get('limit') or 20)
-        offset = int(payload.get('offset') or 0)
+        payload = _json_payload()
         # Strategy: Prefer explicit channel_id if provided; else a channel named 'Announcements'; else fallback to public channel messages
         Channel = env['mail.channel'].sudo()
         chan = None
@@ -542,81 +928,253 @@ class OdhrApiController(http.Controller):
         else:
             # Fallback: any public channel messages
             domain += [('message_type', '=', 'comment')]
-        count = Message.search_count(domain)
-        msgs = Message.search(domain, limit=limit, offset=offset, order='date desc')
-        items = []
-        for m in msgs:
-            items.append({
-                'id': m.id,
-                'subject': (m.subject or (m.record_name or ''))[:120],
-                'body_html': m.body,
-                'body_text': (m.body or '').replace('<br>', '\n'),
-                'date': m.date,
-                'author_name': m.author_id.name if m.author_id else None,
-            })
-        return _json_response({'total': count, 'limit': limit, 'offset': offset, 'items': items})
+        msgs, data, err = _paginate(Message, domain, payload, 'date desc, id desc', 20)
+        if err:
+            return err
+        data['items'] = ANNOUNCEMENT.serialize(msgs)
+        return _json_response(data)
 
     # ===== Payroll / Payslips =====
-    def _serialize_payslip(self, p):
-        return {
-            'id': p.id,
-            'name': p.name,
-            'date_from': p.date_from,
-            'date_to': p.date_to,
-            'net_wage': getattr(p, 'net_wage', 0.0) or 0.0,
-            'state': p.state,
-        }
-
     @http.route('/odhr/api/payroll/payslips', type='http', auth='none', methods=['POST'], csrf=False)
     def payroll_payslips(self, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        try:
-            payload = json.loads(request.httprequest.data.decode('utf-8') or '{}')
-        except Exception:
-            payload = {}
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        payload = _json_payload()
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
-        limit = int(payload.get('limit') or 20)
-        offset = int(payload.get('offset') or 0)
-        Payslip = env['hr.payslip'].sudo()
         domain = [('employee_id', '=', emp.id)]
-        count = Payslip.search_count(domain)
-        slips = Payslip.search(domain, limit=limit, offset=offset, order='date_from desc')
-        return _json_response({'total': count, 'limit': limit, 'offset': offset, 'items': [self._serialize_payslip(p) for p in slips]})
+        slips, data, err = _paginate(env['hr.payslip'].sudo(), domain, payload, 'date_from desc, id desc', 20)
+        if err:
+            return err
+        data['items'] = PAYSLIP.serialize(slips)
+        return _json_response(data)
 
     @http.route('/odhr/api/payroll/payslips/<int:slip_id>', type='http', auth='none', methods=['GET'], csrf=False)
     def payroll_payslip_detail(self, slip_id, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
         slip = env['hr.payslip'].sudo().browse(slip_id)
         if not slip.exists() or slip.employee_id.id != emp.id:
             return _error('Payslip not found', status=404)
-        lines = [{'code': l.code, 'name': l.name, 'amount': l.total} for l in slip.line_ids]
-        return _json_response({'payslip': self._serialize_payslip(slip), 'lines': lines})
+        return _json_response({'payslip': PAYSLIP.serialize_one(slip), 'lines': PAYSLIP_LINE.serialize(slip.line_ids)})
 
     @http.route('/odhr/api/payroll/payslips/<int:slip_id>/pdf', type='http', auth='none', methods=['GET'], csrf=False)
     def payroll_payslip_pdf(self, slip_id, **kwargs):
         env, err = _authenticate_from_request()
         if err:
             return err
-        emp = env['hr.employee'].sudo().search([('user_id', '=', env.user.id)], limit=1)
+        emp = _current_employee(env)
         if not emp:
             return _error('No employee linked to current user', status=404)
         slip = env['hr.payslip'].sudo().browse(slip_id)
         if not slip.exists() or slip.employee_id.id != emp.id:
             return _error('Payslip not found', status=404)
-        # Try common external id for payslip report
-        report = env.ref('hr_payroll.action_report_payslip', raise_if_not_found=False)
-        if not report:
+        attachment = env['odhr.api.payslip.pdf'].get_attachment(slip)
+        if not attachment:
             return _error('Payslip PDF report not available', status=404)
-        pdf_bytes = report._render_qweb_pdf([slip.id])[0]
-        pdf_b64 = base64.b64encode(pdf_bytes).decode('ascii')
         filename = f"payslip_{slip.id}.pdf"
-        return _json_response({'filename': filename, 'pdf_base64': pdf_b64})
+        if kwargs.get('format') == 'json':
+            # base64 envelope of the first app releases
+            return _json_response({'filename': filename, 'pdf_base64': attachment.datas.decode('ascii')})
+        stream = env['ir.binary']._get_stream_from(attachment)
+        stream.download_name = filename
+        resp = stream.get_response(as_attachment=True)
+        resp.headers['Cache-Control'] = CACHE_PRIVATE
+        return resp
+
+    # ===== Report jobs =====
+    def _job_for(self, env, job_id):
+        """Job ``job_id`` of the current user, possibly empty."""
+        return env['odhr.api.job'].sudo().search([('id', '=', job_id), ('user_id', '=', env.uid)])
+
+    @http.route('/odhr/api/jobs', type='http', auth='none', methods=['POST'], csrf=False)
+    def jobs_enqueue(self, **kwargs):
+        """Queue a report job (``payslip_pdf`` or ``attendance_export``).
+
+        Answers 202 with the job; poll /odhr/api/jobs/<id> until its state
+        is ``done``, then fetch its ``download_url``.
+        """
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        payload = _json_payload()
+        try:
+            job = env['odhr.api.job'].enqueue(payload.get('type'), payload.get('params'))
+        except ValidationError as e:
+            return _error(str(e), status=400)
+        return _json_response(JOB.serialize_one(job), status=202)
+
+    @http.route('/odhr/api/jobs/<int:job_id>', type='http', auth='none', methods=['GET'], csrf=False)
+    def jobs_status(self, job_id, **kwargs):
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        job = self._job_for(env, job_id)
+        if not job:
+            return _error('Job not found', status=404)
+        return _json_response(JOB.serialize_one(job))
+
+    @http.route('/odhr/api/jobs/<int:job_id>/download', type='http', auth='none', methods=['GET'], csrf=False)
+    def jobs_download(self, job_id, **kwargs):
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        job = self._job_for(env, job_id)
+        if not job:
+            return _error('Job not found', status=404)
+        if job.state != 'done' or not job.attachment_id:
+            return _error('Job result not available', status=409)
+        stream = env['ir.binary']._get_stream_from(job.attachment_id.sudo())
+        resp = stream.get_response(as_attachment=True)
+        resp.headers['Cache-Control'] = CACHE_PRIVATE
+        return resp
+
+    # ===== Metrics =====
+    @http.route('/odhr/api/metrics', type='http', auth='none', methods=['GET'], csrf=False)
+    def api_metrics(self, **kwargs):
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        if not env.user.has_group('base.group_system'):
+            return _error('Forbidden', status=403)
+        return _json_response({'pid': os.getpid(), 'counters': metrics.snapshot()})
+
+    # ===== Offline sync =====
+    @http.route('/odhr/api/sync', type='http', auth='none', methods=['POST'], csrf=False)
+    def sync(self, **kwargs):
+        """Records changed and deleted since the client's per-model cursors.
+
+        Body: ``{"models": {"employees": <cursor or null>, ...}, "limit": 200}``.
+        Each model answers ``items`` to upsert, ``deleted`` ids, the next
+        ``cursor`` and ``has_more``; ``reset`` means the cursor was too old
+        and the client must drop its copy before applying this page.
+        """
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        payload = _json_payload()
+        cursors = payload.get('models')
+        if not isinstance(cursors, dict) or not cursors:
+            return _error('models must map model names to cursors', status=400)
+        unknown = [name for name in cursors if name not in SYNC_MODELS]
+        if unknown:
+            return _error(f"Unknown models: {', '.join(unknown)}", status=400)
+        try:
+            limit = min(int(payload.get('limit') or SYNC_DEFAULT_LIMIT), SYNC_MAX_LIMIT)
+        except (TypeError, ValueError):
+            return _error('Invalid limit', status=400)
+        if limit <= 0:
+            return _error('Invalid limit', status=400)
+        emp = _current_employee(env)
+        result = {}
+        for name, cursor in cursors.items():
+            model_name, serializer, per_employee = SYNC_MODELS[name]
+            if per_employee and not emp:
+                return _error('No employee linked to current user', status=404)
+            model = env[model_name].sudo()
+            domain = [('employee_id', '=', emp.id)] if per_employee else []
+            scope_id = emp.id if per_employee else None
+            reset = False
+            try:
+                records, deleted, next_cursor, has_more = sync_changes(model, domain, cursor, limit, scope_id)
+            except CursorExpired:
+                reset = True
+                records, deleted, next_cursor, has_more = sync_changes(model, domain, None, limit, scope_id)
+            except ValueError:
+                return _error(f'Invalid cursor for {name}', status=400)
+            result[name] = {
+                'items': serializer.serialize(records),
+                'deleted': deleted,
+                'cursor': next_cursor,
+                'has_more': has_more,
+                'reset': reset,
+            }
+        return _json_response({'models': result})
+
+    # ===== Batch =====
+    def _batch_adapter(self):
+        """URL matcher over this controller's own routes (the batch route excluded)."""
+        cls = type(self)
+        if '_odhr_batch_map' not in cls.__dict__:
+            rules = []
+            for name in dir(cls):
+                routing = getattr(getattr(cls, name), 'original_routing', None)
+                if not routing or name == 'batch':
+                    continue
+                for route in routing.get('routes') or []:
+                    rules.append(Rule(route, endpoint=name, methods=routing.get('methods')))
+            cls._odhr_batch_map = Map(rules)
+        return cls._odhr_batch_map.bind('localhost')
+
+    def _batch_call(self, adapter, item):
+        method = (item.get('method') or 'GET').upper()
+        path, _sep, query = (item.get('path') or '').partition('?')
+        try:
+            endpoint, args = adapter.match(path, method=method)
+        except NotFound:
+            return 404, {'error': 'Unknown route'}
+        except MethodNotAllowed:
+            return 405, {'error': 'Method not allowed'}
+        params = dict(parse_qsl(query))
+        params.update(args)
+        request.odhr_batch_payload = item.get('body') or {}
+        try:
+            with request.env.cr.savepoint():
+                resp = getattr(self, endpoint)(**params)
+            # files (avatars, PDFs, downloads) are streamed, or passed
+            # through from the filestore: not embeddable in a JSON batch
+            if resp.direct_passthrough or resp.is_streamed:
+                return 400, {'error': 'Binary responses are not available in a batch'}
+            data = resp.get_data()
+            if data and resp.mimetype != 'application/json':
+                return 400, {'error': 'Binary responses are not available in a batch'}
+            body = json.loads(data) if data else None
+        except Exception:
+            _logger.exception('Batch sub-request %s %s failed', method, path)
+            return 500, {'error': 'Internal error'}
+        finally:
+            request.odhr_batch_payload = None
+        return resp.status_code, body
+
+    @http.route('/odhr/api/batch', type='http', auth='none', methods=['POST'], csrf=False)
+    def batch(self, **kwargs):
+        """Run several API calls in one round trip.
+
+        Body: ``{"requests": [{"id": "me", "method": "GET", "path": "/odhr/api/auth/me"},
+        {"id": "bal", "method": "GET", "path": "/odhr/api/leave/balances"}, ...]}``.
+        Authentication happens once for the whole batch and every sub-request
+        runs in the request cursor under its own savepoint, so a failing item
+        rolls back alone.  Returns ``{"responses": [{"id", "status", "body"}]}``
+        in request order.
+        """
+        env, err = _authenticate_from_request()
+        if err:
+            return err
+        items = _json_payload().get('requests')
+        if not isinstance(items, list) or not items:
+            return _error('requests must be a non-empty list', status=400)
+        if len(items) > BATCH_MAX_REQUESTS:
+            return _error(f'At most {BATCH_MAX_REQUESTS} requests per batch', status=400)
+        adapter = self._batch_adapter()
+        responses = []
+        request.odhr_batch_env = env
+        try:
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    status, body = 400, {'error': 'Invalid request item'}
+                else:
+                    status, body = self._batch_call(adapter, item)
+                responses.append({
+                    'id': item.get('id', index) if isinstance(item, dict) else index,
+                    'status': status,
+                    'body': body,
+                })
+        finally:
+            request.odhr_batch_env = None
+        return _json_response({'responses': responses})
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from . import ir_http
+from . import rate_limit
+from . import sync
+from . import hr_employee
+from . import hr_attendance
+from . import upload
+from . import payslip_pdf
+from . import job
+from . import attendance_day
+from . import team_kpi
+from . import leave_balance
+from . import leave_calendar
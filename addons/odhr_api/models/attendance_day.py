@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import pytz
+
+from odoo import api, fields, models, modules
+
+# a first check-in this many minutes after the scheduled start is late (and
+# a last check-out as much before the scheduled end is an early leave);
+# overridden by the odhr_api.late_tolerance_minutes system parameter
+LATE_TOLERANCE_MINUTES = 5
+# employees reconciled per transaction by the nightly job
+RECONCILE_BATCH = 200
+# days of absences rolled up by the first run of the nightly job
+ABSENCE_BACKFILL_DAYS = 366
+
+
+class OdhrApiAttendanceDay(models.Model):
+    """Daily attendance totals of an employee, in the employee's timezone.
+
+    One row per worked day, and per past working day without attendance
+    (net of time off), flagged ``absent``.  Rows are refreshed from
+    ``hr.attendance`` whenever attendances are created, changed or deleted,
+    from ``resource.calendar.leaves`` when time off changes, and reconciled
+    every night, so that analytics over months read one row per day instead
+    of every attendance and schedule.
+    """
+    _name = 'odhr.api.attendance.day'
+    _description = 'ODHR API Daily Attendance Rollup'
+    _order = 'day desc, employee_id'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', required=True, ondelete='cascade', index=True)
+    day = fields.Date(required=True)
+    attendance_count = fields.Integer()
+    worked_hours = fields.Float()
+    overtime_hours = fields.Float(help='Hours worked beyond the schedule of the day')
+    first_in = fields.Datetime()
+    last_out = fields.Datetime()
+    late = fields.Boolean()
+    early_leave = fields.Boolean()
+    absent = fields.Boolean(help='Scheduled working day, over, without attendance')
+
+    _sql_constraints = [
+        ('employee_day_uniq', 'unique(employee_id, day)', 'One rollup per employee and day.'),
+    ]
+
+    # ------------------------------------------------------------------
+    # Schedules
+    # ------------------------------------------------------------------
+    @api.model
+    def _tolerance(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('odhr_api.late_tolerance_minutes')
+        try:
+            return timedelta(minutes=int(value)) if value else timedelta(minutes=LATE_TOLERANCE_MINUTES)
+        except ValueError:
+            return timedelta(minutes=LATE_TOLERANCE_MINUTES)
+
+    @api.model
+    def _schedule(self, calendar, day, cache):
+        """``(start hour, end hour, hours)`` scheduled by ``calendar`` on ``day``, or None."""
+        if not calendar:
+            return None
+        if calendar.two_weeks_calendar:
+            week_type = str(self.env['resource.calendar.attendance'].get_week_type(day))
+        else:
+            week_type = None
+        dated = any(line.date_from or line.date_to for line in calendar.attendance_ids)
+        key = (calendar.id, day if dated else day.weekday(), week_type)
+        if key not in cache:
+            lines = calendar.attendance_ids.filtered(lambda line: (
+                not line.display_type
+                and not line.resource_id
+                and line.dayofweek == str(day.weekday())
+                and line.day_period != 'lunch'
+                and (week_type is None or line.week_type == week_type)
+                and (not line.date_from or line.date_from <= day)
+                and (not line.date_to or line.date_to >= day)
+            ))
+            cache[key] = (
+                min(lines.mapped('hour_from')),
+                max(lines.mapped('hour_to')),
+                sum(line.hour_to - line.hour_from for line in lines),
+            ) if lines else None
+        return cache[key]
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+    @api.model
+    def _local_day(self, employee, value):
+        tz = pytz.timezone(employee.tz or 'UTC')
+        return pytz.utc.localize(value).astimezone(tz).date()
+
+    @api.model
+    def _days_of(self, attendances):
+        """``{employee_id: {day}}`` touched by ``attendances``."""
+        days = defaultdict(set)
+        for attendance in attendances.sudo():
+            if attendance.employee_id and attendance.check_in:
+                days[attendance.employee_id.id].add(self._local_day(attendance.employee_id, attendance.check_in))
+        return days
+
+    @api.model
+    def _absences(self, employees, employee_days):
+        """``{(employee_id, day)}`` among ``employee_days`` that are scheduled
+        working days of the employee, net of time off."""
+        all_days = set().union(*employee_days.values())
+        # one day of margin each side covers any timezone offset
+        work = employees._list_work_time_per_day(
+            pytz.utc.localize(datetime.combine(min(all_days) - timedelta(days=1), time.min)),
+            pytz.utc.localize(datetime.combine(max(all_days) + timedelta(days=1), time.max)),
+        )
+        return {
+            (emp_id, day)
+            for emp_id, day_hours in work.items()
+            for day, hours in day_hours
+            if hours > 0 and day in employee_days.get(emp_id, ())
+        }
+
+    @api.model
+    def _refresh(self, employee_days):
+        """Recompute the rollups of ``{employee_id: {day}}`` from the attendances
+        and, for the days without any, from the working schedules."""
+        employee_days = {emp_id: days for emp_id, days in employee_days.items() if days}
+        if not employee_days:
+            return
+        self.env['hr.attendance'].flush_model(['employee_id', 'check_in', 'check_out', 'worked_hours'])
+        all_days = set().union(*employee_days.values())
+        # one day of margin each side covers any timezone offset
+        self.env.cr.execute("""
+            SELECT a.employee_id,
+                   (a.check_in AT TIME ZONE 'UTC' AT TIME ZONE COALESCE(r.tz, 'UTC'))::date AS day,
+                   COUNT(*), SUM(COALESCE(a.worked_hours, 0)), MIN(a.check_in),
+                   -- no last check-out while the employee is still checked in
+                   CASE WHEN bool_and(a.check_out IS NOT NULL) THEN MAX(a.check_out) END
+              FROM hr_attendance a
+              JOIN hr_employee e ON e.id = a.employee_id
+              JOIN resource_resource r ON r.id = e.resource_id
+             WHERE a.employee_id = ANY(%s)
+               AND a.check_in >= %s AND a.check_in < %s
+          GROUP BY 1, 2
+        """, [list(employee_days), min(all_days) - timedelta(days=1), max(all_days) + timedelta(days=2)])
+        totals = {
+            (emp_id, day): row
+            for emp_id, day, *row in self.env.cr.fetchall()
+            if day in employee_days[emp_id]
+        }
+        employees = self.env['hr.employee'].sudo().browse(list(employee_days))
+        # days over without attendance: absences when scheduled
+        now = fields.Datetime.now()
+        idle = defaultdict(set)
+        for employee in employees:
+            today = self._local_day(employee, now)
+            idle[employee.id] = {
+                day for day in employee_days[employee.id]
+                if day < today and (employee.id, day) not in totals
+            }
+        idle_employees = employees.filtered(lambda employee: idle[employee.id] and employee.resource_calendar_id)
+        absences = self._absences(idle_employees, idle) if idle_employees else set()
+
+        tolerance = self._tolerance()
+        cache = {}
+        values = []
+        for employee in employees:
+            tz = pytz.timezone(employee.tz or 'UTC')
+            for day in employee_days[employee.id]:
+                if (employee.id, day) in absences:
+                    values.append((employee.id, day, 0, 0.0, 0.0, None, None, False, False, True))
+                if (employee.id, day) not in totals:
+                    continue
+                count, worked, first_in, last_out = totals[employee.id, day]
+                schedule = self._schedule(employee.resource_calendar_id, day, cache)
+                late = early = False
+                overtime = worked
+                if schedule:
+                    start, end, hours = schedule
+                    midnight = tz.localize(datetime.combine(day, time.min))
+                    scheduled_start = (midnight + timedelta(hours=start)).astimezone(pytz.utc).replace(tzinfo=None)
+                    scheduled_end = (midnight + timedelta(hours=end)).astimezone(pytz.utc).replace(tzinfo=None)
+                    late = first_in > scheduled_start + tolerance
+                    early = bool(last_out) and last_out < scheduled_end - tolerance
+                    overtime = max(worked - hours, 0.0)
+                values.append((employee.id, day, count, worked, overtime, first_in, last_out, late, early, False))
+
+        cr = self.env.cr
+        if values:
+            cr.execute("""
+                INSERT INTO odhr_api_attendance_day
+                       (employee_id, day, attendance_count, worked_hours, overtime_hours,
+                        first_in, last_out, late, early_leave, absent)
+                SELECT * FROM unnest(%s::int[], %s::date[], %s::int[], %s::float8[], %s::float8[],
+                                     %s::timestamp[], %s::timestamp[], %s::bool[], %s::bool[], %s::bool[])
+                    ON CONFLICT (employee_id, day) DO UPDATE
+                   SET attendance_count = EXCLUDED.attendance_count,
+                       worked_hours = EXCLUDED.worked_hours,
+                       overtime_hours = EXCLUDED.overtime_hours,
+                       first_in = EXCLUDED.first_in,
+                       last_out = EXCLUDED.last_out,
+                       late = EXCLUDED.late,
+                       early_leave = EXCLUDED.early_leave,
+                       absent = EXCLUDED.absent
+            """, [list(column) for column in zip(*values)])
+        # days left without attendance nor absence lose their row
+        empty = [
+            (emp_id, day) for emp_id, days in employee_days.items() for day in days
+            if (emp_id, day) not in totals and (emp_id, day) not in absences
+        ]
+        if empty:
+            cr.execute("""
+                DELETE FROM odhr_api_attendance_day d
+                 USING unnest(%s::int[], %s::date[]) AS k (employee_id, day)
+                 WHERE d.employee_id = k.employee_id AND d.day = k.day
+            """, [[emp_id for emp_id, _day in empty], [day for _emp_id, day in empty]])
+        self.invalidate_model()
+        # presence of today, for the team overview of the managers
+        recent = fields.Date.today() - timedelta(days=1)
+        self.env['odhr.api.team.kpi']._touch(employees.filtered(
+            lambda employee: max(employee_days[employee.id]) >= recent
+        ))
+
+    @api.model
+    def _time_off_spans(self, leaves):
+        """``[(date from, date to, resource id, calendar id)]`` of the time off
+        ``leaves`` (``resource.calendar.leaves``)."""
+        return [
+            (leave.date_from, leave.date_to, leave.resource_id.id, leave.calendar_id.id)
+            for leave in leaves.sudo() if leave.date_from and leave.date_to
+        ]
+
+    @api.model
+    def _refresh_time_off(self, spans):
+        """Refresh the past days covered by the time off ``spans`` (see
+        :meth:`_time_off_spans`): absences come and go with it."""
+        Employee = self.env['hr.employee'].sudo()
+        today = fields.Date.today()
+        employee_days = defaultdict(set)
+        for date_from, date_to, resource_id, calendar_id in spans:
+            # one day of margin each side covers any timezone offset
+            start = date_from.date() - timedelta(days=1)
+            end = min(date_to.date() + timedelta(days=1), today - timedelta(days=1))
+            if start > end:
+                continue
+            if resource_id:
+                domain = [('resource_id', '=', resource_id)]
+            elif calendar_id:
+                domain = [('resource_calendar_id', '=', calendar_id)]
+            else:
+                domain = []
+            days = {start + timedelta(days=offset) for offset in range((end - start).days + 1)}
+            for emp_id in Employee.search(domain).ids:
+                employee_days[emp_id] |= days
+        self._refresh(employee_days)
+
+    @api.model
+    def cron_reconcile(self, days=3):
+        """Rebuild the rollups of the last ``days`` days, or of all attendances
+        (and of the absences of the last ABSENCE_BACKFILL_DAYS days) on the
+        first run after installation."""
+        cr = self.env.cr
+        ICP = self.env['ir.config_parameter'].sudo()
+        self.env['hr.attendance'].flush_model()
+        backfilled = ICP.get_param('odhr_api.attendance_day_backfilled')
+        since = fields.Datetime.now() - timedelta(days=days + 1) if backfilled else None
+        # the days over, candidate absences of every employee with a schedule
+        today = fields.Date.today()
+        first_day = today - timedelta(days=days + 1 if backfilled else ABSENCE_BACKFILL_DAYS)
+        past_days = {first_day + timedelta(days=offset) for offset in range((today - first_day).days)}
+        cr.execute("""
+            SELECT employee_id FROM hr_attendance WHERE %(since)s IS NULL OR check_in >= %(since)s
+             UNION
+            SELECT employee_id FROM odhr_api_attendance_day WHERE day >= %(since)s::date
+             UNION
+            SELECT id FROM hr_employee WHERE active AND resource_calendar_id IS NOT NULL
+        """, {'since': since})
+        employee_ids = [row[0] for row in cr.fetchall()]
+        for start in range(0, len(employee_ids), RECONCILE_BATCH):
+            batch = employee_ids[start:start + RECONCILE_BATCH]
+            # the days with attendances, and those still rolled up, which
+            # lose their row if their attendances are gone
+            cr.execute("""
+                SELECT a.employee_id,
+                       (a.check_in AT TIME ZONE 'UTC' AT TIME ZONE COALESCE(r.tz, 'UTC'))::date
+                  FROM hr_attendance a
+                  JOIN hr_employee e ON e.id = a.employee_id
+                  JOIN resource_resource r ON r.id = e.resource_id
+                 WHERE a.employee_id = ANY(%(batch)s) AND (%(since)s IS NULL OR a.check_in >= %(since)s)
+                 UNION
+                SELECT employee_id, day FROM odhr_api_attendance_day
+                 WHERE employee_id = ANY(%(batch)s) AND day >= %(since)s::date
+            """, {'batch': batch, 'since': since})
+            employee_days = {emp_id: set(past_days) for emp_id in batch}
+            for emp_id, day in cr.fetchall():
+                employee_days[emp_id].add(day)
+            self._refresh(employee_days)
+            if not modules.module.current_test:
+                cr.commit()
+        if not backfilled:
+            ICP.set_param('odhr_api.attendance_day_backfilled', fields.Datetime.to_string(fields.Datetime.now()))
+        return True
+
+    # ------------------------------------------------------------------
+    # Analytics
+    # ------------------------------------------------------------------
+    @api.model
+    def summary(self, employees, date_from, date_to, period=None):
+        """Totals of ``employees`` between two dates (inclusive), in one grouped query.
+
+        ``period`` (``week``, ``month`` or ``year``) also splits them per
+        period.  Returns ``(totals, [(period start, totals)])``.
+        """
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT date_trunc(%s, day)::date,
+                   COUNT(*) FILTER (WHERE attendance_count > 0), COUNT(*) FILTER (WHERE absent),
+                   SUM(worked_hours), SUM(overtime_hours),
+                   COUNT(*) FILTER (WHERE late), COUNT(*) FILTER (WHERE early_leave)
+              FROM odhr_api_attendance_day
+             WHERE employee_id = ANY(%s) AND day BETWEEN %s AND %s
+          GROUP BY 1
+          ORDER BY 1
+        """, [period or 'year', employees.ids, date_from, date_to])
+        keys = ('days_present', 'days_absent', 'total_hours', 'overtime_hours', 'late_count', 'early_leave_count')
+        totals = dict.fromkeys(keys, 0)
+        periods = []
+        for start, *row in self.env.cr.fetchall():
+            values = dict(zip(keys, row))
+            for key in keys:
+                totals[key] += values[key]
+            periods.append((start, values))
+        for values in (totals, *(values for _start, values in periods)):
+            values['total_hours'] = round(values['total_hours'], 2)
+            values['overtime_hours'] = round(values['overtime_hours'], 2)
+        return totals, periods if period else []
+
+
+class ResourceCalendarLeaves(models.Model):
+    _inherit = 'resource.calendar.leaves'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        leaves = super().create(vals_list)
+        Day = self.env['odhr.api.attendance.day']
+        Day._refresh_time_off(Day._time_off_spans(leaves))
+        return leaves
+
+    def write(self, vals):
+        if not {'date_from', 'date_to', 'resource_id', 'calendar_id', 'time_type'} & set(vals):
+            return super().write(vals)
+        Day = self.env['odhr.api.attendance.day']
+        spans = Day._time_off_spans(self)
+        res = super().write(vals)
+        Day._refresh_time_off(spans + Day._time_off_spans(self))
+        return res
+
+    def unlink(self):
+        Day = self.env['odhr.api.attendance.day']
+        spans = Day._time_off_spans(self)
+        res = super().unlink()
+        Day._refresh_time_off(spans)
+        return res
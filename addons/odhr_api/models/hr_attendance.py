@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+import psycopg2
+
+from odoo import api, fields, models
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# punches stamped this far in the future (client clock skew) are refused
+PUNCH_MAX_SKEW = timedelta(minutes=5)
+
+
+class HrAttendance(models.Model):
+    _inherit = 'hr.attendance'
+
+    # client-generated ids of the punches that opened and closed the
+    # attendance, so that a replayed punch is recognized
+    odhr_in_uid = fields.Char(copy=False, readonly=True)
+    odhr_out_uid = fields.Char(copy=False, readonly=True)
+
+    def init(self):
+        super().init()
+        cr = self.env.cr
+        for column in ('odhr_in_uid', 'odhr_out_uid'):
+            cr.execute(f"""
+                CREATE UNIQUE INDEX IF NOT EXISTS hr_attendance_{column}_uniq
+                    ON hr_attendance (employee_id, {column}) WHERE {column} IS NOT NULL
+            """)
+        # the open attendance lookup of every punch; unique as hr_attendance
+        # already forbids two open attendances per employee
+        try:
+            with cr.savepoint():
+                cr.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS hr_attendance_odhr_open_uniq
+                        ON hr_attendance (employee_id) WHERE check_out IS NULL
+                """)
+        except psycopg2.IntegrityError:
+            _logger.warning("Employees with several open attendances: open attendance index created non-unique")
+            cr.execute("""
+                CREATE INDEX IF NOT EXISTS hr_attendance_odhr_open_idx
+                    ON hr_attendance (employee_id) WHERE check_out IS NULL
+            """)
+
+    # ------------------------------------------------------------------
+    # Daily rollup maintenance
+    # ------------------------------------------------------------------
+    @api.model_create_multi
+    def create(self, vals_list):
+        attendances = super().create(vals_list)
+        Day = self.env['odhr.api.attendance.day']
+        Day._refresh(Day._days_of(attendances))
+        return attendances
+
+    def write(self, vals):
+        if not {'employee_id', 'check_in', 'check_out'} & set(vals):
+            return super().write(vals)
+        Day = self.env['odhr.api.attendance.day']
+        before = Day._days_of(self)
+        result = super().write(vals)
+        after = Day._days_of(self)
+        Day._refresh({emp_id: before.get(emp_id, set()) | after.get(emp_id, set()) for emp_id in before.keys() | after.keys()})
+        return result
+
+    def unlink(self):
+        Day = self.env['odhr.api.attendance.day']
+        days = Day._days_of(self)
+        result = super().unlink()
+        Day._refresh(days)
+        return result
+
+    @api.model
+    def _odhr_punched(self, employee, uids):
+        """``{uid: attendance}`` of the punches among ``uids`` already recorded."""
+        uids = [uid for uid in uids if uid]
+        if not uids:
+            return {}
+        attendances = self.sudo().search([
+            ('employee_id', '=', employee.id),
+            '|', ('odhr_in_uid', 'in', uids), ('odhr_out_uid', 'in', uids),
+        ])
+        punched = {}
+        for attendance in attendances:
+            for uid in (attendance.odhr_in_uid, attendance.odhr_out_uid):
+                if uid:
+                    punched[uid] = attendance
+        return punched
+
+    @api.model
+    def _odhr_lock_employee(self, employee):
+        """Serialize the punches of ``employee``.
+
+        Punches update the employee row (its stored last attendance), so a
+        punch committed since this transaction's snapshot makes the lock
+        fail with a serialization error, and Odoo replays the request on a
+        fresh snapshot instead of missing the new open attendance.
+        """
+        self.env.cr.execute("SELECT id FROM hr_employee WHERE id = %s FOR NO KEY UPDATE", [employee.id])
+
+    @api.model
+    def _odhr_punch(self, employee, kind, at=None, uid=None, latitude=None, longitude=None):
+        """Record a check-in or check-out of ``employee`` at ``at`` (default: now).
+
+        A check-in closes the open attendance, if any, at the same time.
+        Returns the attendance; raises ValidationError when the punch cannot
+        be recorded (no open attendance, overlap, time in the future).
+        """
+        now = fields.Datetime.now()
+        at = at or now
+        if at > now + PUNCH_MAX_SKEW:
+            raise ValidationError('Punch time is in the future')
+        self._odhr_lock_employee(employee)
+        Attendance = self.sudo()
+        open_att = Attendance.search([('employee_id', '=', employee.id), ('check_out', '=', False)], limit=1)
+        prefix = 'in' if kind == 'checkin' else 'out'
+        geo = {
+            f'{prefix}_{name}': value
+            for name, value in (('latitude', latitude), ('longitude', longitude))
+            if value is not None and f'{prefix}_{name}' in self._fields
+        }
+        if kind == 'checkin':
+            if open_att:
+                if open_att.check_in > at:
+                    raise ValidationError('Check-in before the open attendance')
+                open_att.write({'check_out': at})
+                # before the insert, for the open attendance unique index
+                open_att.flush_recordset(['check_out'])
+            return Attendance.create({'employee_id': employee.id, 'check_in': at, 'odhr_in_uid': uid, **geo})
+        if not open_att:
+            raise ValidationError('No open attendance to checkout')
+        if open_att.check_in > at:
+            raise ValidationError('Check-out before check-in')
+        open_att.write({'check_out': at, 'odhr_out_uid': uid, **geo})
+        return open_att
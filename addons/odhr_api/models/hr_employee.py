@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models, tools
+
+
+# deepest org chart level walked by the hierarchy queries
+ORG_MAX_DEPTH = 20
+
+
+class HrEmployee(models.Model):
+    _inherit = 'hr.employee'
+
+    def init(self):
+        super().init()
+        # the step of every hierarchy walk: reports of a manager
+        tools.create_index(self.env.cr, 'hr_employee_odhr_parent_idx', self._table, ['parent_id'], where='active')
+
+    @api.model
+    def _odhr_subtree(self, manager_ids, depth=None):
+        """``[(id, parent id, depth)]`` of the active reports of ``manager_ids``,
+        direct reports at depth 1, down to ``depth`` levels; one query."""
+        depth = min(depth or ORG_MAX_DEPTH, ORG_MAX_DEPTH)
+        self.flush_model(['parent_id', 'active'])
+        self.env.cr.execute("""
+            WITH RECURSIVE tree (id, parent_id, depth, path) AS (
+                SELECT e.id, e.parent_id, 1, ARRAY[e.parent_id, e.id]
+                  FROM hr_employee e
+                 WHERE e.parent_id = ANY(%s) AND e.active
+                 UNION ALL
+                SELECT e.id, e.parent_id, t.depth + 1, t.path || e.id
+                  FROM tree t
+                  JOIN hr_employee e ON e.parent_id = t.id AND e.active
+                 WHERE t.depth < %s AND e.id != ALL(t.path)
+            )
+            SELECT DISTINCT ON (id) id, parent_id, depth FROM tree ORDER BY id, depth
+        """, [list(manager_ids), depth])
+        return sorted(self.env.cr.fetchall(), key=lambda row: (row[2], row[0]))
+
+    @api.model
+    def _odhr_team(self, manager, indirect=False):
+        """Active reports of ``manager`` (sudo): direct ones, or the whole subtree."""
+        Employee = self.sudo()
+        if not manager:
+            return Employee.browse()
+        if not indirect:
+            return Employee.search([('parent_id', '=', manager.id)])
+        return Employee.browse([row[0] for row in self._odhr_subtree(manager.ids)])
+
+    @api.model
+    def _odhr_managers(self, employees):
+        """Ids of the direct and indirect managers of ``employees``:
+        ``(direct manager ids, all manager ids)``."""
+        direct = {emp.parent_id.id for emp in employees.sudo() if emp.parent_id}
+        if not direct:
+            return set(), set()
+        self.flush_model(['parent_id'])
+        self.env.cr.execute("""
+            WITH RECURSIVE up (id, depth) AS (
+                SELECT unnest(%s::int[]), 1
+                 UNION
+                SELECT e.parent_id, up.depth + 1
+                  FROM up
+                  JOIN hr_employee e ON e.id = up.id
+                 WHERE e.parent_id IS NOT NULL AND up.depth < %s
+            )
+            SELECT DISTINCT id FROM up
+        """, [sorted(direct), ORG_MAX_DEPTH])
+        return direct, {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    @tools.ormcache('uid')
+    def _odhr_employee_id_for_user(self, uid):
+        """Return the id of the active employee linked to ``uid`` (or False).
+
+        Nearly every mobile API call starts with this lookup, so the answer is
+        cached per worker and invalidated through the registry cache signaling
+        whenever the user link or the archived state of an employee changes.
+        """
+        return self.sudo().search([('user_id', '=', uid)], limit=1).id or False
+
+    def _odhr_team_changed(self):
+        """The teams of the managers above these employees change."""
+        self.env['odhr.api.team.kpi']._touch(self)
+        self.env['odhr.api.leave.calendar']._invalidate(self)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        employees = super().create(vals_list)
+        if any(vals.get('user_id') for vals in vals_list):
+            self.env.registry.clear_cache()
+        employees._odhr_team_changed()
+        return employees
+
+    def write(self, vals):
+        # the team of the former manager changes too
+        moved = 'parent_id' in vals or 'active' in vals
+        if moved:
+            self._odhr_team_changed()
+        res = super().write(vals)
+        if 'user_id' in vals or 'active' in vals:
+            self.env.registry.clear_cache()
+        if moved:
+            self._odhr_team_changed()
+        return res
+
+    def unlink(self):
+        has_users = any(self.mapped('user_id'))
+        self._odhr_team_changed()
+        res = super().unlink()
+        if has_users:
+            self.env.registry.clear_cache()
+        return res
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+from odoo.http import request
+
+from ..tools.compression import compress_response, settings
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    @classmethod
+    def _post_dispatch(cls, response):
+        super()._post_dispatch(response)
+        # every /odhr/api route of both addons, once per HTTP request: the
+        # calls run inside /odhr/api/batch are compressed with the batch
+        if request.httprequest.path.startswith('/odhr/api/'):
+            compress_response(response, request.httprequest.accept_encodings, *settings(request.env))
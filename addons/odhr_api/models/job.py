@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import logging
+import time
+from datetime import timedelta
+
+import psycopg2.errors
+
+from odoo import api, fields, models, modules
+from odoo.exceptions import UserError, ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# job type -> default number of jobs of that type running at once, over all
+# workers; overridden by the odhr_api.job_limit.<type> system parameter
+JOB_TYPES = {
+    'payslip_pdf': 2,
+    'attendance_export': 1,
+}
+# a worker stops claiming new jobs after this many seconds, and is triggered
+# again if jobs are left
+WORKER_TIME_BUDGET = 120
+WORKER_CRONS = ('odhr_api.ir_cron_odhr_api_job_worker_1', 'odhr_api.ir_cron_odhr_api_job_worker_2')
+EXPORT_BATCH = 1000
+
+
+class OdhrApiJob(models.Model):
+    """Report job run by the cron workers instead of an HTTP worker.
+
+    Workers claim queued jobs with ``FOR UPDATE SKIP LOCKED`` and run each
+    one in the transaction that claimed it: a worker killed mid-job rolls
+    back and leaves the job queued for the next one.  The number of jobs of
+    a type running at once is bounded by advisory locks, one per slot, held
+    by the worker's connection while it runs a job.
+    """
+    _name = 'odhr.api.job'
+    _description = 'ODHR API Report Job'
+    _order = 'id desc'
+
+    user_id = fields.Many2one('res.users', required=True, ondelete='cascade', index=True)
+    job_type = fields.Selection([
+        ('payslip_pdf', 'Payslip PDF'),
+        ('attendance_export', 'Attendance Export'),
+    ], required=True)
+    params = fields.Json()
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], default='queued', required=True)
+    error = fields.Char()
+    attachment_id = fields.Many2one('ir.attachment', readonly=True, ondelete='set null')
+    done_at = fields.Datetime(readonly=True)
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS odhr_api_job_queued_idx
+                ON odhr_api_job (job_type, id) WHERE state = 'queued'
+        """)
+
+    # ------------------------------------------------------------------
+    # Enqueueing
+    # ------------------------------------------------------------------
+    @api.model
+    def enqueue(self, job_type, params):
+        """Queue a job of ``job_type`` for the current user and wake a worker.
+
+        Raises ValidationError when the type or parameters are invalid.
+        """
+        if job_type not in JOB_TYPES:
+            raise ValidationError(f"Unknown job type: {job_type}")
+        params = getattr(self, f'_check_{job_type}')(params if isinstance(params, dict) else {})
+        job = self.sudo().create({'user_id': self.env.uid, 'job_type': job_type, 'params': params})
+        self._wake_workers()
+        return job
+
+    @api.model
+    def _employee(self):
+        emp_id = self.env['hr.employee']._odhr_employee_id_for_user(self.env.uid)
+        if not emp_id:
+            raise ValidationError('No employee linked to current user')
+        return self.env['hr.employee'].sudo().browse(emp_id)
+
+    @api.model
+    def _check_payslip_pdf(self, params):
+        if 'hr.payslip' not in self.env:
+            raise ValidationError('Payroll is not installed')
+        try:
+            slip_id = int(params.get('payslip_id') or 0)
+        except (TypeError, ValueError):
+            raise ValidationError('Payslip not found')
+        slip = self.env['hr.payslip'].sudo().browse(slip_id).exists()
+        if not slip or slip.employee_id != self._employee():
+            raise ValidationError('Payslip not found')
+        return {'payslip_id': slip.id}
+
+    @api.model
+    def _check_attendance_export(self, params):
+        emp = self._employee()
+        try:
+            date_from = fields.Date.to_date(params.get('from'))
+            date_to = fields.Date.to_date(params.get('to'))
+        except (TypeError, ValueError):
+            raise ValidationError('from and to must be YYYY-MM-DD dates')
+        if not date_from or not date_to or date_from > date_to:
+            raise ValidationError('from and to must be YYYY-MM-DD dates')
+        return {'employee_id': emp.id, 'from': str(date_from), 'to': str(date_to)}
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    @api.model
+    def _limit(self, job_type):
+        value = self.env['ir.config_parameter'].sudo().get_param(f'odhr_api.job_limit.{job_type}')
+        try:
+            return max(int(value), 0) if value else JOB_TYPES[job_type]
+        except ValueError:
+            return JOB_TYPES[job_type]
+
+    @api.model
+    def _claim(self):
+        """Lock a queued job whose type has a free slot.
+
+        Returns ``(job, slot)``; the slot is a session-level advisory lock
+        the caller releases with :meth:`_release` once the job is committed.
+        """
+        cr = self.env.cr
+        for job_type in JOB_TYPES:
+            for slot in range(self._limit(job_type)):
+                key = (f'odhr.api.job:{job_type}', slot)
+                cr.execute("SELECT pg_try_advisory_lock(hashtext(%s), %s)", key)
+                if not cr.fetchone()[0]:
+                    continue
+                cr.execute("""
+                    SELECT id
+                      FROM odhr_api_job
+                     WHERE state = 'queued' AND job_type = %s
+                  ORDER BY id
+                     LIMIT 1
+                       FOR UPDATE SKIP LOCKED
+                """, [job_type])
+                row = cr.fetchone()
+                if row:
+                    return self.browse(row[0]), key
+                self._release(key)
+                break
+        return self.browse(), None
+
+    @api.model
+    def _release(self, key):
+        self.env.cr.execute("SELECT pg_advisory_unlock(hashtext(%s), %s)", key)
+
+    def _run(self):
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                attachment = getattr(self, f'_run_{self.job_type}')()
+            self.write({'state': 'done', 'attachment_id': attachment.id, 'done_at': fields.Datetime.now()})
+        except Exception as e:
+            _logger.exception('ODHR API job %s (%s) failed', self.id, self.job_type)
+            message = str(e) if isinstance(e, (UserError, ValidationError)) else 'Job failed'
+            self.write({'state': 'failed', 'error': message, 'done_at': fields.Datetime.now()})
+
+    @api.model
+    def _wake_workers(self):
+        for xmlid in WORKER_CRONS:
+            cron = self.env.ref(xmlid, raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+
+    @api.model
+    def _process_jobs(self, time_budget=WORKER_TIME_BUDGET):
+        """Run queued jobs, one transaction each, until none can be claimed."""
+        deadline = time.monotonic() + time_budget
+        in_test = modules.module.current_test
+        while time.monotonic() < deadline:
+            try:
+                job, slot = self._claim()
+            except psycopg2.errors.SerializationFailure:
+                # the job was finished by another worker since our snapshot
+                if in_test:
+                    raise
+                self.env.cr.rollback()
+                self.env.cr.execute("SELECT pg_advisory_unlock_all()")
+                continue
+            if not job:
+                break
+            try:
+                job._run()
+                if not in_test:
+                    self.env.cr.commit()
+            finally:
+                self._release(slot)
+        else:
+            self._wake_workers()
+        return True
+
+    @api.model
+    def cron_process_jobs(self):
+        self.sudo()._process_jobs()
+        return True
+
+    @api.model
+    def cron_gc_jobs(self):
+        """Drop finished jobs after a week, with the exports they produced."""
+        old = self.search([('state', '!=', 'queued'), ('done_at', '<', fields.Datetime.now() - timedelta(days=7))])
+        self.env['ir.attachment'].sudo().search([('res_model', '=', self._name), ('res_id', 'in', old.ids)]).unlink()
+        old.unlink()
+        return True
+
+    # ------------------------------------------------------------------
+    # Job types: _run_<type>() returns the result attachment
+    # ------------------------------------------------------------------
+    def _run_payslip_pdf(self):
+        slip = self.env['hr.payslip'].sudo().browse(self.params['payslip_id']).exists()
+        if not slip:
+            raise UserError('Payslip not found')
+        attachment = self.env['odhr.api.payslip.pdf'].get_attachment(slip)
+        if not attachment:
+            raise UserError('Payslip PDF report not available')
+        return attachment
+
+    def _run_attendance_export(self):
+        Attendance = self.env['hr.attendance'].sudo()
+        domain = [
+            ('employee_id', '=', self.params['employee_id']),
+            ('check_in', '>=', self.params['from']),
+            ('check_in', '<', fields.Date.add(fields.Date.to_date(self.params['to']), days=1)),
+        ]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['check_in', 'check_out', 'worked_hours'])
+        offset = 0
+        while True:
+            attendances = Attendance.search(domain, order='check_in, id', offset=offset, limit=EXPORT_BATCH)
+            if not attendances:
+                break
+            attendances.fetch(['check_in', 'check_out', 'worked_hours'])
+            for att in attendances:
+                writer.writerow([
+                    fields.Datetime.to_string(att.check_in),
+                    fields.Datetime.to_string(att.check_out) if att.check_out else '',
+                    f'{att.worked_hours:.2f}',
+                ])
+            offset += EXPORT_BATCH
+            attendances.invalidate_recordset()
+        return self.env['ir.attachment'].sudo().create({
+            'name': f"attendance_{self.params['from']}_{self.params['to']}.csv",
+            'raw': buffer.getvalue().encode('utf-8'),
+            'mimetype': 'text/csv',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+
+# default working hours per day, converting allocations of hour-based types
+HOURS_PER_DAY = 8.0
+# leave states counted against a balance: validated (taken) or awaiting
+# approval (pending)
+TAKEN_STATES = ('validate',)
+PENDING_STATES = ('confirm', 'validate1')
+
+
+class OdhrApiLeaveBalance(models.Model):
+    """Cached leave totals of an employee per leave type.
+
+    Rows are computed for all types of many employees in one grouped query,
+    dropped whenever a leave or an allocation of the employee changes, and
+    recomputed on the next read (or on a new day, as allocations expire).
+    """
+    _name = 'odhr.api.leave.balance'
+    _description = 'ODHR API Leave Balance Cache'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', required=True, ondelete='cascade', index=True)
+    # empty on the row marking an employee computed
+    holiday_status_id = fields.Many2one('hr.leave.type', ondelete='cascade')
+    # the day the allocations valid on were taken into account
+    day = fields.Date(required=True)
+    allocated_days = fields.Float()
+    taken_days = fields.Float()
+    pending_days = fields.Float()
+    taken_hours = fields.Float()
+    pending_hours = fields.Float()
+
+    _sql_constraints = [
+        ('employee_type_uniq', 'unique(employee_id, holiday_status_id)', 'One balance per employee and leave type.'),
+    ]
+
+    @api.model
+    def _compute_rows(self, employee_ids, today):
+        """``[(employee id, type id, allocated, taken, pending, taken hours, pending hours)]``.
+
+        Allocations count when validated and valid ``today``.  Leaves count
+        from the start of the earliest of those allocations, or from the
+        start of the year for types without allocation.
+        """
+        self.env['hr.leave'].flush_model()
+        self.env['hr.leave.allocation'].flush_model()
+        self.env.cr.execute("""
+            WITH alloc AS (
+                SELECT employee_id, holiday_status_id, SUM(number_of_days) AS days, MIN(date_from) AS since
+                  FROM hr_leave_allocation
+                 WHERE employee_id = ANY(%(employees)s) AND state = 'validate'
+                   AND date_from <= %(today)s AND (date_to IS NULL OR date_to >= %(today)s)
+              GROUP BY employee_id, holiday_status_id
+            ), used AS (
+                SELECT l.employee_id, l.holiday_status_id,
+                       SUM(l.number_of_days) FILTER (WHERE l.state IN %(taken)s) AS taken,
+                       SUM(l.number_of_days) FILTER (WHERE l.state IN %(pending)s) AS pending,
+                       SUM(l.number_of_hours) FILTER (WHERE l.state IN %(taken)s) AS taken_hours,
+                       SUM(l.number_of_hours) FILTER (WHERE l.state IN %(pending)s) AS pending_hours
+                  FROM hr_leave l
+             LEFT JOIN alloc a ON a.employee_id = l.employee_id AND a.holiday_status_id = l.holiday_status_id
+                 WHERE l.employee_id = ANY(%(employees)s) AND l.state IN %(states)s
+                   AND l.request_date_from >= COALESCE(a.since, date_trunc('year', %(today)s::date)::date)
+              GROUP BY l.employee_id, l.holiday_status_id
+            )
+            SELECT COALESCE(a.employee_id, u.employee_id), COALESCE(a.holiday_status_id, u.holiday_status_id),
+                   COALESCE(a.days, 0), COALESCE(u.taken, 0), COALESCE(u.pending, 0),
+                   COALESCE(u.taken_hours, 0), COALESCE(u.pending_hours, 0)
+              FROM alloc a
+         FULL JOIN used u ON u.employee_id = a.employee_id AND u.holiday_status_id = a.holiday_status_id
+        """, {
+            'employees': list(employee_ids),
+            'today': today,
+            'taken': TAKEN_STATES,
+            'pending': PENDING_STATES,
+            'states': TAKEN_STATES + PENDING_STATES,
+        })
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _fetch(self, employees):
+        """Cached rows of ``employees``, computing the missing or outdated ones."""
+        today = fields.Date.context_today(self)
+        Balance = self.sudo()
+        cached = Balance.search([('employee_id', 'in', employees.ids), ('day', '=', today)])
+        missing = set(employees.ids) - set(cached.employee_id.ids)
+        if missing:
+            cr = self.env.cr
+            cr.execute("DELETE FROM odhr_api_leave_balance WHERE employee_id = ANY(%s)", [sorted(missing)])
+            # a row without type marks the employees computed, with or
+            # without leaves
+            rows = self._compute_rows(missing, today) + [(emp_id, None, 0, 0, 0, 0, 0) for emp_id in missing]
+            cr.execute("""
+                INSERT INTO odhr_api_leave_balance
+                       (employee_id, holiday_status_id, allocated_days, taken_days, pending_days,
+                        taken_hours, pending_hours, day)
+                SELECT *, %s FROM unnest(%s::int[], %s::int[], %s::float8[], %s::float8[], %s::float8[],
+                                         %s::float8[], %s::float8[])
+                    ON CONFLICT (employee_id, holiday_status_id) DO NOTHING
+            """, [today, *(list(column) for column in zip(*rows))])
+            Balance.invalidate_model()
+            cached = Balance.search([('employee_id', 'in', employees.ids)])
+        return cached.filtered('holiday_status_id')
+
+    @api.model
+    def get_balances(self, employees, leave_types=None):
+        """``{employee id: [balance]}`` of ``employees`` for every active leave type.
+
+        A balance is a dict with ``type_id``, ``type_name``, ``unit``
+        (``days`` or ``hours``), ``allocated`` (None for types without
+        allocation), ``taken``, ``pending``, ``remaining`` (allocated - taken)
+        and ``virtual_remaining`` (also minus the pending requests); the
+        remaining amounts are None for types without allocation.
+        """
+        employees = employees.sudo()
+        leave_types = leave_types if leave_types is not None else self.env['hr.leave.type'].sudo().search([])
+        totals = {(row.employee_id.id, row.holiday_status_id.id): row for row in self._fetch(employees)}
+        balances = {}
+        for employee in employees:
+            hours_per_day = employee.resource_calendar_id.hours_per_day or HOURS_PER_DAY
+            items = []
+            for leave_type in leave_types:
+                row = totals.get((employee.id, leave_type.id))
+                in_hours = leave_type.request_unit == 'hour'
+                allocated = row.allocated_days if row else 0.0
+                if in_hours:
+                    allocated *= hours_per_day
+                    taken = row.taken_hours if row else 0.0
+                    pending = row.pending_hours if row else 0.0
+                else:
+                    taken = row.taken_days if row else 0.0
+                    pending = row.pending_days if row else 0.0
+                limited = leave_type.requires_allocation == 'yes'
+                items.append({
+                    'type_id': leave_type.id,
+                    'type_name': leave_type.name,
+                    'unit': 'hours' if in_hours else 'days',
+                    'allocated': round(allocated, 2) if limited else None,
+                    'taken': round(taken, 2),
+                    'pending': round(pending, 2),
+                    'remaining': round(allocated - taken, 2) if limited else None,
+                    'virtual_remaining': round(allocated - taken - pending, 2) if limited else None,
+                })
+            balances[employee.id] = items
+        return balances
+
+    @api.model
+    def _invalidate(self, employees):
+        if employees:
+            self.env.cr.execute("DELETE FROM odhr_api_leave_balance WHERE employee_id = ANY(%s)", [employees.ids])
+            self.sudo().invalidate_model()
+
+
+class OdhrApiLeaveBalanceMixin(models.AbstractModel):
+    """Leaves and allocations: their changes drop the cached balances."""
+    _name = 'odhr.api.leave.balance.mixin'
+    _description = 'ODHR API Leave Balance Tracking'
+
+    _odhr_balance_fields = ('employee_id', 'holiday_status_id', 'state', 'number_of_days', 'date_from', 'date_to')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['odhr.api.leave.balance']._invalidate(records.sudo().employee_id)
+        return records
+
+    def write(self, vals):
+        if not set(self._odhr_balance_fields) & set(vals):
+            return super().write(vals)
+        employees = self.sudo().employee_id
+        res = super().write(vals)
+        self.env['odhr.api.leave.balance']._invalidate(employees | self.sudo().employee_id)
+        return res
+
+    def unlink(self):
+        self.env['odhr.api.leave.balance']._invalidate(self.sudo().employee_id)
+        return super().unlink()
+
+
+class HrLeave(models.Model):
+    _name = 'hr.leave'
+    _inherit = ['hr.leave', 'odhr.api.leave.balance.mixin']
+    _odhr_balance_fields = OdhrApiLeaveBalanceMixin._odhr_balance_fields + (
+        'request_date_from', 'request_date_to', 'number_of_hours',
+    )
+
+
+class HrLeaveAllocation(models.Model):
+    _name = 'hr.leave.allocation'
+    _inherit = ['hr.leave.allocation', 'odhr.api.leave.balance.mixin']
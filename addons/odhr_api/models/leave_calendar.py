@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import json
+from collections import defaultdict
+from datetime import date, timedelta
+
+from odoo import api, fields, models, tools
+
+# leave states shown on the calendar: approved or awaiting approval
+CALENDAR_STATES = ('confirm', 'validate1', 'validate')
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _months(date_from, date_to):
+    """First days of the months from ``date_from`` to ``date_to``."""
+    month = _month_start(date_from)
+    while month <= date_to:
+        yield month
+        month = (month + timedelta(days=32)).replace(day=1)
+
+
+class OdhrApiLeaveCalendar(models.Model):
+    """Who is off on each day of a month, for the team of a manager.
+
+    Months are computed in one query for the team and cached here; a change
+    to a leave drops the months it covers for all the managers above its
+    employee, a change to a team drops all the months of its managers.
+    """
+    _name = 'odhr.api.leave.calendar'
+    _description = 'ODHR API Team Leave Calendar Cache'
+    _log_access = False
+
+    manager_id = fields.Many2one('hr.employee', required=True, ondelete='cascade')
+    indirect = fields.Boolean(required=True, default=False)
+    month = fields.Date(required=True)
+    # {'YYYY-MM-DD': [[employee id, leave id, leave type id, state], ...]}
+    days = fields.Json()
+
+    _sql_constraints = [
+        ('manager_month_uniq', 'unique(manager_id, indirect, month)', 'One calendar per team and month.'),
+    ]
+
+    def init(self):
+        # overlap lookups of the team's leaves over a date range
+        tools.create_index(
+            self.env.cr, 'hr_leave_odhr_calendar_idx', 'hr_leave',
+            ['employee_id', 'request_date_from', 'request_date_to'],
+        )
+
+    @api.model
+    def _compute_days(self, employee_ids, date_from, date_to):
+        """``{'YYYY-MM-DD': [[employee id, leave id, type id, state]]}`` of the
+        leaves overlapping ``date_from``..``date_to``, one query."""
+        self.env['hr.leave'].flush_model(['employee_id', 'holiday_status_id', 'state', 'request_date_from', 'request_date_to'])
+        self.env.cr.execute("""
+            SELECT d::date, l.employee_id, l.id, l.holiday_status_id, l.state
+              FROM hr_leave l
+              JOIN LATERAL generate_series(
+                       GREATEST(l.request_date_from, %(from)s::date),
+                       LEAST(l.request_date_to, %(to)s::date),
+                       interval '1 day') d ON true
+             WHERE l.employee_id = ANY(%(employees)s)
+               AND l.state IN %(states)s
+               AND l.request_date_from <= %(to)s AND l.request_date_to >= %(from)s
+          ORDER BY 1, 2, 3
+        """, {'employees': list(employee_ids), 'from': date_from, 'to': date_to, 'states': CALENDAR_STATES})
+        days = defaultdict(list)
+        for day, *entry in self.env.cr.fetchall():
+            days[str(day)].append(entry)
+        return days
+
+    @api.model
+    def get_days(self, manager, date_from, date_to, indirect=False):
+        """Occupancy of ``manager``'s team from ``date_from`` to ``date_to``,
+        in the format of :meth:`_compute_days`; cached months are reused."""
+        indirect = bool(indirect)
+        Cache = self.sudo()
+        months = list(_months(date_from, date_to))
+        cached = Cache.search([('manager_id', '=', manager.id), ('indirect', '=', indirect), ('month', 'in', months)])
+        days = {}
+        for month in cached:
+            days.update(month.days)
+        missing = sorted(set(months) - set(cached.mapped('month')))
+        if missing:
+            team = self.env['hr.employee']._odhr_team(manager, indirect)
+            start = missing[0]
+            end = (missing[-1] + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            computed = self._compute_days(team.ids, start, end)
+            by_month = defaultdict(dict)
+            for day, entries in computed.items():
+                by_month[_month_start(date.fromisoformat(day))][day] = entries
+            self.env.cr.execute("""
+                INSERT INTO odhr_api_leave_calendar (manager_id, indirect, month, days)
+                SELECT %s, %s, unnest(%s::date[]), unnest(%s::jsonb[])
+                    ON CONFLICT (manager_id, indirect, month) DO NOTHING
+            """, [manager.id, indirect, missing, [json.dumps(by_month[month]) for month in missing]])
+            for month in missing:
+                days.update(by_month[month])
+        return {
+            day: entries for day, entries in sorted(days.items())
+            if str(date_from) <= day <= str(date_to)
+        }
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+    @api.model
+    def _invalidate(self, employees, date_from=None, date_to=None):
+        """Drop the cached months of the teams of ``employees``, those from
+        ``date_from`` to ``date_to`` only when given."""
+        _direct, manager_ids = self.env['hr.employee']._odhr_managers(employees)
+        if not manager_ids:
+            return
+        query = "DELETE FROM odhr_api_leave_calendar WHERE manager_id = ANY(%s)"
+        params = [sorted(manager_ids)]
+        if date_from and date_to:
+            query += " AND month BETWEEN %s AND %s"
+            params += [_month_start(date_from), date_to]
+        self.env.cr.execute(query, params)
+        self.sudo().invalidate_model()
+
+    @api.model
+    def _invalidate_leaves(self, spans):
+        """Drop the cached months covered by ``spans``, ``[(employee id,
+        date from, date to)]``: one lookup of the managers above all the
+        employees and one delete, from the earliest month to the latest day."""
+        spans = [span for span in spans if all(span)]
+        if not spans:
+            return
+        employees = self.env['hr.employee'].browse(sorted({span[0] for span in spans}))
+        self._invalidate(employees, min(span[1] for span in spans), max(span[2] for span in spans))
+
+
+class OdhrApiLeaveCalendarMixin(models.AbstractModel):
+    """Leaves: their changes drop the cached calendar months they cover."""
+    _name = 'odhr.api.leave.calendar.mixin'
+    _description = 'ODHR API Leave Calendar Tracking'
+
+    _odhr_calendar_fields = ('employee_id', 'holiday_status_id', 'state', 'request_date_from', 'request_date_to')
+
+    def _odhr_calendar_spans(self):
+        return [
+            (leave.employee_id.id, leave.request_date_from, leave.request_date_to)
+            for leave in self.sudo()
+        ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['odhr.api.leave.calendar']._invalidate_leaves(records._odhr_calendar_spans())
+        return records
+
+    def write(self, vals):
+        if not set(self._odhr_calendar_fields) & set(vals):
+            return super().write(vals)
+        spans = self._odhr_calendar_spans()
+        res = super().write(vals)
+        self.env['odhr.api.leave.calendar']._invalidate_leaves(spans + self._odhr_calendar_spans())
+        return res
+
+    def unlink(self):
+        self.env['odhr.api.leave.calendar']._invalidate_leaves(self._odhr_calendar_spans())
+        return super().unlink()
+
+
+class HrLeave(models.Model):
+    _name = 'hr.leave'
+    _inherit = ['hr.leave', 'odhr.api.leave.calendar.mixin']
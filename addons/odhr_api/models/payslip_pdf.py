@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, models, modules
+
+from ..tools import metrics
+
+_logger = logging.getLogger(__name__)
+
+PAYSLIP_REPORT = 'hr_payroll.action_report_payslip'
+# payslip write_date as stored on the cached attachment (description)
+VERSION_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+VERSION_SQL_FORMAT = 'YYYY-MM-DD HH24:MI:SS.US'
+
+
+class OdhrApiPayslipPdf(models.AbstractModel):
+    """Rendered payslip PDFs, kept as attachments of the payslip.
+
+    A rendering is valid for the payslip ``write_date`` it was made from, so
+    any change to the slip makes the next request render it again.  Slips
+    reaching the done/paid states are rendered ahead of time by a cron, so
+    that payday requests only stream stored bytes.
+    """
+    _name = 'odhr.api.payslip.pdf'
+    _description = 'ODHR API Payslip PDF Cache'
+
+    @api.model
+    def _report(self):
+        if 'hr.payslip' not in self.env:
+            return None
+        return self.env.ref(PAYSLIP_REPORT, raise_if_not_found=False)
+
+    @api.model
+    def _attachment_name(self, slip):
+        return f'odhr_payslip_{slip.id}.pdf'
+
+    @api.model
+    def _cached(self, slip):
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'hr.payslip'),
+            ('res_id', '=', slip.id),
+            ('name', '=', self._attachment_name(slip)),
+            ('description', '=', slip.write_date.strftime(VERSION_FORMAT)),
+        ], limit=1)
+
+    @api.model
+    def _render(self, slip):
+        """Render ``slip`` and store the PDF in place of older renderings."""
+        report = self._report()
+        pdf, _format = self.env['ir.actions.report'].sudo()._render_qweb_pdf(report.report_name, [slip.id])
+        Attachment = self.env['ir.attachment'].sudo()
+        Attachment.search([
+            ('res_model', '=', 'hr.payslip'),
+            ('res_id', '=', slip.id),
+            ('name', '=', self._attachment_name(slip)),
+        ]).unlink()
+        return Attachment.create({
+            'name': self._attachment_name(slip),
+            'description': slip.write_date.strftime(VERSION_FORMAT),
+            'raw': pdf,
+            'mimetype': 'application/pdf',
+            'res_model': 'hr.payslip',
+            'res_id': slip.id,
+        })
+
+    @api.model
+    def get_attachment(self, slip):
+        """Attachment holding the current PDF of ``slip``, rendered on a cache miss.
+
+        Returns an empty recordset when the payslip report is not available.
+        """
+        if not self._report():
+            return self.env['ir.attachment']
+        attachment = self._cached(slip)
+        if attachment:
+            metrics.incr('payslip_pdf.hit')
+            return attachment
+        metrics.incr('payslip_pdf.miss')
+        return self._render(slip)
+
+    @api.model
+    def cron_prerender(self, limit=200):
+        """Render done/paid payslips that have no up-to-date PDF yet."""
+        if not self._report():
+            return True
+        self.env['hr.payslip'].flush_model(['state'])
+        self.env.cr.execute("""
+            SELECT p.id
+              FROM hr_payslip p
+             WHERE p.state IN ('done', 'paid')
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM ir_attachment a
+                     WHERE a.res_model = 'hr.payslip'
+                       AND a.res_id = p.id
+                       AND a.name = 'odhr_payslip_' || p.id || '.pdf'
+                       AND a.description = to_char(p.write_date, %s))
+          ORDER BY p.write_date DESC
+             LIMIT %s
+        """, [VERSION_SQL_FORMAT, limit])
+        slips = self.env['hr.payslip'].sudo().browse([row[0] for row in self.env.cr.fetchall()])
+        for slip in slips:
+            try:
+                with self.env.cr.savepoint():
+                    self._render(slip)
+                metrics.incr('payslip_pdf.prerendered')
+            except Exception:
+                _logger.exception('Could not pre-render payslip %s', slip.id)
+            if not modules.module.current_test:
+                self.env.cr.commit()
+        return True
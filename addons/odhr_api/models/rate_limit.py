@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models
+
+
+class OdhrApiRateLimit(models.AbstractModel):
+    _name = 'odhr.api.rate.limit'
+    _description = 'ODHR API Rate Limiter Storage'
+
+    def init(self):
+        # UNLOGGED: buckets are disposable, skip WAL and replication traffic
+        self.env.cr.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS odhr_api_rate_bucket (
+                key VARCHAR PRIMARY KEY,
+                tokens DOUBLE PRECISION NOT NULL,
+                allowed BOOLEAN NOT NULL DEFAULT TRUE,
+                updated_at TIMESTAMP NOT NULL
+            )
+        """)
+
+    @api.model
+    def cron_gc_buckets(self):
+        """Drop buckets idle for more than an hour (used by the postgres backend)."""
+        self.env.cr.execute("""
+            DELETE FROM odhr_api_rate_bucket
+             WHERE updated_at < clock_timestamp() - INTERVAL '1 hour'
+        """)
+        return True
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+
+from ..tools.sync import TOMBSTONE_RETENTION_DAYS
+
+
+class OdhrApiTombstone(models.Model):
+    """Deleted record, reported to syncing clients until the retention ends."""
+    _name = 'odhr.api.tombstone'
+    _description = 'ODHR API Sync Tombstone'
+    _log_access = False
+
+    res_model = fields.Char(required=True)
+    res_id = fields.Integer(required=True)
+    # employee the record belonged to, for per-employee models
+    scope_id = fields.Integer()
+    date = fields.Datetime(required=True, default=fields.Datetime.now)
+
+    def init(self):
+        tools.create_index(self.env.cr, 'odhr_api_tombstone_sync_idx', self._table, ['res_model', 'date', 'id'])
+
+    @api.model
+    def cron_gc_tombstones(self):
+        """Drop tombstones past the retention; clients that old get a full resync."""
+        self.env.cr.execute(
+            "DELETE FROM odhr_api_tombstone WHERE date < %s",
+            [fields.Datetime.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)],
+        )
+        return True
+
+
+class OdhrApiSyncMixin(models.AbstractModel):
+    """Records served by /odhr/api/sync: index the sync key, log deletions."""
+    _name = 'odhr.api.sync.mixin'
+    _description = 'ODHR API Sync Tracking'
+
+    # many2one to hr.employee scoping the records of per-employee models
+    _odhr_sync_scope = None
+
+    def init(self):
+        super().init()
+        if not self._abstract:
+            tools.create_index(self.env.cr, f'{self._table}_odhr_sync_idx', self._table, ['write_date', 'id'])
+
+    def unlink(self):
+        if self:
+            scope = self._odhr_sync_scope
+            self.env['odhr.api.tombstone'].sudo().create([{
+                'res_model': self._name,
+                'res_id': record.id,
+                'scope_id': record[scope].id if scope else False,
+            } for record in self])
+        return super().unlink()
+
+
+class HrEmployee(models.Model):
+    _name = 'hr.employee'
+    _inherit = ['hr.employee', 'odhr.api.sync.mixin']
+
+
+class HrDepartment(models.Model):
+    _name = 'hr.department'
+    _inherit = ['hr.department', 'odhr.api.sync.mixin']
+
+
+class HrLeaveType(models.Model):
+    _name = 'hr.leave.type'
+    _inherit = ['hr.leave.type', 'odhr.api.sync.mixin']
+
+
+class HrAttendance(models.Model):
+    _name = 'hr.attendance'
+    _inherit = ['hr.attendance', 'odhr.api.sync.mixin']
+    _odhr_sync_scope = 'employee_id'
+
+
+class HrLeave(models.Model):
+    _name = 'hr.leave'
+    _inherit = ['hr.leave', 'odhr.api.sync.mixin']
+    _odhr_sync_scope = 'employee_id'
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import pytz
+
+from odoo import api, fields, models, tools
+
+
+class OdhrApiTeamKpi(models.Model):
+    """Snapshot of the team KPIs of a manager, read by the manager dashboard.
+
+    Changes to the records behind the KPIs only queue the managers concerned
+    (an insert into ``odhr.api.team.kpi.queue``, so that punches of one team
+    never wait on each other); a snapshot is recomputed when it is read with
+    changes queued, on the first read of a new day, and by a cron.
+    """
+    _name = 'odhr.api.team.kpi'
+    _description = 'ODHR API Team KPI Snapshot'
+    _log_access = False
+
+    manager_id = fields.Many2one('hr.employee', required=True, ondelete='cascade')
+    # team of all direct and indirect reports, or of the direct ones only
+    indirect = fields.Boolean(required=True, default=False)
+    # the day "today" KPIs refer to, in the manager's timezone
+    day = fields.Date(required=True)
+    computed_at = fields.Datetime(required=True)
+    headcount = fields.Integer()
+    present_today = fields.Integer()
+    on_leave_today = fields.Integer()
+    pending_approvals = fields.Integer()
+
+    _sql_constraints = [
+        ('manager_uniq', 'unique(manager_id, indirect)', 'One KPI snapshot per manager and team scope.'),
+    ]
+
+    # ------------------------------------------------------------------
+    # KPIs
+    # ------------------------------------------------------------------
+    @api.model
+    def _today(self, manager):
+        return fields.Datetime.now().replace(tzinfo=pytz.utc).astimezone(pytz.timezone(manager.tz or 'UTC')).date()
+
+    @api.model
+    def _kpi_names(self):
+        return [name for name, field in self._fields.items() if field.type == 'integer' and name != 'id']
+
+    @api.model
+    def _kpi_records(self, manager, today, indirect=False):
+        """``{kpi: records}`` of ``manager``'s team; each KPI counts its records.
+
+        Override to add KPIs, together with the snapshot field of the same
+        name.
+        """
+        team = self.env['hr.employee']._odhr_team(manager, indirect)
+        Leave = self.env['hr.leave'].sudo()
+        return {
+            'headcount': team,
+            'present_today': self.env['odhr.api.attendance.day'].sudo().search([
+                ('employee_id', 'in', team.ids), ('day', '=', today), ('attendance_count', '>', 0),
+            ]).employee_id,
+            'on_leave_today': Leave.search([
+                ('employee_id', 'in', team.ids),
+                ('state', '=', 'validate'),
+                ('request_date_from', '<=', today),
+                ('request_date_to', '>=', today),
+            ]).employee_id,
+            'pending_approvals': Leave.search([
+                ('employee_id', 'in', team.ids), ('state', 'in', ['confirm', 'validate1']),
+            ], order='request_date_from, id'),
+        }
+
+    @api.model
+    def _compute_snapshot(self, manager, indirect=False):
+        """Recompute and store the snapshot of ``manager``; returns it."""
+        today = self._today(manager)
+        cr = self.env.cr
+        # changes queued from now on are not covered by this computation
+        cr.execute(
+            "DELETE FROM odhr_api_team_kpi_queue WHERE manager_id = %s AND indirect = %s",
+            [manager.id, indirect],
+        )
+        values = {kpi: len(records) for kpi, records in self._kpi_records(manager, today, indirect).items()}
+        values.update(day=today, computed_at=fields.Datetime.now())
+        columns = list(values)
+        query = tools.SQL(
+            """INSERT INTO odhr_api_team_kpi (manager_id, indirect, %s) VALUES (%s, %s, %s)
+               ON CONFLICT (manager_id, indirect) DO UPDATE SET %s RETURNING id""",
+            tools.SQL(', ').join(map(tools.SQL.identifier, columns)),
+            manager.id,
+            indirect,
+            tools.SQL(', ').join(values.values()),
+            tools.SQL(', ').join(
+                tools.SQL('%s = EXCLUDED.%s', tools.SQL.identifier(column), tools.SQL.identifier(column))
+                for column in columns
+            ),
+        )
+        cr.execute(query)
+        snapshot = self.sudo().browse(cr.fetchone()[0])
+        snapshot.invalidate_recordset()
+        return snapshot
+
+    @api.model
+    def get_snapshot(self, manager, indirect=False):
+        """Current snapshot of ``manager``, recomputed first if it is stale."""
+        self.env.cr.execute("""
+            SELECT k.id, k.day, EXISTS(
+                       SELECT 1 FROM odhr_api_team_kpi_queue q
+                        WHERE q.manager_id = e.id AND q.indirect = %(indirect)s)
+              FROM hr_employee e
+         LEFT JOIN odhr_api_team_kpi k ON k.manager_id = e.id AND k.indirect = %(indirect)s
+             WHERE e.id = %(manager)s
+        """, {'manager': manager.id, 'indirect': indirect})
+        snapshot_id, day, queued = self.env.cr.fetchone()
+        if not snapshot_id or queued or day != self._today(manager):
+            return self._compute_snapshot(manager, indirect)
+        return self.sudo().browse(snapshot_id)
+
+    # ------------------------------------------------------------------
+    # Change tracking
+    # ------------------------------------------------------------------
+    @api.model
+    def _touch(self, employees):
+        """Queue the snapshots of the managers of ``employees`` for recomputation:
+        the direct team of their manager, and the whole team of every manager
+        above them."""
+        direct, managers = self.env['hr.employee']._odhr_managers(employees)
+        rows = [(manager_id, False) for manager_id in sorted(direct)]
+        rows += [(manager_id, True) for manager_id in sorted(managers)]
+        if rows:
+            self.env.cr.execute(
+                "INSERT INTO odhr_api_team_kpi_queue (manager_id, indirect) SELECT * FROM unnest(%s::int[], %s::bool[])",
+                [[row[0] for row in rows], [row[1] for row in rows]],
+            )
+
+    @api.model
+    def cron_refresh(self):
+        """Recompute the snapshots with queued changes."""
+        self.env.cr.execute("SELECT DISTINCT manager_id, indirect FROM odhr_api_team_kpi_queue ORDER BY 1, 2")
+        queued = self.env.cr.fetchall()
+        managers = self.env['hr.employee'].sudo().browse({row[0] for row in queued}).exists()
+        for manager_id, indirect in queued:
+            if manager_id in managers.ids:
+                self._compute_snapshot(managers.browse(manager_id), indirect)
+        # managers deleted since
+        self.env.cr.execute("DELETE FROM odhr_api_team_kpi_queue WHERE manager_id != ALL(%s)", [managers.ids])
+        return True
+
+
+class OdhrApiTeamKpiQueue(models.Model):
+    """Manager whose KPI snapshot is out of date; one row per change."""
+    _name = 'odhr.api.team.kpi.queue'
+    _description = 'ODHR API Team KPI Change'
+    _log_access = False
+
+    manager_id = fields.Integer(required=True, index=True)
+    indirect = fields.Boolean(required=True, default=False)
+
+
+class OdhrApiTeamKpiMixin(models.AbstractModel):
+    """Records of an employee counted by the team KPIs of their manager."""
+    _name = 'odhr.api.team.kpi.mixin'
+    _description = 'ODHR API Team KPI Tracking'
+
+    # fields whose change may change a KPI; employee_id links the employee
+    _odhr_kpi_fields = ('employee_id',)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['odhr.api.team.kpi']._touch(records.sudo().employee_id)
+        return records
+
+    def write(self, vals):
+        if not set(self._odhr_kpi_fields) & set(vals):
+            return super().write(vals)
+        employees = self.sudo().employee_id
+        res = super().write(vals)
+        self.env['odhr.api.team.kpi']._touch(employees | self.sudo().employee_id)
+        return res
+
+    def unlink(self):
+        self.env['odhr.api.team.kpi']._touch(self.sudo().employee_id)
+        return super().unlink()
+
+
+class HrLeave(models.Model):
+    _name = 'hr.leave'
+    _inherit = ['hr.leave', 'odhr.api.team.kpi.mixin']
+    _odhr_kpi_fields = ('employee_id', 'state', 'request_date_from', 'request_date_to', 'date_from', 'date_to')
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import secrets
+import shutil
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import config
+
+# bytes copied per read while spooling and hashing
+COPY_BLOCK = 64 * 1024
+UPLOAD_DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+UPLOAD_CHUNK_MAX = 8 * 1024 * 1024
+
+
+class OdhrApiUpload(models.Model):
+    """Resumable upload session.
+
+    Chunks are appended to a spool file under the data directory, so memory
+    use does not depend on the file size.  Finalizing checks the size and
+    SHA-1 of the spooled file and moves it into the filestore as the content
+    of a new attachment.
+    """
+    _name = 'odhr.api.upload'
+    _description = 'ODHR API Upload Session'
+
+    token = fields.Char(required=True, readonly=True, copy=False,
+                        default=lambda self: secrets.token_urlsafe(24))
+    user_id = fields.Many2one('res.users', required=True, ondelete='cascade', default=lambda self: self.env.uid)
+    name = fields.Char(required=True)
+    mimetype = fields.Char()
+    res_model = fields.Char(required=True)
+    res_id = fields.Integer(required=True)
+    size = fields.Integer(required=True, help='Announced size of the whole file, in bytes')
+    checksum = fields.Char(help='Announced SHA-1 of the whole file (hex), verified on finalize')
+    received = fields.Integer(default=0, readonly=True)
+    state = fields.Selection([('open', 'Open'), ('done', 'Done'), ('failed', 'Failed')], default='open', required=True)
+    attachment_id = fields.Many2one('ir.attachment', readonly=True, ondelete='set null')
+
+    _sql_constraints = [
+        ('token_uniq', 'unique(token)', 'Upload tokens must be unique.'),
+    ]
+
+    @api.model
+    def _max_size(self):
+        try:
+            return int(self.env['ir.config_parameter'].sudo().get_param('odhr_api.upload_max_size', UPLOAD_DEFAULT_MAX_SIZE))
+        except ValueError:
+            return UPLOAD_DEFAULT_MAX_SIZE
+
+    @api.constrains('size')
+    def _check_size(self):
+        max_size = self._max_size()
+        for upload in self:
+            if upload.size <= 0 or upload.size > max_size:
+                raise ValidationError(f'File size must be between 1 and {max_size} bytes.')
+
+    def _spool_path(self):
+        self.ensure_one()
+        directory = os.path.join(config['data_dir'], 'odhr_uploads', self.env.cr.dbname)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, self.token)
+
+    def _lock(self):
+        """Serialize concurrent calls on the same upload."""
+        self.env.cr.execute("SELECT id FROM odhr_api_upload WHERE id = %s FOR UPDATE", [self.id])
+        self.invalidate_recordset(['received', 'state'])
+
+    def _check_open(self):
+        if self.state == 'failed':
+            raise UserError('Upload data lost, restart the upload')
+        if self.state != 'open':
+            raise UserError('Upload already finalized')
+
+    def _check_spool(self, path):
+        """Fail the upload when its spool file is gone (collected, cleaned
+        up, or written on another server); the client has to start over."""
+        if not os.path.exists(path):
+            self.state = 'failed'
+            raise UserError('Upload data lost, restart the upload')
+
+    def write_chunk(self, offset, stream, length):
+        """Write ``length`` bytes read from ``stream`` at ``offset``.
+
+        ``offset`` must be the number of bytes received so far; a client
+        resuming after a failure asks for it first.  Returns the new offset.
+        """
+        self.ensure_one()
+        self._lock()
+        self._check_open()
+        if offset != self.received:
+            raise ValidationError(f'Expected offset {self.received}')
+        if length <= 0 or length > UPLOAD_CHUNK_MAX or offset + length > self.size:
+            raise ValidationError('Invalid chunk length')
+        path = self._spool_path()
+        if offset:
+            self._check_spool(path)
+        with open(path, 'r+b' if offset else 'wb') as spool:
+            spool.seek(offset)
+            remaining = length
+            while remaining:
+                block = stream.read(min(COPY_BLOCK, remaining))
+                if not block:
+                    raise ValidationError('Incomplete chunk')
+                spool.write(block)
+                remaining -= len(block)
+            # drop leftovers of an earlier attempt that was rolled back
+            spool.truncate()
+        self.received = offset + length
+        return self.received
+
+    def _file_sha1(self, path):
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as spool:
+            for block in iter(lambda: spool.read(COPY_BLOCK), b''):
+                sha1.update(block)
+        return sha1.hexdigest()
+
+    def finalize(self):
+        """Create the attachment from the spooled file; returns it."""
+        self.ensure_one()
+        self._lock()
+        self._check_open()
+        path = self._spool_path()
+        self._check_spool(path)
+        if self.received != self.size or os.path.getsize(path) != self.size:
+            raise ValidationError(f'Incomplete upload: {self.received} of {self.size} bytes received')
+        checksum = self._file_sha1(path)
+        if self.checksum and self.checksum.lower() != checksum:
+            raise ValidationError('Checksum mismatch')
+
+        Attachment = self.env['ir.attachment'].sudo()
+        vals = {
+            'name': self.name,
+            'res_model': self.res_model,
+            'res_id': self.res_id,
+            'mimetype': self.mimetype or False,
+        }
+        if Attachment._storage() != 'file':
+            with open(path, 'rb') as spool:
+                attachment = Attachment.create(dict(vals, raw=spool.read()))
+        else:
+            # same layout as ir.attachment._file_write, without reading the file
+            fname = f'{checksum[:2]}/{checksum}'
+            full_path = Attachment._full_path(fname)
+            if not os.path.exists(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                shutil.move(path, full_path)
+                # collected again if this transaction rolls back
+                Attachment._mark_for_gc(fname)
+            attachment = Attachment.create(vals)
+            self.env.cr.execute("""
+                UPDATE ir_attachment
+                   SET store_fname = %s, checksum = %s, file_size = %s, db_datas = NULL
+                 WHERE id = %s
+            """, [fname, checksum, self.size, attachment.id])
+            attachment.invalidate_recordset(['store_fname', 'checksum', 'file_size', 'db_datas', 'raw', 'datas'])
+        if os.path.exists(path):
+            os.unlink(path)
+        self.write({'state': 'done', 'attachment_id': attachment.id})
+        return attachment
+
+    @api.model
+    def cron_gc_uploads(self):
+        """Drop unfinished uploads idle for a day, and finished ones after a week."""
+        now = fields.Datetime.now()
+        stale = self.search([
+            '|',
+            '&', ('state', 'in', ('open', 'failed')), ('write_date', '<', now - timedelta(days=1)),
+            '&', ('state', '=', 'done'), ('write_date', '<', now - timedelta(days=7)),
+        ])
+        for upload in stale.filtered(lambda u: u.state != 'done'):
+            path = upload._spool_path()
+            if os.path.exists(path):
+                os.unlink(path)
+        stale.unlink()
+        return True
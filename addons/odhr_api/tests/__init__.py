@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from . import test_auth
+from . import test_stateless
+from . import test_ratelimit
+from . import test_employee_cache
+from . import test_batch
+from . import test_pagination
+from . import test_employee_fields
+from . import test_serializers
+from . import test_conditional
+from . import test_payslip_pdf
+from . import test_jobs
+from . import test_compression
+from . import test_fastjson
+from . import test_sync
+from . import test_attendance_bulk
+from . import test_attendance_analytics
+from . import test_team_kpi
+from . import test_org_tree
+from . import test_leave_balance
+from . import test_leave_calendar
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import base64
+import json
+
+from odoo.tests.common import HttpCase
+
+
+class OdhrApiCase(HttpCase):
+    """Calls to the API as the user of an employee, with basic auth."""
+
+    def _api_user(self, key, groups=(), **employee_vals):
+        """``(user, employee)`` logging in as ``odhr_<key>_user`` with the
+        password ``odhr_<key>_pwd``; the API calls then authenticate as it."""
+        login, password = f'odhr_{key}_user', f'odhr_{key}_pwd'
+        user = self.env['res.users'].create({
+            'name': f'{key.title()} User',
+            'login': login,
+            'password': password,
+            'groups_id': [(4, self.env.ref(group).id) for group in groups],
+        })
+        employee = self.env['hr.employee'].create({
+            'name': f'{key.title()} Employee',
+            'user_id': user.id,
+            **employee_vals,
+        })
+        self._login(login, password)
+        return user, employee
+
+    def _login(self, login, password):
+        self.authenticate(None, None)
+        credentials = base64.b64encode(f'{login}:{password}'.encode()).decode()
+        self.headers = {'Authorization': f'Basic {credentials}', 'Content-Type': 'application/json'}
+
+    def _url(self, path):
+        return f'/odhr/api/{path}?db={self.env.cr.dbname}'
+
+    def _get(self, path):
+        return self.url_open(self._url(path), headers=self.headers)
+
+    def _post(self, path, body=None):
+        return self.url_open(self._url(path), data=json.dumps(body or {}), headers=self.headers)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from datetime import date, datetime, timedelta
+
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrAttendanceAnalytics(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        # standard 40 hours calendar: 8:00-12:00 and 13:00-17:00, Monday to Friday
+        self.user, self.employee = self._api_user(
+            'analytics', tz='UTC', resource_calendar_id=self.env.ref('resource.resource_calendar_std').id,
+        )
+        self.Day = self.env['odhr.api.attendance.day']
+
+    def _attend(self, check_in, check_out, employee=None):
+        return self.env['hr.attendance'].create({
+            'employee_id': (employee or self.employee).id,
+            'check_in': check_in,
+            'check_out': check_out,
+        })
+
+    def _day(self, day):
+        return self.Day.search([('employee_id', '=', self.employee.id), ('day', '=', day)])
+
+    def test_rollup_maintenance(self):
+        attendance = self._attend(datetime(2024, 3, 4, 8, 10), datetime(2024, 3, 4, 16, 0))
+        day = self._day(date(2024, 3, 4))
+        self.assertEqual(day.attendance_count, 1)
+        self.assertAlmostEqual(day.worked_hours, attendance.worked_hours, places=4)
+        self.assertEqual(day.first_in, datetime(2024, 3, 4, 8, 10))
+        self.assertTrue(day.late)
+        self.assertTrue(day.early_leave)
+
+        attendance.write({'check_in': datetime(2024, 3, 4, 7, 55), 'check_out': datetime(2024, 3, 4, 19, 0)})
+        day = self._day(date(2024, 3, 4))
+        self.assertFalse(day.late)
+        self.assertFalse(day.early_leave)
+        self.assertGreater(day.overtime_hours, 0)
+
+        # moved to another day: the old working day is left absent
+        attendance.write({'check_in': datetime(2024, 3, 5, 8, 0), 'check_out': datetime(2024, 3, 5, 17, 0)})
+        self.assertEqual(self._day(date(2024, 3, 4)).attendance_count, 0)
+        self.assertTrue(self._day(date(2024, 3, 4)).absent)
+        self.assertEqual(self._day(date(2024, 3, 5)).attendance_count, 1)
+
+        # on a day off, no attendance leaves no row
+        attendance.write({'check_in': datetime(2024, 3, 9, 8, 0), 'check_out': datetime(2024, 3, 9, 12, 0)})
+        attendance.unlink()
+        self.assertFalse(self._day(date(2024, 3, 9)))
+
+    def test_open_attendance_is_no_early_leave(self):
+        self._attend(datetime(2024, 3, 4, 8, 0), datetime(2024, 3, 4, 12, 0))
+        self._attend(datetime(2024, 3, 4, 13, 0), False)
+        day = self._day(date(2024, 3, 4))
+        self.assertEqual(day.attendance_count, 2)
+        self.assertFalse(day.last_out)
+        self.assertFalse(day.early_leave)
+
+    def test_absences(self):
+        self._attend(datetime(2024, 3, 4, 8, 0), datetime(2024, 3, 4, 17, 0))
+        # Monday to Sunday: four scheduled days without attendance
+        self.Day._refresh({self.employee.id: {date(2024, 3, 4) + timedelta(days=offset) for offset in range(7)}})
+        self.assertFalse(self._day(date(2024, 3, 4)).absent)
+        self.assertTrue(self._day(date(2024, 3, 5)).absent)
+        self.assertFalse(self._day(date(2024, 3, 9)))
+        self.assertEqual(self.Day.summary(self.employee, date(2024, 3, 4), date(2024, 3, 10))[0]['days_absent'], 4)
+
+        # time off gives the day back, and takes it again when removed
+        time_off = self.env['resource.calendar.leaves'].create({
+            'name': 'Day off',
+            'resource_id': self.employee.resource_id.id,
+            'calendar_id': self.employee.resource_calendar_id.id,
+            'date_from': datetime(2024, 3, 5, 0, 0),
+            'date_to': datetime(2024, 3, 5, 23, 59, 59),
+        })
+        self.assertFalse(self._day(date(2024, 3, 5)))
+        time_off.unlink()
+        self.assertTrue(self._day(date(2024, 3, 5)).absent)
+
+        # an attendance entered afterwards turns the absence into presence
+        self._attend(datetime(2024, 3, 5, 8, 0), datetime(2024, 3, 5, 17, 0))
+        day = self._day(date(2024, 3, 5))
+        self.assertEqual((day.attendance_count, day.absent), (1, False))
+
+    def test_reconcile(self):
+        self._attend(datetime(2024, 3, 4, 8, 0), datetime(2024, 3, 4, 17, 0))
+        self.env['ir.config_parameter'].sudo().set_param('odhr_api.attendance_day_backfilled', False)
+        self.env.cr.execute("DELETE FROM odhr_api_attendance_day WHERE employee_id = %s", [self.employee.id])
+        self.Day.invalidate_model()
+        self.Day.cron_reconcile()
+        self.assertTrue(self._day(date(2024, 3, 4)))
+        self.assertTrue(self.env['ir.config_parameter'].sudo().get_param('odhr_api.attendance_day_backfilled'))
+
+    def _analytics(self, body):
+        return self._post('attendance/analytics', body)
+
+    def test_endpoint(self):
+        self._attend(datetime(2024, 3, 4, 8, 20), datetime(2024, 3, 4, 17, 0))
+        self._attend(datetime(2024, 3, 5, 8, 0), datetime(2024, 3, 5, 15, 0))
+        self._attend(datetime(2024, 3, 11, 8, 0), datetime(2024, 3, 11, 17, 0))
+        # absences are rolled up by the nightly job, here for the days of the range
+        self.Day._refresh({self.employee.id: {date(2024, 3, 4) + timedelta(days=offset) for offset in range(12)}})
+        resp = self._analytics({'from': '2024-03-04', 'to': '2024-03-15', 'period': 'week'})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data['days_present'], 3)
+        self.assertEqual(data['days_absent'], 7)
+        self.assertEqual(data['late_count'], 1)
+        self.assertEqual(data['early_leave_count'], 1)
+        self.assertEqual([p['start'] for p in data['periods']], ['2024-03-04', '2024-03-11'])
+        self.assertEqual([p['days_present'] for p in data['periods']], [2, 1])
+        self.assertEqual([p['days_absent'] for p in data['periods']], [3, 4])
+        self.assertAlmostEqual(sum(p['total_hours'] for p in data['periods']), data['total_hours'], places=2)
+
+        self.assertEqual(self._analytics({'from': '2024-03-15', 'to': '2024-03-04'}).status_code, 400)
+        self.assertEqual(self._analytics({'period': 'decade'}).status_code, 400)
+
+    def test_team_permissions(self):
+        other = self.env['hr.employee'].create({'name': 'Someone Else'})
+        self.assertEqual(self._analytics({'employee_id': other.id}).status_code, 403)
+
+        report = self.env['hr.employee'].create({'name': 'Report', 'parent_id': self.employee.id, 'tz': 'UTC'})
+        self._attend(datetime(2024, 3, 4, 8, 0), datetime(2024, 3, 4, 17, 0), employee=report)
+        resp = self._analytics({'employee_id': report.id, 'from': '2024-03-04', 'to': '2024-03-04'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['days_present'], 1)
+        team = self._analytics({'team': True, 'from': '2024-03-04', 'to': '2024-03-04'}).json()
+        self.assertEqual(team['employee_count'], 1)
+        self.assertEqual(team['days_present'], 1)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrAttendanceBulk(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.employee = self._api_user('punch')
+
+    def _bulk(self, items):
+        resp = self._post('attendance/bulk', {'items': items})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()['results']
+
+    def test_replay(self):
+        # sent out of order: applied by time, answered in request order
+        items = [
+            {'uid': 'p2', 'kind': 'checkout', 'at': '2024-03-04T16:30:00Z'},
+            {'uid': 'p1', 'kind': 'checkin', 'at': '2024-03-04T08:00:00Z', 'lat': 16.8, 'lng': 96.1},
+            {'uid': 'p3', 'kind': 'checkin', 'at': '2024-03-05T10:00:00+02:00'},
+        ]
+        results = self._bulk(items)
+        self.assertEqual([r['status'] for r in results], ['created', 'created', 'created'])
+        self.assertEqual(results[0]['attendance']['id'], results[1]['attendance']['id'])
+        self.assertEqual(results[1]['attendance']['check_in'], '2024-03-04T08:00:00Z')
+        self.assertEqual(results[1]['attendance']['check_out'], '2024-03-04T16:30:00Z')
+        self.assertEqual(results[2]['attendance']['check_in'], '2024-03-05T08:00:00Z')
+
+        replay = self._bulk(items)
+        self.assertEqual([r['status'] for r in replay], ['duplicate', 'duplicate', 'duplicate'])
+        self.assertEqual(self.env['hr.attendance'].search_count([('employee_id', '=', self.employee.id)]), 2)
+
+    def test_invalid_items(self):
+        results = self._bulk([
+            {'uid': 'x1', 'kind': 'checkout', 'at': '2024-03-04T16:30:00Z'},
+            {'uid': 'x2', 'kind': 'nap', 'at': '2024-03-04T12:00:00Z'},
+            {'uid': 'x3', 'kind': 'checkin', 'at': 'yesterday'},
+            {'uid': 'x4', 'kind': 'checkin', 'at': '2999-01-01T00:00:00Z'},
+            {'uid': 'x5', 'kind': 'checkin', 'at': '0001-01-01T00:00:00+01:00'},
+        ])
+        self.assertEqual([r['status'] for r in results], ['error'] * 5)
+        self.assertEqual(results[0]['error'], 'No open attendance to checkout')
+
+    def _punch(self, kind, body=None):
+        return self._post(f'attendance/{kind}', body)
+
+    def test_single_punch_retry(self):
+        first = self._punch('checkin', {'uid': 'tap-1'})
+        self.assertEqual(first.status_code, 200)
+        retry = self._punch('checkin', {'uid': 'tap-1'})
+        self.assertEqual(retry.json()['id'], first.json()['id'])
+
+        second = self._punch('checkin', {'uid': 'tap-2'})
+        self.assertNotEqual(second.json()['id'], first.json()['id'])
+        open_count = self.env['hr.attendance'].search_count([('employee_id', '=', self.employee.id), ('check_out', '=', False)])
+        self.assertEqual(open_count, 1)
+
+        self.assertEqual(self._punch('checkout').status_code, 200)
+        resp = self._punch('checkout')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()['error'], 'No open attendance to checkout')
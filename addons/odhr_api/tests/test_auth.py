@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.odhr_api.tools.auth import issue_token, user_fingerprint, verify_token
+from odoo.addons.odhr_api.tools.cache import TTLCache
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrApiAuth(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = cls.env['res.users'].create({
+            'name': 'Mobile User',
+            'login': 'odhr_mobile_user',
+            'password': 'odhr_mobile_pwd',
+        })
+
+    def test_token_roundtrip(self):
+        token, expires_at = issue_token(self.env, self.user.id)
+        self.assertGreater(expires_at, 0)
+        self.assertEqual(verify_token(self.env, token), self.user.id)
+
+    def test_token_tampered(self):
+        token, _exp = issue_token(self.env, self.user.id)
+        body, signature = token.split('.')
+        self.assertIsNone(verify_token(self.env, body + '.' + signature[::-1]))
+        self.assertIsNone(verify_token(self.env, 'garbage'))
+
+    def test_password_change_revokes_token(self):
+        token, _exp = issue_token(self.env, self.user.id)
+        before = user_fingerprint(self.env.cr, self.user.id)
+        self.user.password = 'another_pwd'
+        self.env.flush_all()
+        self.assertNotEqual(user_fingerprint(self.env.cr, self.user.id), before)
+        self.assertIsNone(verify_token(self.env, token))
+
+    def test_archived_user_has_no_fingerprint(self):
+        self.user.active = False
+        self.env.flush_all()
+        self.assertIsNone(user_fingerprint(self.env.cr, self.user.id))
+
+    def test_ttl_cache_bounded(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), 3)
+        cache.set('d', 4, ttl=-1)
+        self.assertIsNone(cache.get('d'))
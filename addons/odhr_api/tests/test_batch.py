@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrApiBatch(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.employee = self._api_user('batch')
+
+    def _batch(self, requests):
+        resp = self._post('batch', {'requests': requests})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()['responses']
+
+    def test_batch(self):
+        responses = self._batch([
+            {'id': 'me', 'method': 'GET', 'path': '/odhr/api/auth/me'},
+            {'id': 'emp', 'method': 'GET', 'path': '/odhr/api/employees/me'},
+            {'id': 'history', 'method': 'POST', 'path': '/odhr/api/attendance/history', 'body': {'limit': 5}},
+            {'id': 'missing', 'method': 'GET', 'path': '/odhr/api/nope'},
+            {'id': 'method', 'method': 'DELETE', 'path': '/odhr/api/auth/me'},
+        ])
+        by_id = {r['id']: r for r in responses}
+        self.assertEqual([r['id'] for r in responses], ['me', 'emp', 'history', 'missing', 'method'])
+        self.assertEqual(by_id['me']['body']['employee_id'], self.employee.id)
+        self.assertEqual(by_id['emp']['body']['id'], self.employee.id)
+        self.assertEqual(by_id['history']['status'], 200)
+        self.assertEqual(by_id['missing']['status'], 404)
+        self.assertEqual(by_id['method']['status'], 405)
+
+    def test_batch_cannot_nest(self):
+        responses = self._batch([{'id': 'nested', 'method': 'POST', 'path': '/odhr/api/batch', 'body': {}}])
+        self.assertEqual(responses[0]['status'], 404)
+
+    def test_batch_binary_item(self):
+        responses = self._batch([
+            {'id': 'avatar', 'method': 'GET', 'path': f'/odhr/api/employees/{self.employee.id}/avatar/128'},
+            {'id': 'me', 'method': 'GET', 'path': '/odhr/api/auth/me'},
+        ])
+        # the image fails alone, the rest of the batch is answered
+        self.assertEqual(responses[0]['status'], 400)
+        self.assertEqual(responses[1]['status'], 200)
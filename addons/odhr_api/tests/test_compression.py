@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import logging
+import time
+
+from werkzeug.http import parse_accept_header
+
+from odoo.http import Response
+from odoo.tests.common import BaseCase, tagged
+
+from odoo.addons.odhr_api.tools import compression
+
+from .common import OdhrApiCase
+
+_logger = logging.getLogger(__name__)
+
+
+def _payload(count=200):
+    """An employee-list-like JSON body."""
+    return json.dumps({'items': [{
+        'id': i,
+        'name': f'Employee {i}',
+        'work_email': f'employee{i}@example.com',
+        'job_title': 'Consultant',
+        'department_id': {'id': i % 7, 'name': f'Department {i % 7}'},
+        'image_url': f'/odhr/api/employees/{i}/avatar/128?db=odhr&h=default',
+    } for i in range(count)]}).encode()
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrCompression(BaseCase):
+    def _response(self, body, mimetype='application/json'):
+        return Response(body, status=200, mimetype=mimetype)
+
+    def test_gzip(self):
+        body = _payload()
+        resp = self._response(body)
+        resp.headers['ETag'] = '"abc"'
+        self.assertEqual(compression.compress_response(resp, parse_accept_header('gzip')), 'gzip')
+        self.assertEqual(gzip.decompress(resp.get_data()), body)
+        self.assertEqual(resp.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(resp.headers['Content-Length'], str(len(resp.get_data())))
+        self.assertEqual(resp.headers['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', resp.vary)
+
+    def test_skipped(self):
+        body = _payload()
+        # not accepted
+        self.assertIsNone(compression.compress_response(self._response(body), parse_accept_header('identity')))
+        self.assertIsNone(compression.compress_response(self._response(body), parse_accept_header('gzip;q=0')))
+        # too small
+        self.assertIsNone(compression.compress_response(self._response(b'{}'), parse_accept_header('gzip')))
+        # binary payload
+        self.assertIsNone(compression.compress_response(self._response(body, 'application/pdf'), parse_accept_header('gzip')))
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrCompressionHttp(OdhrApiCase):
+    def test_api_response_compressed(self):
+        self.env['ir.config_parameter'].sudo().set_param('odhr_api.compression_min_size', '0')
+        self._api_user('gzip')
+        resp = self.url_open(self._url('leave/types'), headers=dict(self.headers, **{'Accept-Encoding': 'gzip'}))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers.get('Content-Encoding'), 'gzip')
+        self.assertIsInstance(resp.json(), list)
+
+
+@tagged('-standard', 'odhr_bench')
+class BenchOdhrCompression(BaseCase):
+    """Bytes saved against CPU spent per level: ``--test-tags odhr_bench``."""
+
+    def test_levels(self):
+        body = _payload(1000)
+        runs = 20
+        candidates = [('gzip', level) for level in range(1, 10)]
+        if compression.brotli:
+            candidates += [('br', quality) for quality in range(0, 12)]
+        for encoding, level in candidates:
+            start = time.process_time()
+            for _i in range(runs):
+                size = len(compression.compress(body, encoding, level))
+            elapsed = (time.process_time() - start) / runs
+            _logger.info(
+                '%-4s level %2d: %7d -> %6d bytes (%4.1fx), %6.2f ms, %6.1f MB/s',
+                encoding, level, len(body), size, len(body) / size, elapsed * 1000,
+                len(body) / elapsed / 1e6 if elapsed else float('inf'),
+            )
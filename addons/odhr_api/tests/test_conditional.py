@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from odoo.addons.odhr_api.tools.conditional import table_version
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrConditionalResponses(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.department = self.env['hr.department'].create({'name': 'Etag Department'})
+        self.user, self.employee = self._api_user('etag', department_id=self.department.id)
+
+    def _get(self, path, etag=None):
+        headers = dict(self.headers)
+        if etag:
+            headers['If-None-Match'] = etag
+        return self.url_open(self._url(path), headers=headers)
+
+    def test_employee_me(self):
+        resp = self._get('employees/me')
+        self.assertEqual(resp.status_code, 200)
+        tag = resp.headers['ETag']
+        self.assertEqual(resp.headers['Cache-Control'], 'private, no-cache')
+
+        resp = self._get('employees/me', tag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b'')
+
+        # renaming the department changes the payload, hence the tag
+        self.department.name = 'Etag Department (renamed)'
+        self.env.flush_all()
+        resp = self._get('employees/me', tag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp.headers['ETag'], tag)
+        self.assertEqual(resp.json()['department_name'], 'Etag Department (renamed)')
+
+    def test_reference_data(self):
+        resp = self._get('leave/types')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers['Cache-Control'], 'private, max-age=300')
+        self.assertEqual(self._get('leave/types', resp.headers['ETag']).status_code, 304)
+
+        tag = self._get('auth/me').headers['ETag']
+        self.assertEqual(self._get('auth/me', tag).status_code, 304)
+
+    def test_table_version_relations(self):
+        Department = self.env['hr.department']
+        domain = [('id', '=', self.department.id)]
+        self.assertEqual(table_version(Department, domain, ['manager_id'])[3], None)
+        self.department.manager_id = self.employee
+        self.env.flush_all()
+        count, max_id, _write, manager_write = table_version(Department, domain, ['manager_id'])
+        self.assertEqual((count, max_id), (1, self.department.id))
+        self.assertEqual(manager_write, self.employee.write_date)
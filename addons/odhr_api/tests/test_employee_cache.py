@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrEmployeeCache(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = cls.env['res.users'].create({'name': 'Cache User', 'login': 'odhr_cache_user'})
+        cls.employee = cls.env['hr.employee'].create({'name': 'Cache Employee', 'user_id': cls.user.id})
+
+    def test_lookup_is_cached(self):
+        Employee = self.env['hr.employee']
+        self.assertEqual(Employee._odhr_employee_id_for_user(self.user.id), self.employee.id)
+        with self.assertQueryCount(0):
+            Employee._odhr_employee_id_for_user(self.user.id)
+
+    def test_invalidated_on_relink_and_archive(self):
+        Employee = self.env['hr.employee']
+        self.assertEqual(Employee._odhr_employee_id_for_user(self.user.id), self.employee.id)
+        self.employee.user_id = False
+        self.assertFalse(Employee._odhr_employee_id_for_user(self.user.id))
+        self.employee.user_id = self.user
+        self.assertEqual(Employee._odhr_employee_id_for_user(self.user.id), self.employee.id)
+        self.employee.active = False
+        self.assertFalse(Employee._odhr_employee_id_for_user(self.user.id))
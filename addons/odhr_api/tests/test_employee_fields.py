@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrEmployeeFields(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.employee = self._api_user('fields')
+        self.db = self.env.cr.dbname
+
+    def _search(self, body):
+        return self._post('employees/search', body)
+
+    def test_sparse_fields(self):
+        resp = self._search({'q': 'Fields Employee', 'fields': ['id', 'name', 'department_name']})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['items'], [{'id': self.employee.id, 'name': 'Fields Employee', 'department_name': None}])
+
+        resp = self.url_open(f'/odhr/api/employees/me?db={self.db}&fields=id,image_url', headers=self.headers)
+        self.assertEqual(resp.json(), {
+            'id': self.employee.id,
+            'image_url': f'/odhr/api/employees/{self.employee.id}/avatar/128?db={self.db}&h=default',
+        })
+
+    def test_unknown_field(self):
+        resp = self._search({'fields': ['name', 'image_1920']})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_no_inline_images(self):
+        item = self._search({'q': 'Fields Employee'}).json()['items'][0]
+        self.assertNotIn('image_128', item)
+        resp = self.url_open(item['image_url'], headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.headers['Content-Type'].startswith('image/'))
+
+    def test_content_addressed_avatar(self):
+        png = ('iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR4nGP4z8DwHwAFAAH/iZk9HQAAAABJRU5ErkJggg==')
+        self.employee.image_1920 = png
+        self.env.flush_all()
+        url = self._search({'q': 'Fields Employee', 'fields': ['image_url']}).json()['items'][0]['image_url']
+        self.assertNotIn('h=default', url)
+        resp = self.url_open(url, headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('immutable', resp.headers['Cache-Control'])
+
+        # a stale hash is still served, but must not be cached
+        stale = self.url_open(url.replace('&h=', '&h=0'), headers=self.headers)
+        self.assertEqual(stale.headers['Cache-Control'], 'private, no-cache')
+
+        resp = self.url_open(
+            f'/odhr/api/employees/avatars?db={self.db}',
+            data=json.dumps({'ids': [self.employee.id], 'sizes': [128, 512]}),
+            headers=self.headers,
+        )
+        urls = resp.json()['items'][str(self.employee.id)]
+        self.assertEqual(urls['128'], url)
+        self.assertIn('/avatar/512?', urls['512'])
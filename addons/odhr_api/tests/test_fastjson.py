@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+import logging
+import time
+
+from odoo.tests.common import BaseCase, TransactionCase, tagged
+
+from odoo.addons.odhr_api.tools import fastjson
+
+_logger = logging.getLogger(__name__)
+
+SAMPLE = {
+    'naive': datetime.datetime(2024, 3, 4, 8, 1, 2, 123),
+    'utc': datetime.datetime(2024, 3, 4, 8, 0, tzinfo=datetime.timezone.utc),
+    'date': datetime.date(2024, 3, 4),
+    'image': b'iVBORw0KGgo=',
+    'empty': False,
+    'name': 'Zoë',
+    'ids': [1, 2, 3],
+}
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrFastJson(BaseCase):
+    def test_encoding(self):
+        self.assertEqual(json.loads(fastjson.dumps(SAMPLE)), {
+            'naive': '2024-03-04T08:01:02.000123Z',
+            'utc': '2024-03-04T08:00:00Z',
+            'date': '2024-03-04',
+            'image': 'iVBORw0KGgo=',
+            'empty': False,
+            'name': 'Zoë',
+            'ids': [1, 2, 3],
+        })
+
+    def test_stdlib_fallback_matches(self):
+        self.assertEqual(fastjson._dumps_stdlib(SAMPLE), fastjson.dumps(SAMPLE))
+
+
+@tagged('-standard', 'odhr_bench')
+class BenchOdhrFastJson(TransactionCase):
+    """Encoding time of a 1000-employee page: ``--test-tags odhr_bench``."""
+
+    def test_employee_page(self):
+        from odoo.addons.odhr_api.controllers.api import EMPLOYEE
+
+        employees = self.env['hr.employee'].create([{'name': f'Bench Employee {i}'} for i in range(1000)])
+        page = {'items': EMPLOYEE.serialize(employees), 'generated_at': datetime.datetime.now()}
+        page['items'] = [dict(item, write_date=employee.write_date) for item, employee in zip(page['items'], employees)]
+        candidates = [
+            ('json default=str', lambda value: json.dumps(value, default=str).encode()),
+            ('stdlib', fastjson._dumps_stdlib),
+        ]
+        if fastjson.orjson:
+            candidates.append(('orjson', fastjson.dumps))
+        runs = 20
+        for label, dumps in candidates:
+            start = time.perf_counter()
+            for _i in range(runs):
+                size = len(dumps(page))
+            _logger.info('%-17s %7d bytes, %6.2f ms', label, size, (time.perf_counter() - start) / runs * 1000)
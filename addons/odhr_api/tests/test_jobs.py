@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import base64
+
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrReportJobs(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.employee = self._api_user('job')
+        self.env['hr.attendance'].create({
+            'employee_id': self.employee.id,
+            'check_in': '2024-03-04 08:00:00',
+            'check_out': '2024-03-04 16:30:00',
+        })
+
+    def _enqueue(self, body):
+        return self._post('jobs', body)
+
+    def test_attendance_export(self):
+        resp = self._enqueue({'type': 'attendance_export', 'params': {'from': '2024-03-01', 'to': '2024-03-31'}})
+        self.assertEqual(resp.status_code, 202)
+        job = resp.json()
+        self.assertEqual(job['state'], 'queued')
+        self.assertIsNone(job['download_url'])
+
+        self.env['odhr.api.job']._process_jobs()
+        status = self._get(f"jobs/{job['id']}").json()
+        self.assertEqual(status['state'], 'done')
+
+        resp = self.url_open(status['download_url'], headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        lines = resp.content.decode().splitlines()
+        self.assertEqual(lines[0], 'check_in,check_out,worked_hours')
+        self.assertEqual(lines[1], '2024-03-04 08:00:00,2024-03-04 16:30:00,8.50')
+
+    def test_invalid_job(self):
+        self.assertEqual(self._enqueue({'type': 'everything'}).status_code, 400)
+        self.assertEqual(self._enqueue({'type': 'attendance_export', 'params': {'from': 'soon'}}).status_code, 400)
+        self.assertEqual(self._enqueue({'type': 'attendance_export', 'params': {'from': 1, 'to': 2}}).status_code, 400)
+        self.assertEqual(self._enqueue({'type': 'payslip_pdf', 'params': {'payslip_id': 'abc'}}).status_code, 400)
+
+    def test_type_limit(self):
+        self.env['ir.config_parameter'].sudo().set_param('odhr_api.job_limit.attendance_export', '0')
+        job = self.env['odhr.api.job'].with_user(self.user).enqueue(
+            'attendance_export', {'from': '2024-03-01', 'to': '2024-03-31'})
+        self.env['odhr.api.job']._process_jobs()
+        self.assertEqual(job.state, 'queued')
+
+    def test_other_users_job(self):
+        job = self.env['odhr.api.job'].with_user(self.user).enqueue(
+            'attendance_export', {'from': '2024-03-01', 'to': '2024-03-31'})
+        admin = base64.b64encode(b'admin:admin').decode()
+        resp = self.url_open(self._url(f'jobs/{job.id}'), headers={'Authorization': f'Basic {admin}'})
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from datetime import date, timedelta
+
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrLeaveBalance(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.employee = self._api_user(
+            'balance', resource_calendar_id=self.env.ref('resource.resource_calendar_std').id,
+        )
+        self.report = self.env['hr.employee'].create({'name': 'Balance Report', 'parent_id': self.employee.id})
+        self.paid = self.env['hr.leave.type'].create({
+            'name': 'Balance Paid', 'requires_allocation': 'yes', 'request_unit': 'day',
+        })
+        self.unpaid = self.env['hr.leave.type'].create({'name': 'Balance Unpaid', 'requires_allocation': 'no'})
+        today = date.today()
+        allocation = self.env['hr.leave.allocation'].create({
+            'name': 'Yearly',
+            'employee_id': self.employee.id,
+            'holiday_status_id': self.paid.id,
+            'number_of_days': 10,
+            'date_from': date(today.year, 1, 1),
+        })
+        allocation.write({'state': 'validate'})
+        # a Monday of this year, not before the allocation
+        self.monday = date(today.year, 1, 8)
+        self.monday -= timedelta(days=self.monday.weekday())
+        self.Balance = self.env['odhr.api.leave.balance']
+
+    def _leave(self, leave_type, start, days, state):
+        leave = self.env['hr.leave'].create({
+            'employee_id': self.employee.id,
+            'holiday_status_id': leave_type.id,
+            'request_date_from': start,
+            'request_date_to': start + timedelta(days=days - 1),
+        })
+        if state != leave.state:
+            leave.write({'state': state})
+        return leave
+
+    def _balance(self, leave_type, employee=None):
+        employee = employee or self.employee
+        balances = self.Balance.get_balances(employee)[employee.id]
+        return next(item for item in balances if item['type_id'] == leave_type.id)
+
+    def _cached(self):
+        return self.Balance.search_count([('employee_id', '=', self.employee.id)])
+
+    def test_balances(self):
+        self.assertEqual(self._balance(self.paid)['remaining'], 10)
+        self.assertTrue(self._cached())
+
+        self._leave(self.paid, self.monday, 2, 'validate')
+        # the leave dropped the cached rows
+        self.assertFalse(self._cached())
+        pending = self._leave(self.paid, self.monday + timedelta(days=2), 1, 'confirm')
+        self._leave(self.unpaid, self.monday + timedelta(days=3), 1, 'validate')
+        balance = self._balance(self.paid)
+        self.assertEqual(balance['allocated'], 10)
+        self.assertEqual(balance['taken'], 2)
+        self.assertEqual(balance['pending'], 1)
+        self.assertEqual(balance['remaining'], 8)
+        self.assertEqual(balance['virtual_remaining'], 7)
+        unpaid = self._balance(self.unpaid)
+        self.assertEqual(unpaid['taken'], 1)
+        self.assertIsNone(unpaid['remaining'])
+
+        pending.write({'state': 'refuse'})
+        self.assertEqual(self._balance(self.paid)['virtual_remaining'], 8)
+
+        # employees without any leave are cached too
+        self.assertEqual(self._balance(self.paid, self.report)['remaining'], 0)
+        self.assertTrue(self.Balance.search_count([('employee_id', '=', self.report.id)]))
+
+    def test_endpoints(self):
+        resp = self._get('leave/balances')
+        self.assertEqual(resp.status_code, 200)
+        paid = next(item for item in resp.json() if item['type_id'] == self.paid.id)
+        self.assertEqual((paid['remaining'], paid['unit']), (10, 'days'))
+
+        resp = self._post('leave/balances/team')
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual([row['employee_id'] for row in data['rows']], [self.report.id])
+        self.assertEqual(len(data['rows'][0]['balances']), len(data['types']))
+        self.assertEqual(len(data['rows'][0]['balances'][0]), len(data['columns']))
+
+        other = self.env['hr.employee'].create({'name': 'Other Manager'})
+        resp = self._post('leave/balances/team', {'manager_id': other.id})
+        self.assertEqual(resp.status_code, 403)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrLeaveCalendar(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.manager = self._api_user('calendar', name='Calendar Manager')
+        Employee = self.env['hr.employee']
+        self.alice = Employee.create({'name': 'Alice', 'parent_id': self.manager.id})
+        self.bob = Employee.create({'name': 'Bob', 'parent_id': self.manager.id})
+        self.leave_type = self.env['hr.leave.type'].create({'name': 'Calendar Leave', 'requires_allocation': 'no'})
+        # across the start of April (Thursday to Tuesday), and inside it
+        self.straddling = self._leave(self.alice, date(2024, 3, 28), date(2024, 4, 2))
+        self.inside = self._leave(self.bob, date(2024, 4, 2), date(2024, 4, 3))
+        self.Calendar = self.env['odhr.api.leave.calendar']
+
+    def _leave(self, employee, date_from, date_to):
+        return self.env['hr.leave'].create({
+            'employee_id': employee.id,
+            'holiday_status_id': self.leave_type.id,
+            'request_date_from': date_from,
+            'request_date_to': date_to,
+        })
+
+    def _cached_months(self):
+        return self.Calendar.search([('manager_id', '=', self.manager.id)]).mapped('month')
+
+    def test_days(self):
+        days = self.Calendar.get_days(self.manager, date(2024, 4, 1), date(2024, 4, 30))
+        self.assertEqual(sorted(days), ['2024-04-01', '2024-04-02', '2024-04-03'])
+        self.assertEqual([entry[0] for entry in days['2024-04-02']], [self.alice.id, self.bob.id])
+        self.assertEqual([entry[0] for entry in days['2024-04-03']], [self.bob.id])
+        self.assertEqual(self._cached_months(), [date(2024, 4, 1)])
+
+        # a refused leave leaves the calendar, and drops the cached month
+        self.inside.write({'state': 'refuse'})
+        self.assertFalse(self._cached_months())
+        days = self.Calendar.get_days(self.manager, date(2024, 4, 1), date(2024, 4, 30))
+        self.assertEqual(sorted(days), ['2024-04-01', '2024-04-02'])
+
+        # a team change drops every month of the team
+        self.alice.parent_id = False
+        self.assertFalse(self._cached_months())
+        self.assertFalse(self.Calendar.get_days(self.manager, date(2024, 4, 1), date(2024, 4, 30)))
+
+    def test_batch_invalidation(self):
+        other = self.env['hr.employee'].create({'name': 'Other Manager'})
+        carol = self.env['hr.employee'].create({'name': 'Carol', 'parent_id': other.id})
+        leave = self._leave(carol, date(2024, 5, 6), date(2024, 5, 7))
+        self.Calendar.get_days(self.manager, date(2024, 3, 1), date(2024, 5, 31))
+        self.Calendar.get_days(other, date(2024, 5, 1), date(2024, 5, 31))
+        # moved out of the cached months, with a leave of another team
+        (self.inside | leave).write({'request_date_from': date(2024, 6, 3), 'request_date_to': date(2024, 6, 3)})
+        self.assertFalse(self._cached_months())
+        self.assertFalse(self.Calendar.search([('manager_id', '=', other.id)]))
+
+    def _calendar(self, body):
+        return self._post('leave/calendar', body)
+
+    def test_list_overlap(self):
+        resp = self._calendar({'from': '2024-04-01', 'to': '2024-04-30'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual({leave['id'] for leave in resp.json()}, {self.straddling.id, self.inside.id})
+
+    def test_days_endpoint(self):
+        resp = self._calendar({'mode': 'days', 'from': '2024-03-30', 'to': '2024-04-02'})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual([day['date'] for day in data['days']], ['2024-03-30', '2024-03-31', '2024-04-01', '2024-04-02'])
+        self.assertEqual(len(data['days'][-1]['off']), 2)
+        self.assertEqual({e['id'] for e in data['employees']}, {self.alice.id, self.bob.id})
+        # one cached calendar per month covered
+        self.assertEqual(self._cached_months(), [date(2024, 3, 1), date(2024, 4, 1)])
+
+        self.assertEqual(self._calendar({'mode': 'days', 'from': '2024-04-01'}).status_code, 400)
+        self.assertEqual(self._calendar({'mode': 'days', 'from': '2023-01-01', 'to': '2024-12-31'}).status_code, 400)
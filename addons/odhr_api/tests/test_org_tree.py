@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrOrgTree(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        Employee = self.env['hr.employee']
+        # ceo -> (cto -> (dev1, dev2 -> intern), cfo)
+        self.user, self.ceo = self._api_user('tree', name='CEO')
+        self.cto = Employee.create({'name': 'CTO', 'parent_id': self.ceo.id})
+        self.cfo = Employee.create({'name': 'CFO', 'parent_id': self.ceo.id})
+        self.dev1 = Employee.create({'name': 'Dev 1', 'parent_id': self.cto.id})
+        self.dev2 = Employee.create({'name': 'Dev 2', 'parent_id': self.cto.id})
+        self.intern = Employee.create({'name': 'Intern', 'parent_id': self.dev2.id})
+
+    def test_subtree(self):
+        Employee = self.env['hr.employee']
+        rows = Employee._odhr_subtree(self.ceo.ids)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row[0]: row[2] for row in rows}, {
+            self.cto.id: 1, self.cfo.id: 1, self.dev1.id: 2, self.dev2.id: 2, self.intern.id: 3,
+        })
+        self.assertEqual([row[2] for row in rows], sorted(row[2] for row in rows))
+        self.assertEqual(len(Employee._odhr_subtree(self.ceo.ids, depth=1)), 2)
+
+        self.assertEqual(Employee._odhr_team(self.ceo), self.cto | self.cfo)
+        self.assertEqual(len(Employee._odhr_team(self.ceo, indirect=True)), 5)
+
+        # archiving cuts the branch below
+        self.dev2.active = False
+        self.assertEqual(len(Employee._odhr_subtree(self.ceo.ids)), 3)
+
+    def test_managers(self):
+        direct, managers = self.env['hr.employee']._odhr_managers(self.intern)
+        self.assertEqual(direct, {self.dev2.id})
+        self.assertEqual(managers, {self.dev2.id, self.cto.id, self.ceo.id})
+
+    def test_indirect_kpi_snapshot(self):
+        Kpi = self.env['odhr.api.team.kpi']
+        self.assertEqual(Kpi.get_snapshot(self.ceo).headcount, 2)
+        self.assertEqual(Kpi.get_snapshot(self.ceo, indirect=True).headcount, 5)
+        self.env['hr.employee'].create({'name': 'Intern 2', 'parent_id': self.dev1.id})
+        self.assertEqual(Kpi.get_snapshot(self.ceo).headcount, 2)
+        self.assertEqual(Kpi.get_snapshot(self.ceo, indirect=True).headcount, 6)
+
+    def test_tree_endpoint(self):
+        resp = self._post('employees/tree', {'fields': ['name']})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data['manager']['id'], self.ceo.id)
+        items = {item['id']: item for item in data['items']}
+        self.assertEqual(set(items), {self.cto.id, self.cfo.id, self.dev1.id, self.dev2.id, self.intern.id})
+        self.assertEqual(items[self.intern.id]['manager_id'], self.dev2.id)
+        self.assertEqual(items[self.intern.id]['depth'], 3)
+        self.assertEqual(set(items[self.intern.id]), {'id', 'manager_id', 'name', 'depth'})
+
+        resp = self._post('employees/tree', {'manager_id': self.cto.id, 'depth': 1})
+        self.assertEqual({item['id'] for item in resp.json()['items']}, {self.dev1.id, self.dev2.id})
+        self.assertEqual(self._post('employees/tree', {'depth': 0}).status_code, 400)
+
+    def test_team_include_indirect(self):
+        direct = self._post('employees/team', {}).json()['members']
+        self.assertEqual(len(direct), 2)
+        everyone = self._post('employees/team', {'include_indirect': True}).json()['members']
+        self.assertEqual(len(everyone), 5)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.odhr_api.tools import pagination
+from odoo.addons.odhr_api.tools.pagination import count_records, decode_cursor, encode_cursor, fetch_page, keyset_page, parse_order
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrKeysetPagination(TransactionCase):
+    def _walk(self, model, domain, order, limit):
+        seen, cursor = [], None
+        while True:
+            records, cursor = keyset_page(model, domain, order, limit, cursor)
+            seen += records.ids
+            if not cursor:
+                return seen
+
+    def test_ties_on_sort_key(self):
+        Employee = self.env['hr.employee']
+        names = ['Keyset B', 'Keyset A', 'Keyset B', 'Keyset C', 'Keyset B', 'Keyset A', 'Keyset B']
+        Employee.create([{'name': name} for name in names])
+        domain = [('name', 'like', 'Keyset ')]
+        expected = Employee.search(domain, order='name, id').ids
+        self.assertEqual(self._walk(Employee, domain, 'name', 3), expected)
+
+    def test_descending_datetime(self):
+        employee = self.env['hr.employee'].create({'name': 'Keyset Attendee'})
+        start = datetime(2024, 1, 1, 8, 0)
+        self.env['hr.attendance'].create([{
+            'employee_id': employee.id,
+            'check_in': start + timedelta(days=i),
+            'check_out': start + timedelta(days=i, hours=8),
+        } for i in range(12)])
+        Attendance = self.env['hr.attendance']
+        domain = [('employee_id', '=', employee.id)]
+        expected = Attendance.search(domain, order='check_in desc, id desc').ids
+        self.assertEqual(self._walk(Attendance, domain, 'check_in desc, id desc', 5), expected)
+
+    def test_cursor_codec(self):
+        self.assertEqual(parse_order('check_in desc'), [('check_in', 'desc'), ('id', 'desc')])
+        self.assertEqual(decode_cursor(encode_cursor(['2024-01-01 08:00:00', 42])), ['2024-01-01 08:00:00', 42])
+        with self.assertRaises(ValueError):
+            decode_cursor('not a cursor')
+        with self.assertRaises(ValueError):
+            keyset_page(self.env['hr.employee'], [], 'name', 5, encode_cursor([1]))
+
+    def test_count_modes(self):
+        Employee = self.env['hr.employee']
+        Employee.create([{'name': f'Counted {i}'} for i in range(7)])
+        domain = [('name', 'like', 'Counted ')]
+        self.assertEqual(count_records(Employee, domain, 'estimate'), (7, True))
+        self.patch(pagination, 'ESTIMATE_THRESHOLD', 3)
+        total, exact = count_records(Employee, domain, 'estimate')
+        self.assertFalse(exact)
+        self.assertGreater(total, 3)
+
+        records, meta = fetch_page(Employee, domain, 'name', {'limit': 5, 'count': 'none'})
+        self.assertEqual(len(records), 5)
+        self.assertEqual(meta, {'limit': 5, 'offset': 0, 'has_more': True})
+        records, meta = fetch_page(Employee, domain, 'name', {'limit': 5, 'offset': 5})
+        self.assertEqual((len(records), meta['total'], meta['has_more']), (2, 7, False))
+        with self.assertRaises(ValueError):
+            fetch_page(Employee, domain, 'name', {'count': 'approximately'})
+        for params in ({'limit': -1}, {'limit': '0'}, {'offset': -5}, {'limit': -1, 'cursor': ''}):
+            with self.assertRaises(ValueError):
+                fetch_page(Employee, domain, 'name', params)
+        self.patch(pagination, 'MAX_LIMIT', 4)
+        records, meta = fetch_page(Employee, domain, 'name', {'limit': 1000000, 'cursor': ''})
+        self.assertEqual((len(records), meta['limit']), (4, 4))
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import base64
+
+from odoo.tests.common import HttpCase, tagged
+
+from ..tools import metrics
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrPayslipPdf(HttpCase):
+    def setUp(self):
+        super().setUp()
+        if 'hr.payslip' not in self.env or not self.env['odhr.api.payslip.pdf']._report():
+            self.skipTest('hr_payroll is not installed')
+        self.employee = self.env['hr.employee'].create({'name': 'Pdf Employee'})
+        self.env['hr.contract'].create({
+            'name': 'Pdf Contract',
+            'employee_id': self.employee.id,
+            'wage': 1000,
+            'date_start': '2024-01-01',
+            'state': 'open',
+        })
+        self.slip = self.env['hr.payslip'].create({
+            'name': 'Pdf Slip',
+            'employee_id': self.employee.id,
+            'date_from': '2024-01-01',
+            'date_to': '2024-01-31',
+        })
+
+    def test_cache_hit_and_invalidation(self):
+        Cache = self.env['odhr.api.payslip.pdf']
+        before = metrics.snapshot()
+        first = Cache.get_attachment(self.slip)
+        self.assertTrue(first.raw)
+        self.assertEqual(Cache.get_attachment(self.slip), first)
+        after = metrics.snapshot()
+        self.assertEqual(after.get('payslip_pdf.miss', 0) - before.get('payslip_pdf.miss', 0), 1)
+        self.assertEqual(after.get('payslip_pdf.hit', 0) - before.get('payslip_pdf.hit', 0), 1)
+
+        # any change to the slip makes the stored rendering stale
+        self.env.cr.execute("UPDATE hr_payslip SET write_date = write_date + interval '1 second' WHERE id = %s", [self.slip.id])
+        self.slip.invalidate_recordset(['write_date'])
+        second = Cache.get_attachment(self.slip)
+        self.assertNotEqual(second, first)
+        self.assertFalse(first.exists())
+
+    def test_prerender_done_slips(self):
+        self.env.cr.execute("UPDATE hr_payslip SET state = 'done' WHERE id = %s", [self.slip.id])
+        self.slip.invalidate_recordset(['state'])
+        Cache = self.env['odhr.api.payslip.pdf']
+        Cache.cron_prerender()
+        self.assertTrue(Cache._cached(self.slip))
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrMetrics(HttpCase):
+    def _get(self, login, password):
+        self.authenticate(None, None)
+        credentials = base64.b64encode(f'{login}:{password}'.encode()).decode()
+        return self.url_open(f'/odhr/api/metrics?db={self.env.cr.dbname}',
+                             headers={'Authorization': f'Basic {credentials}'})
+
+    def test_admin_only(self):
+        self.env['res.users'].create({'name': 'Metrics User', 'login': 'odhr_metrics_user', 'password': 'odhr_metrics_pwd'})
+        self.assertEqual(self._get('odhr_metrics_user', 'odhr_metrics_pwd').status_code, 403)
+
+        metrics.incr('test.counter')
+        resp = self._get('admin', 'admin')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('pid', resp.json())
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import uuid
+
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.odhr_api.tools import ratelimit
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrApiRateLimit(TransactionCase):
+    def _exhaust(self, backend, key, capacity=3):
+        # a practically zero refill rate keeps the test deterministic
+        return [backend.consume(key, capacity, 1e-9) for _i in range(capacity + 1)]
+
+    def test_memory_backend(self):
+        backend = ratelimit.MemoryBackend(maxsize=10)
+        self.assertEqual(self._exhaust(backend, 'k'), [True, True, True, False])
+        self.assertTrue(backend.consume('other', 3, 1e-9))
+
+    def test_memory_backend_bounded(self):
+        backend = ratelimit.MemoryBackend(maxsize=10)
+        for i in range(100):
+            backend.consume(f'k{i}', 3, 1e-9)
+        self.assertLessEqual(len(backend._buckets), 10)
+
+    def test_shared_memory_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'buckets')
+            backend = ratelimit.SharedMemoryBackend(path, slots=64)
+            self.assertEqual(self._exhaust(backend, 'k'), [True, True, True, False])
+            # a second mapping of the same file sees the same buckets
+            other = ratelimit.SharedMemoryBackend(path, slots=64)
+            self.assertFalse(other.consume('k', 3, 1e-9))
+
+    def test_postgres_backend(self):
+        backend = ratelimit.PostgresBackend(self.registry)
+        # the backend commits through its own cursor: use a fresh key and
+        # drop its row afterwards
+        key = f'odhr-test-{uuid.uuid4().hex}'
+        self.addCleanup(self._drop_bucket, key)
+        self.assertEqual(self._exhaust(backend, key), [True, True, True, False])
+
+    def _drop_bucket(self, key):
+        with self.registry.cursor() as cr:
+            cr.execute("DELETE FROM odhr_api_rate_bucket WHERE key = %s", [key])
+
+    def test_rules(self):
+        self.env['ir.config_parameter'].sudo().set_param('odhr_api.rate_limits', (
+            '{"default": "10/60", "routes": {"/odhr/api/ping": "2/60"}, "users": {"*": "5/1"}}'
+        ))
+        conf = ratelimit.rules(self.env)
+        self.assertEqual(conf['default'], (10, 60.0))
+        self.assertEqual(conf['routes']['/odhr/api/ping'], (2, 60.0))
+        self.assertEqual(conf['users']['*'], (5, 1.0))
+        self.assertEqual(ratelimit.parse_rule('7'), (7, 60.0))
+        with self.assertRaises(ValueError):
+            ratelimit.parse_rule('0/10')
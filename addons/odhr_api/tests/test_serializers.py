@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.odhr_api.controllers import api
+from odoo.addons.odhr_api.tools.serializers import Serializer
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrSerializers(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.departments = cls.env['hr.department'].create([{'name': f'Serializer Dept {i}'} for i in range(3)])
+        cls.manager = cls.env['hr.employee'].create({'name': 'Serializer Manager'})
+        cls.employees = cls.env['hr.employee'].create([{
+            'name': f'Serializer Employee {i:02d}',
+            'department_id': cls.departments[i % 3].id,
+            'parent_id': cls.manager.id,
+        } for i in range(12)])
+        start = datetime(2024, 3, 1, 8, 0)
+        cls.attendances = cls.env['hr.attendance'].create([{
+            'employee_id': emp.id,
+            'check_in': start + timedelta(days=i),
+            'check_out': start + timedelta(days=i, hours=8),
+        } for i, emp in enumerate(cls.employees)])
+
+    def _queries(self, serializer, records, keys=None):
+        self.env.invalidate_all()
+        records = records.browse(records.ids)
+        before = self.env.cr.sql_log_count
+        serializer.serialize(records, keys)
+        return self.env.cr.sql_log_count - before
+
+    def assertConstantQueries(self, serializer, records, keys=None):
+        """Serializing 2 or all records must cost the same number of queries."""
+        small = self._queries(serializer, records[:2], keys)
+        self.assertEqual(self._queries(serializer, records, keys), small)
+        self.assertLessEqual(small, 6)
+
+    def test_query_counts(self):
+        employees = self.employees.sudo()
+        self.assertConstantQueries(api.EMPLOYEE, employees)
+        self.assertConstantQueries(api.EMPLOYEE, employees, ['id', 'name', 'image_url'])
+        self.assertConstantQueries(api.ATTENDANCE, self.attendances.sudo())
+        self.assertConstantQueries(api.DEPARTMENT, self.departments.sudo())
+
+    def test_hr_api_query_counts(self):
+        hr_api = self._hr_api()
+        self.assertConstantQueries(hr_api.EMPLOYEE, self.employees.sudo(), hr_api.EMPLOYEE_LIST_FIELDS)
+        self.assertConstantQueries(hr_api.ATTENDANCE, self.attendances.sudo())
+        self.assertConstantQueries(hr_api.DEPARTMENT, self.departments.sudo())
+
+    def _hr_api(self):
+        try:
+            from odoo.addons.odhr_hr.controllers import hr_api
+        except ImportError:
+            self.skipTest('odhr_hr is not installed')
+        return hr_api
+
+    def test_encoding(self):
+        emp = self.employees[0]
+        serializer = Serializer({
+            'id': 'id',
+            'department_id': 'department_id',
+            'department_name': 'department_id.name',
+            'coach_id': 'coach_id',
+            'missing': 'not_a_field',
+            'first_set': ('not_a_field', 'name'),
+        })
+        self.assertEqual(serializer.serialize_one(emp), {
+            'id': emp.id,
+            'department_id': {'id': emp.department_id.id, 'name': emp.department_id.display_name},
+            'department_name': emp.department_id.name,
+            'coach_id': None,
+            'missing': None,
+            'first_set': emp.name,
+        })
+        att = api.ATTENDANCE.serialize_one(self.attendances[0])
+        self.assertEqual(att['check_in'], '2024-03-01T08:00:00Z')
+
+    def test_select(self):
+        self.assertEqual(api.EMPLOYEE.select('id, name'), ['id', 'name'])
+        self.assertEqual(api.EMPLOYEE.select(None), api.EMPLOYEE.keys())
+        with self.assertRaises(ValueError):
+            api.EMPLOYEE.select(['name', 'image_1920'])
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import os
+
+from odoo import http
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrApiStateless(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.env['ir.config_parameter'].sudo().set_param('odhr_api.stateless', 'True')
+        # binds the database to the opener once, before counting
+        self.user, _employee = self._api_user('stateless')
+
+    def _session_files(self):
+        path = http.root.session_store.path
+        return {os.path.join(root, name) for root, _dirs, files in os.walk(path) for name in files}
+
+    def test_no_session_files_across_calls(self):
+        before = self._session_files()
+        for _i in range(10):
+            resp = self._get('auth/me')
+            self.assertEqual(resp.status_code, 200)
+            resp = self._get('ping')
+            self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self._session_files() - before, set())
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase, tagged
+from odoo.tools import SQL
+
+from odoo.addons.odhr_api.tools import sync
+from odoo.addons.odhr_api.tools.pagination import encode_cursor
+from odoo.addons.odhr_api.tools.sync import CursorExpired, sync_changes
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrSync(TransactionCase):
+    """The test runs in one transaction, whose now() does not move: dates
+    are shifted around it instead of waiting for changes to settle."""
+
+    def setUp(self):
+        super().setUp()
+        self.patch(sync, 'SYNC_SETTLE', 0)
+        self.Department = self.env['hr.department']
+        self.domain = [('name', 'like', 'Sync Dept ')]
+
+    def _shift(self, table, ids, column, minutes):
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            "UPDATE %s SET %s = (now() AT TIME ZONE 'UTC') + make_interval(mins => %s) WHERE id = ANY(%s)",
+            SQL.identifier(table), SQL.identifier(column), minutes, list(ids),
+        ))
+        self.env.invalidate_all()
+
+    def _tombstones(self):
+        return self.env['odhr.api.tombstone'].search([]).ids
+
+    def _sync_all(self, cursor, limit=2):
+        items, deleted = [], []
+        while True:
+            records, gone, cursor, has_more = sync_changes(self.Department, self.domain, cursor, limit)
+            items += records.ids
+            deleted += gone
+            if not has_more:
+                return items, deleted, cursor
+
+    def test_delta(self):
+        depts = self.Department.create([{'name': f'Sync Dept {i}'} for i in range(5)])
+        depts[0].active = False
+        self._shift('hr_department', depts.ids, 'write_date', -60)
+        items, deleted, cursor = self._sync_all(None)
+        self.assertEqual(sorted(items), sorted(depts[1:].ids))
+        self.assertEqual(deleted, [])
+
+        depts[1].name = 'Sync Dept renamed'
+        depts[2].active = False
+        gone_id = depts[3].id
+        depts[3].unlink()
+        self._shift('hr_department', depts[1:3].ids, 'write_date', 30)
+        self._shift('odhr_api_tombstone', self._tombstones(), 'date', 30)
+        # changes younger than SYNC_SETTLE wait for the next sync
+        self.assertEqual(self._sync_all(cursor)[:2], ([], []))
+
+        self.patch(sync, 'SYNC_SETTLE', -3600)
+        items, deleted, cursor = self._sync_all(cursor)
+        self.assertEqual(items, [depts[1].id])
+        self.assertEqual(sorted(deleted), sorted([depts[2].id, gone_id]))
+        # nothing changed since
+        self.assertEqual(self._sync_all(cursor)[:2], ([], []))
+
+    def test_scoped_tombstones(self):
+        emp, other = self.env['hr.employee'].create([{'name': 'Sync Emp'}, {'name': 'Sync Other'}])
+        Attendance = self.env['hr.attendance']
+        domain = [('employee_id', '=', emp.id)]
+        mine = Attendance.create({'employee_id': emp.id, 'check_in': '2024-03-04 08:00:00'})
+        theirs = Attendance.create({'employee_id': other.id, 'check_in': '2024-03-04 08:00:00'})
+        self._shift('hr_attendance', (mine | theirs).ids, 'write_date', -60)
+        _records, _deleted, cursor, _more = sync_changes(Attendance, domain, None, 10, emp.id)
+        mine_id = mine.id
+        (mine | theirs).unlink()
+        self._shift('odhr_api_tombstone', self._tombstones(), 'date', 30)
+        self.patch(sync, 'SYNC_SETTLE', -3600)
+        _records, deleted, _cursor, _more = sync_changes(Attendance, domain, cursor, 10, emp.id)
+        self.assertEqual(deleted, [mine_id])
+
+    def test_cursors(self):
+        with self.assertRaises(ValueError):
+            sync_changes(self.Department, [], 'garbage', 10)
+        with self.assertRaises(ValueError):
+            sync_changes(self.Department, [], encode_cursor(['not a date', 0, '2024-01-01 00:00:00', 0, 0]), 10)
+        with self.assertRaises(CursorExpired):
+            sync_changes(self.Department, [], encode_cursor(['2000-01-01 00:00:00', 0, '2000-01-01 00:00:00', 0, 0]), 10)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from datetime import date, timedelta
+
+from odoo import fields
+from odoo.tests.common import tagged
+
+from .common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrTeamKpi(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.manager = self._api_user('kpi', groups=['hr.group_hr_user'], name='Manager', tz='UTC')
+        Employee = self.env['hr.employee']
+        self.alice = Employee.create({'name': 'Alice', 'parent_id': self.manager.id, 'tz': 'UTC'})
+        self.bob = Employee.create({'name': 'Bob', 'parent_id': self.manager.id, 'tz': 'UTC'})
+        self.Kpi = self.env['odhr.api.team.kpi']
+
+    def _queued(self):
+        self.env.cr.execute("SELECT COUNT(*) FROM odhr_api_team_kpi_queue WHERE manager_id = %s", [self.manager.id])
+        return self.env.cr.fetchone()[0]
+
+    def test_snapshot_follows_changes(self):
+        snapshot = self.Kpi.get_snapshot(self.manager)
+        self.assertEqual((snapshot.headcount, snapshot.present_today, snapshot.pending_approvals), (2, 0, 0))
+        self.assertEqual(self._queued(), 0)
+        # unchanged: read as is
+        self.assertEqual(self.Kpi.get_snapshot(self.manager).computed_at, snapshot.computed_at)
+
+        self.env['hr.attendance'].create({'employee_id': self.alice.id, 'check_in': fields.Datetime.now()})
+        self.assertTrue(self._queued())
+        self.assertEqual(self.Kpi.get_snapshot(self.manager).present_today, 1)
+
+        leave_type = self.env['hr.leave.type'].create({'name': 'KPI Leave', 'requires_allocation': 'no'})
+        start = date.today() + timedelta(days=30)
+        while start.weekday() >= 5:
+            start += timedelta(days=1)
+        self.env['hr.leave'].create({
+            'employee_id': self.bob.id,
+            'holiday_status_id': leave_type.id,
+            'request_date_from': start,
+            'request_date_to': start,
+        })
+        self.assertEqual(self.Kpi.get_snapshot(self.manager).pending_approvals, 1)
+
+        self.bob.parent_id = False
+        self.assertEqual(self.Kpi.get_snapshot(self.manager).headcount, 1)
+
+    def test_cron_refresh(self):
+        self.Kpi.get_snapshot(self.manager)
+        self.env['hr.employee'].create({'name': 'Carol', 'parent_id': self.manager.id})
+        self.Kpi.cron_refresh()
+        self.assertEqual(self._queued(), 0)
+        snapshot = self.Kpi.search([('manager_id', '=', self.manager.id)])
+        self.assertEqual(snapshot.headcount, 3)
+
+    def _overview(self, body):
+        return self._post('manager/team_overview', body)
+
+    def test_endpoint(self):
+        resp = self._overview({})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data['manager_id'], self.manager.id)
+        self.assertEqual(data['headcount'], 2)
+        self.assertIn('computed_at', data)
+
+        resp = self._overview({'drilldown': 'headcount'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual({item['name'] for item in resp.json()['items']}, {'Alice', 'Bob'})
+        self.assertEqual(self._overview({'drilldown': 'salary'}).status_code, 400)
+
+        self.user.groups_id = [(3, self.env.ref('hr.group_hr_user').id)]
+        self.assertEqual(self._overview({}).status_code, 403)
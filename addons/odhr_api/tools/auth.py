@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""Request authentication shared by the ODHR API controllers.
+
+A Basic-auth password or API key costs a full hash check.  Verified
+credentials are remembered per worker, and clients can exchange them for a
+signed bearer token, so follow-up requests only pay an HMAC comparison and a
+cheap fingerprint query.  The fingerprint covers the login, the password hash
+and the user's API keys: changing the password or revoking a key invalidates
+both the cached credentials and every token issued before the change.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+from odoo.http import request
+from odoo.tools import str2bool
+
+from .cache import TTLCache
+
+TOKEN_DEFAULT_TTL = 3600
+TOKEN_MAX_TTL = 86400
+
+_credential_cache = TTLCache(maxsize=1024, ttl=300)
+# Random per-process key: the cache never holds anything replayable as a password.
+_CACHE_SALT = os.urandom(32)
+
+
+def parse_basic_auth(auth_header):
+    try:
+        if not auth_header or not auth_header.lower().startswith('basic '):
+            return None, None
+        token = auth_header.split(' ', 1)[1].strip()
+        raw = base64.b64decode(token).decode('utf-8')
+        login, password = raw.split(':', 1)
+        return login, password
+    except Exception:
+        return None, None
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def user_fingerprint(cr, uid):
+    """Return a digest that changes whenever the credentials of ``uid`` do.
+
+    Returns None for unknown or archived users.
+    """
+    cr.execute("""
+        SELECT u.login, u.password,
+               ARRAY(SELECT k.id FROM res_users_apikeys k WHERE k.user_id = u.id ORDER BY k.id)
+          FROM res_users u
+         WHERE u.id = %s AND u.active
+    """, [uid])
+    row = cr.fetchone()
+    if not row:
+        return None
+    return hashlib.sha256(repr(row).encode('utf-8')).hexdigest()[:32]
+
+
+def session_authenticate(db, login, password):
+    """Full credential check through the session, returns the uid or False."""
+    try:
+        return request.session.authenticate(db, login, password)
+    except TypeError:
+        # Odoo 18 takes a credential dict and returns the auth info
+        credential = {'login': login, 'password': password, 'type': 'password'}
+        auth_info = request.session.authenticate(db, credential)
+        if isinstance(auth_info, dict):
+            return auth_info.get('uid')
+        return auth_info
+
+
+def verify_credentials(db, login, password):
+    """Return the uid matching the Basic credentials, using the worker cache."""
+    cr = request.env.cr if request.env is not None and request.db == db else None
+    if cr is None:
+        return session_authenticate(db, login, password)
+    key = hmac.new(_CACHE_SALT, '\x00'.join((db, login, password)).encode('utf-8'), hashlib.sha256).digest()
+    cached = _credential_cache.get(key)
+    if cached:
+        uid, fingerprint = cached
+        if user_fingerprint(cr, uid) == fingerprint:
+            return uid
+        _credential_cache.pop(key)
+    uid = session_authenticate(db, login, password)
+    if uid:
+        _credential_cache.set(key, (uid, user_fingerprint(cr, uid)))
+    return uid
+
+
+def _token_secret(env):
+    return env['ir.config_parameter'].sudo().get_param('database.secret').encode('utf-8')
+
+
+def token_ttl(env):
+    try:
+        ttl = int(env['ir.config_parameter'].sudo().get_param('odhr_api.token_ttl', TOKEN_DEFAULT_TTL))
+    except ValueError:
+        ttl = TOKEN_DEFAULT_TTL
+    return max(60, min(ttl, TOKEN_MAX_TTL))
+
+
+def issue_token(env, uid):
+    """Return ``(token, expires_at)`` for ``uid``, signed with the database secret."""
+    claims = {
+        'db': env.cr.dbname,
+        'uid': uid,
+        'exp': int(time.time()) + token_ttl(env),
+        'fp': user_fingerprint(env.cr, uid),
+    }
+    body = _b64encode(json.dumps(claims, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+    signature = _b64encode(hmac.new(_token_secret(env), body.encode('ascii'), hashlib.sha256).digest())
+    return f'{body}.{signature}', claims['exp']
+
+
+def verify_token(env, token):
+    """Return the uid carried by a valid, unexpired token, else None."""
+    try:
+        body, signature = token.split('.')
+        expected = _b64encode(hmac.new(_token_secret(env), body.encode('ascii'), hashlib.sha256).digest())
+        if not hmac.compare_digest(expected, signature):
+            return None
+        claims = json.loads(_b64decode(body))
+    except Exception:
+        return None
+    if claims.get('db') != env.cr.dbname or claims.get('exp', 0) < time.time():
+        return None
+    uid = claims.get('uid')
+    if not uid or user_fingerprint(env.cr, uid) != claims.get('fp'):
+        return None
+    return uid
+
+
+def stateless_enabled(env):
+    return str2bool(env['ir.config_parameter'].sudo().get_param('odhr_api.stateless', 'False'))
+
+
+def make_stateless():
+    """Keep the current request from persisting or rotating its session.
+
+    Odoo saves the session at the end of the request whenever it is dirty or
+    due for rotation, which ``session.authenticate`` always triggers; with
+    thousands of Basic-auth clients that is one new session file per call.
+    """
+    try:
+        request.session.can_save = False
+    except AttributeError:
+        pass
+
+
+def authenticate(db):
+    """Authenticate the current request from its Authorization header.
+
+    Accepts ``Bearer <token>`` and ``Basic <login:password>``.  Returns a
+    ``(uid, reason)`` tuple where ``uid`` is falsy on failure and ``reason`` is
+    a short code; on success the request environment is switched to ``uid``.
+    In stateless mode (``odhr_api.stateless`` system parameter) the session
+    is never written, the environment alone carries the user.
+    """
+    if request.env is not None and stateless_enabled(request.env):
+        make_stateless()
+    header = request.httprequest.headers.get('Authorization') or ''
+    scheme = header.split(' ', 1)[0].lower()
+    if scheme == 'bearer':
+        uid = None
+        if request.env is not None and request.db == db:
+            uid = verify_token(request.env, header.split(' ', 1)[1].strip() if ' ' in header else '')
+        reason = 'token' if uid else 'bad_token'
+    elif scheme == 'basic':
+        login, password = parse_basic_auth(header)
+        if not login or not password:
+            return None, 'malformed_authorization'
+        try:
+            uid = verify_credentials(db, login, password)
+        except Exception:
+            uid = None
+        reason = 'ok' if uid else 'bad_credentials'
+    else:
+        return None, 'missing_authorization'
+    if uid:
+        request.update_env(user=uid)
+    return uid, reason
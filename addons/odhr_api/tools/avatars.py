@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Content-addressed employee avatar URLs.
+
+Odoo already keeps every picture variant (``image_128`` to ``image_1024``) as
+its own attachment, which acts as the thumbnail cache.  Avatar URLs carry a
+prefix of that attachment's checksum: a new picture yields a new URL, so
+clients may keep a fetched avatar forever.
+"""
+from .serializers import Batched
+
+AVATAR_SIZES = (128, 256, 512, 1024)
+# hash of employees without a picture (the placeholder image)
+NO_PICTURE = 'default'
+
+
+def avatar_hashes(env, employee_ids, sizes=AVATAR_SIZES):
+    """``{(employee_id, size): hash}`` for the given employees, in one query."""
+    if not employee_ids:
+        return {}
+    env['ir.attachment'].flush_model(['res_model', 'res_field', 'res_id', 'checksum'])
+    env.cr.execute("""
+        SELECT res_id, res_field, checksum
+          FROM ir_attachment
+         WHERE res_model = 'hr.employee'
+           AND res_field = ANY(%s)
+           AND res_id = ANY(%s)
+    """, [[f'image_{size}' for size in sizes], list(employee_ids)])
+    hashes = {(emp_id, size): NO_PICTURE for emp_id in employee_ids for size in sizes}
+    for res_id, res_field, checksum in env.cr.fetchall():
+        if checksum:
+            hashes[res_id, int(res_field[len('image_'):])] = checksum[:16]
+    return hashes
+
+
+def avatar_url(env, employee_id, size, content_hash):
+    return f'/odhr/api/employees/{employee_id}/avatar/{size}?db={env.cr.dbname}&h={content_hash}'
+
+
+def avatar_urls(employees, size=128):
+    """``{employee_id: url}`` for a page of employees (a :class:`Batched` spec)."""
+    hashes = avatar_hashes(employees.env, employees.ids, [size])
+    return {emp_id: avatar_url(employees.env, emp_id, size, hashes[emp_id, size]) for emp_id in employees.ids}
+
+
+AVATAR_URL = Batched(avatar_urls)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Negotiated compression of API responses.
+
+JSON and text bodies above a size threshold are compressed with the best
+encoding the client accepts: brotli when the ``brotli`` package is
+installed, otherwise gzip.  Binary payloads (PDFs, pictures, archives) are
+already compressed and streamed downloads are left alone.
+
+Settings (system parameters):
+
+* ``odhr_api.compression_min_size``: smallest body compressed, in bytes
+  (default 1024, ``0`` compresses everything, a negative value disables
+  compression);
+* ``odhr_api.compression_level``: gzip level 1-9 (default 6);
+* ``odhr_api.brotli_quality``: brotli quality 0-11 (default 4).
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/xml', 'text/')
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4
+
+
+def encodings():
+    """Supported encodings, most preferred first."""
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    # mtime=0: the same body always yields the same bytes
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def settings(env):
+    """``(min_size, gzip_level, brotli_quality)`` configured for ``env``'s database."""
+    get_param = env['ir.config_parameter'].sudo().get_param
+
+    def _int(key, default, low, high):
+        try:
+            value = int(get_param(key, default))
+        except ValueError:
+            return default
+        return min(max(value, low), high)
+
+    return (
+        _int('odhr_api.compression_min_size', DEFAULT_MIN_SIZE, -1, 1 << 30),
+        _int('odhr_api.compression_level', DEFAULT_GZIP_LEVEL, 1, 9),
+        _int('odhr_api.brotli_quality', DEFAULT_BROTLI_QUALITY, 0, 11),
+    )
+
+
+def compress_response(response, accept_encodings, min_size=DEFAULT_MIN_SIZE,
+                      gzip_level=DEFAULT_GZIP_LEVEL, brotli_quality=DEFAULT_BROTLI_QUALITY):
+    """Compress ``response`` in place if the client accepts it and it pays off.
+
+    ``accept_encodings`` is the parsed ``Accept-Encoding`` header
+    (``request.httprequest.accept_encodings``).  Returns the encoding used,
+    or None.
+    """
+    if min_size < 0 or response.status_code != 200:
+        return None
+    if response.direct_passthrough or response.is_streamed:
+        return None
+    if any(header in response.headers for header in ('Content-Encoding', 'Accept-Ranges', 'Content-Range')):
+        # ranges of file downloads are offsets in the identity body
+        return None
+    if not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES):
+        return None
+    # the body may vary by encoding even when it is too small to compress
+    response.vary.add('Accept-Encoding')
+    encoding = accept_encodings.best_match(encodings())
+    if not encoding:
+        return None
+    data = response.get_data()
+    if len(data) < min_size:
+        return None
+    compressed = compress(data, encoding, brotli_quality if encoding == 'br' else gzip_level)
+    if len(compressed) >= len(data):
+        return None
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        # same entity as the identity body, not the same bytes
+        response.headers['ETag'] = f'W/{etag}'
+    return encoding
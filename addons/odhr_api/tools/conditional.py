@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Conditional responses (ETag / If-None-Match) for slowly changing endpoints.
+
+The ETag of a response is derived from cheap version information, such as the
+``write_date`` of the records it shows or the count and latest ``write_date`` of
+a small reference table, never from the serialized body.  When the client
+already holds the current version the endpoint answers ``304 Not Modified``
+before serializing anything::
+
+    tag = etag('leave_types', table_version(env['hr.leave.type']))
+    return not_modified(tag, CACHE_REFERENCE) or cacheable(build_response(), tag, CACHE_REFERENCE)
+"""
+import hashlib
+
+from odoo.http import Response, request
+from odoo.tools import SQL
+
+# Per-user data the app polls: always revalidate, 304 keeps it cheap.
+CACHE_PRIVATE = 'private, no-cache'
+# Reference data: reuse for a few minutes, then revalidate.
+CACHE_REFERENCE = 'private, max-age=300'
+# Content-addressed URLs: the content behind them never changes.
+CACHE_IMMUTABLE = 'private, max-age=31536000, immutable'
+
+
+def etag(*parts):
+    """Strong entity tag built from ``parts`` (any repr-able values)."""
+    return '"%s"' % hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def table_version(model, domain=None, relations=()):
+    """``(count, max id, max write_date)`` of the records matching ``domain``.
+
+    Additions change the maximum id, updates the latest write date and
+    deletions or archiving the count.  The latest ``write_date`` of the
+    records linked through the many2one ``relations`` is appended, from the
+    same query: only the linked records are read, never their whole table.
+    """
+    model = model.sudo()
+    if not relations:
+        [(count, max_id, max_write)] = model._read_group(
+            domain or [], aggregates=['__count', 'id:max', 'write_date:max'],
+        )
+        return count, max_id, max_write
+    model.flush_model(['write_date', *relations])
+    query = model._search(domain or [])
+    columns = [
+        SQL("COUNT(*)"),
+        SQL("MAX(%s)", SQL.identifier(model._table, 'id')),
+        SQL("MAX(%s)", SQL.identifier(model._table, 'write_date')),
+    ]
+    for fname in relations:
+        field = model._fields[fname]
+        model.env[field.comodel_name].flush_model(['write_date'])
+        alias = query.make_alias(model._table, fname)
+        query.add_join('LEFT JOIN', alias, model.env[field.comodel_name]._table, SQL(
+            "%s = %s", SQL.identifier(alias, 'id'), SQL.identifier(model._table, fname),
+        ))
+        columns.append(SQL("MAX(%s)", SQL.identifier(alias, 'write_date')))
+    model.env.cr.execute(query.select(*columns))
+    return model.env.cr.fetchone()
+
+
+def record_version(record, *relations):
+    """``write_date`` of ``record`` and of its many2one ``relations``, in one query."""
+    columns = [SQL.identifier('r', 'write_date')]
+    joins = []
+    for index, fname in enumerate(relations):
+        field = record._fields.get(fname)
+        if not field or field.type != 'many2one' or not field.store:
+            continue
+        alias = f'r{index}'
+        joins.append(SQL(
+            "LEFT JOIN %s AS %s ON %s = %s",
+            SQL.identifier(record.env[field.comodel_name]._table),
+            SQL.identifier(alias),
+            SQL.identifier(alias, 'id'),
+            SQL.identifier('r', fname),
+        ))
+        columns.append(SQL.identifier(alias, 'write_date'))
+    record.env.cr.execute(SQL(
+        "SELECT %s FROM %s AS r %s WHERE r.id = %s",
+        SQL(', ').join(columns),
+        SQL.identifier(record._table),
+        SQL(' ').join(joins),
+        record.id,
+    ))
+    return record.env.cr.fetchone()
+
+
+def _in_batch():
+    return getattr(request, 'odhr_batch_env', None) is not None
+
+
+def not_modified(tag, cache_control=CACHE_PRIVATE):
+    """``304 Not Modified`` response when the client holds ``tag``, else None."""
+    if _in_batch():
+        # the conditional headers belong to the enclosing batch request
+        return None
+    if not request.httprequest.if_none_match.contains_weak(tag.strip('"')):
+        return None
+    return Response(status=304, headers=[('ETag', tag), ('Cache-Control', cache_control)])
+
+
+def cacheable(response, tag, cache_control=CACHE_PRIVATE):
+    """Attach the validators to a successful ``response``."""
+    if response.status_code == 200:
+        response.headers['ETag'] = tag
+        response.headers['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""JSON encoding of API responses.
+
+Uses ``orjson`` when it is installed and the standard library otherwise;
+both produce the same compact output:
+
+* ``datetime`` values are ISO 8601; naive ones are UTC, as Odoo stores
+  them, and get a ``Z`` suffix (``2024-03-04T08:00:00Z``);
+* ``date`` values are ``YYYY-MM-DD``;
+* ``bytes`` (base64 binary field values) are decoded as ASCII;
+* anything else unknown falls back to ``str()``.
+
+Odoo's ``False`` for empty values is left as it is: the serializers
+(:mod:`.serializers`) already map it to ``null`` for non-boolean fields.
+"""
+import datetime
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def format_datetime(value):
+    """``value`` in ISO 8601, naive values taken as UTC: ``2024-03-04T08:00:00Z``."""
+    text = value.isoformat()
+    if value.tzinfo is None:
+        return text + 'Z'
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+def _default(value):
+    if isinstance(value, datetime.datetime):
+        return format_datetime(value)
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode('ascii', 'replace')
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def _dumps_stdlib(value):
+    return json.dumps(value, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+if orjson:
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value):
+        """``value`` as UTF-8 encoded JSON (bytes)."""
+        try:
+            return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # integers beyond 64 bits and other values orjson refuses
+            return _dumps_stdlib(value)
+else:
+    def dumps(value):
+        """``value`` as UTF-8 encoded JSON (bytes)."""
+        return _dumps_stdlib(value)
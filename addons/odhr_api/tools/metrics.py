@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Per-process counters (cache hits, ...), exposed by /odhr/api/metrics.
+
+Counters live in the memory of each worker: a scraper polling the endpoint
+sees the worker that served it, identified by its pid.
+"""
+import threading
+from collections import Counter
+
+_lock = threading.Lock()
+_counters = Counter()
+
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot():
+    with _lock:
+        return dict(_counters)
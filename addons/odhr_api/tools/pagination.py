@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Keyset (cursor) pagination helpers.
+
+Offset pagination makes Postgres walk and discard every row before the
+requested page, so page 500 of a large table costs 500 times page 1.  A
+keyset page instead resumes right after the last row of the previous page,
+using the sort key plus ``id`` as a unique tie-breaker::
+
+    check_in desc, id desc  ->  check_in < v OR (check_in = v AND id < i)
+
+The position travels to the client as an opaque token.
+
+Counting is the other half of the cost of a list page: ``count`` selects
+``exact`` (a full ``COUNT(*)``), ``estimate`` (exact up to a threshold, the
+planner's row estimate above it) or ``none``.
+"""
+import base64
+import datetime
+import json
+
+from odoo import fields
+from odoo.osv import expression
+from odoo.tools import SQL
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+# below this many rows an exact count is cheap enough
+ESTIMATE_THRESHOLD = 1000
+# estimated totals are reported up to this value
+ESTIMATE_CAP = 100000
+# largest page a client may ask for; larger limits are clamped
+MAX_LIMIT = 200
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token):
+    """Return the list of sort values carried by ``token``; raises ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError('invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('invalid cursor')
+    return values
+
+
+def parse_order(order):
+    """``"check_in desc, id desc"`` -> ``[('check_in', 'desc'), ('id', 'desc')]``.
+
+    ``id`` is appended when missing so that the key is unique.
+    """
+    keys = []
+    for part in order.split(','):
+        name, _sep, direction = part.strip().partition(' ')
+        keys.append((name, 'desc' if direction.strip().lower() == 'desc' else 'asc'))
+    if keys[-1][0] != 'id':
+        keys.append(('id', keys[-1][1]))
+    return keys
+
+
+def _cursor_value(value):
+    if isinstance(value, datetime.datetime):
+        return fields.Datetime.to_string(value)
+    if isinstance(value, datetime.date):
+        return fields.Date.to_string(value)
+    if hasattr(value, '_name'):  # many2one
+        return value.id
+    return value
+
+
+def after_domain(keys, values):
+    """Domain matching the rows that sort strictly after ``values``."""
+    if len(values) != len(keys):
+        raise ValueError('invalid cursor')
+    branches = []
+    for index, (name, direction) in enumerate(keys):
+        branch = [(prev, '=', values[i]) for i, (prev, _dir) in enumerate(keys[:index])]
+        branch.append((name, '<' if direction == 'desc' else '>', values[index]))
+        branches.append(expression.AND([[leaf] for leaf in branch]))
+    return expression.OR(branches)
+
+
+def keyset_page(model, domain, order, limit, cursor=None):
+    """Return ``(records, next_cursor)`` for the page following ``cursor``.
+
+    ``next_cursor`` is None on the last page.  One extra row is fetched to
+    know whether more rows follow, so no count query is needed.
+    """
+    keys = parse_order(order)
+    order = ', '.join(f'{name} {direction}' for name, direction in keys)
+    if cursor:
+        domain = expression.AND([domain, after_domain(keys, decode_cursor(cursor))])
+    records = model.search(domain, order=order, limit=limit + 1)
+    if len(records) <= limit:
+        return records, None
+    records = records[:limit]
+    last = records[-1]
+    return records, encode_cursor([_cursor_value(last[name]) for name, _dir in keys])
+
+
+def planner_estimate(model, domain):
+    """Row count estimated by Postgres for ``domain``, without running the query."""
+    cr = model.env.cr
+    if not domain and 'active' not in model._fields:
+        cr.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._table])
+        row = cr.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", model._search(domain).select()))
+    plan = cr.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_records(model, domain, mode='exact'):
+    """Return ``(total, exact)`` for ``domain`` according to ``mode``.
+
+    ``estimate`` counts exactly while the result stays under
+    ESTIMATE_THRESHOLD rows (the count stops early), and otherwise trusts
+    the planner, capped at ESTIMATE_CAP.
+    """
+    if mode == 'estimate':
+        total = model.search_count(domain, limit=ESTIMATE_THRESHOLD + 1)
+        if total <= ESTIMATE_THRESHOLD:
+            return total, True
+        estimate = max(planner_estimate(model, domain), ESTIMATE_THRESHOLD + 1)
+        return min(estimate, ESTIMATE_CAP), False
+    return model.search_count(domain), True
+
+
+def fetch_page(model, domain, order, params, default_limit=50, default_count='exact'):
+    """Run the page query described by request ``params``.
+
+    ``limit``/``offset`` select an offset page; a ``cursor`` key (empty for
+    the first page) selects keyset paging.  ``count`` is one of COUNT_MODES;
+    it defaults to ``default_count`` for offset pages and to ``none`` for
+    keyset pages unless ``with_total`` is set.  Every page reports
+    ``has_more``, computed from one extra fetched row.
+
+    ``limit`` is clamped to MAX_LIMIT.
+
+    Returns ``(records, meta)``; raises ValueError for invalid parameters.
+    """
+    limit = int(params.get('limit') or default_limit)
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    limit = min(limit, MAX_LIMIT)
+    keyset = 'cursor' in params
+    mode = params.get('count') or ('exact' if params.get('with_total') else ('none' if keyset else default_count))
+    if mode not in COUNT_MODES:
+        raise ValueError('invalid count mode')
+    if keyset:
+        records, next_cursor = keyset_page(model, domain, order, limit, params.get('cursor'))
+        meta = {'limit': limit, 'next_cursor': next_cursor, 'has_more': bool(next_cursor)}
+    else:
+        offset = int(params.get('offset') or 0)
+        if offset < 0:
+            raise ValueError('offset must not be negative')
+        records = model.search(domain, order=order, limit=limit + 1, offset=offset)
+        meta = {'limit': limit, 'offset': offset, 'has_more': len(records) > limit}
+        records = records[:limit]
+    if mode != 'none':
+        meta['total'], exact = count_records(model, domain, mode)
+        if not exact:
+            meta['total_estimated'] = True
+    return records, meta
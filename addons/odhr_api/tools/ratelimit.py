@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""Token-bucket rate limiting for the ODHR API.
+
+Limits are read from the ``odhr_api.rate_limits`` system parameter, a JSON
+object such as::
+
+    {"default": "120/60",
+     "routes": {"/odhr/api/employees/create": "20/60"},
+     "users": {"integration_bot": "1000/60", "*": "600/60"}}
+
+Each rule is ``<capacity>/<seconds>``: a bucket holds ``capacity`` tokens and
+refills at ``capacity / seconds`` tokens per second.  Route rules apply per
+client IP before authentication; user rules (keyed by login, ``*`` for
+everyone) apply per user once authenticated.
+
+The ``odhr_api.rate_limit_backend`` system parameter picks where buckets live:
+
+- ``memory`` (default): an LRU/TTL map in each worker process;
+- ``shm``: a fixed-size table in a memory-mapped file shared by every prefork
+  worker on the host;
+- ``postgres``: an ``UNLOGGED`` table shared by every Odoo server using the
+  database.
+"""
+import fcntl
+import functools
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from .cache import TTLCache
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_RULE = '120/60'
+
+
+def parse_rule(spec):
+    """Return ``(capacity, window_seconds)`` for a ``"<capacity>/<seconds>"`` spec."""
+    capacity, _sep, window = str(spec).partition('/')
+    capacity, window = int(capacity), float(window or 60)
+    if capacity <= 0 or window <= 0:
+        raise ValueError(spec)
+    return capacity, window
+
+
+@functools.lru_cache(maxsize=16)
+def _load_rules(raw):
+    try:
+        conf = json.loads(raw or '{}')
+        return {
+            'default': parse_rule(conf.get('default') or DEFAULT_RULE),
+            'routes': {route: parse_rule(spec) for route, spec in (conf.get('routes') or {}).items()},
+            'users': {login: parse_rule(spec) for login, spec in (conf.get('users') or {}).items()},
+        }
+    except (ValueError, TypeError, AttributeError):
+        _logger.warning('Invalid odhr_api.rate_limits parameter, using defaults')
+        return {'default': parse_rule(DEFAULT_RULE), 'routes': {}, 'users': {}}
+
+
+def rules(env):
+    return _load_rules(env['ir.config_parameter'].sudo().get_param('odhr_api.rate_limits', ''))
+
+
+class MemoryBackend:
+    """Per-process buckets; each worker enforces the limit on its own."""
+
+    def __init__(self, maxsize=10000):
+        self._buckets = TTLCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # once full again the bucket equals a fresh one and can be dropped
+            self._buckets.set(key, (tokens, now), ttl=(capacity - tokens) / rate)
+        return allowed
+
+
+class SharedMemoryBackend:
+    """Buckets in a memory-mapped file shared by all workers on the host.
+
+    The file is an open-addressing table of ``slots`` fixed-size records
+    ``(key hash, tokens, updated)``.  A key probes ``probes`` consecutive
+    slots; when none is free or idle the least recently updated one is
+    evicted, so memory stays bounded whatever the number of clients.
+    """
+
+    _record = struct.Struct('<Qdd')
+
+    def __init__(self, path, slots=8192, probes=8, idle=3600):
+        self.slots = slots
+        self.probes = probes
+        self.idle = idle
+        size = slots * self._record.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        digest = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+        now = time.time()
+        record = self._record
+        start = digest % self.slots
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                target = free = oldest = None
+                oldest_stamp = float('inf')
+                for i in range(self.probes):
+                    slot = (start + i) % self.slots
+                    slot_key, tokens, stamp = record.unpack_from(self._map, slot * record.size)
+                    if slot_key == digest:
+                        target = slot
+                        break
+                    if not slot_key or now - stamp > self.idle:
+                        if free is None:
+                            free = slot
+                    elif stamp <= oldest_stamp:
+                        oldest, oldest_stamp = slot, stamp
+                if target is not None:
+                    tokens = min(capacity, tokens + (now - stamp) * rate)
+                else:
+                    target = free if free is not None else oldest
+                    tokens = capacity
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                record.pack_into(self._map, target * record.size, digest, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        return allowed
+
+
+class PostgresBackend:
+    """Buckets in the ``odhr_api_rate_bucket`` UNLOGGED table.
+
+    Each check runs in its own short transaction so that bucket rows are
+    never locked for the duration of the API request itself.
+    """
+
+    _refill = "LEAST(%(capacity)s, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * %(rate)s)"
+    _query = """
+        INSERT INTO odhr_api_rate_bucket AS b (key, tokens, allowed, updated_at)
+             VALUES (%(key)s, %(capacity)s - 1, TRUE, clock_timestamp())
+        ON CONFLICT (key) DO UPDATE
+                SET tokens = {refill} - CASE WHEN {refill} >= 1 THEN 1 ELSE 0 END,
+                    allowed = {refill} >= 1,
+                    updated_at = clock_timestamp()
+          RETURNING allowed
+    """.format(refill=_refill)
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def consume(self, key, capacity, rate):
+        with self.registry.cursor() as cr:
+            cr.execute(self._query, {'key': key, 'capacity': capacity, 'rate': rate})
+            return cr.fetchone()[0]
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(env):
+    kind = env['ir.config_parameter'].sudo().get_param('odhr_api.rate_limit_backend', 'memory')
+    key = (kind, env.cr.dbname)
+    backend = _backends.get(key)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(key)
+            if backend is None:
+                if kind == 'postgres':
+                    backend = PostgresBackend(env.registry)
+                elif kind == 'shm':
+                    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+                    backend = SharedMemoryBackend(os.path.join(directory, f'odhr_api_ratelimit_{env.cr.dbname}'))
+                else:
+                    backend = MemoryBackend()
+                _backends[key] = backend
+    return backend
+
+
+def consume(env, key, rule):
+    """Take one token from bucket ``key``; returns False when it is empty."""
+    capacity, window = rule
+    try:
+        return get_backend(env).consume(key, capacity, capacity / window)
+    except Exception:
+        # a broken limiter must not take the API down with it
+        _logger.exception('Rate limiter failure for %s', key)
+        return True
+
+
+def route_limited(env, ip, route):
+    conf = rules(env)
+    rule = conf['routes'].get(route, conf['default'])
+    return not consume(env, f'ip:{ip}:{route}', rule)
+
+
+def user_limited(env, uid, login=None):
+    conf = rules(env)['users']
+    if not conf:
+        return False
+    if login is None:
+        login = env['res.users'].sudo().browse(uid).login
+    rule = conf.get(login) or conf.get('*')
+    if not rule:
+        return False
+    return not consume(env, f'user:{uid}', rule)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Declarative bulk serializers shared by the ODHR API controllers.
+
+A :class:`Serializer` declares once per model the attributes returned by the
+API and where each one is read from::
+
+    EMPLOYEE = Serializer({
+        'id': 'id',
+        'department_id': 'department_id',             # many2one -> {"id", "name"}
+        'department_name': 'department_id.name',      # value of the related record
+        'join_date': ('first_contract_date', 'create_date'),  # first value set
+        'initials': Computed(lambda emp: emp.name[:2].upper(), 'name'),
+        'image_url': Batched(avatar_urls),            # {id: value} for the page
+    })
+
+Serializing a page loads the stored fields of all its records in one query,
+then each related model once, instead of querying per record and relation.
+Values are encoded the same way for every endpoint: many2one as
+``{"id", "name"}``, x2many as lists of ids, dates as ``YYYY-MM-DD``,
+datetimes in ISO 8601 UTC like every other timestamp of the API
+(``2024-03-04T08:00:00Z``) and empty values as None.  Fields missing from the database (modules not
+installed) serialize as None.
+"""
+from odoo import fields
+
+from .fastjson import format_datetime
+
+
+class Computed:
+    """Attribute computed by ``func(record)`` once ``paths`` are prefetched."""
+
+    __slots__ = ('func', 'paths')
+
+    def __init__(self, func, *paths):
+        self.func = func
+        self.paths = paths
+
+
+class Batched:
+    """Attribute computed for a whole page: ``func(records)`` returns ``{id: value}``."""
+
+    __slots__ = ('func',)
+
+    def __init__(self, func):
+        self.func = func
+
+
+def _spec_paths(spec):
+    if isinstance(spec, Computed):
+        return spec.paths
+    if isinstance(spec, Batched):
+        return ()
+    if isinstance(spec, str):
+        return (spec,)
+    return spec
+
+
+def prefetch(records, paths):
+    """Load the dotted field ``paths`` for all ``records`` at once."""
+    if not records:
+        return
+    heads = {}
+    for path in paths:
+        head, _dot, rest = path.partition('.')
+        if head in records._fields and head != 'id':
+            rests = heads.setdefault(head, set())
+            if rest:
+                rests.add(rest)
+    stored = [name for name in heads if records._fields[name].store]
+    if stored:
+        records.fetch(stored)
+    for name, rests in heads.items():
+        field = records._fields[name]
+        # mapped() computes non-stored fields for the whole set in one go
+        values = records.mapped(name)
+        if field.type == 'many2one':
+            prefetch(values, rests | {'display_name'})
+        elif field.relational and rests:
+            prefetch(values, rests)
+
+
+def encode(field, value):
+    """JSON-friendly value of ``field`` (as read from a record)."""
+    if field.type == 'many2one':
+        return {'id': value.id, 'name': value.display_name} if value else None
+    if field.type in ('one2many', 'many2many'):
+        return value.ids
+    if field.type == 'boolean':
+        return value
+    if value is False or value is None:
+        return None
+    if field.type == 'date':
+        return fields.Date.to_string(value)
+    if field.type == 'datetime':
+        return format_datetime(value)
+    if field.type == 'binary' and isinstance(value, bytes):
+        return value.decode('ascii')
+    return value
+
+
+def _value(record, spec):
+    if isinstance(spec, Computed):
+        return spec.func(record)
+    if not isinstance(spec, str):
+        for path in spec:
+            value = _value(record, path)
+            if value is not None:
+                return value
+        return None
+    head, _dot, rest = spec.partition('.')
+    field = record._fields.get(head)
+    if field is None:
+        return None
+    value = record[head]
+    if rest:
+        return _value(value, rest) if value else None
+    return encode(field, value)
+
+
+class Serializer:
+    """Serialize records of one model according to a ``{key: spec}`` mapping.
+
+    A spec is a field name, a dotted path through many2one fields, a tuple of
+    such paths (the first non-empty value wins), a :class:`Computed` or a
+    :class:`Batched`.
+    """
+
+    def __init__(self, spec):
+        self.spec = dict(spec)
+
+    def keys(self):
+        return list(self.spec)
+
+    def select(self, requested, default=None):
+        """Validate a ``fields`` request parameter (list or comma-separated string).
+
+        Returns the selected keys, ``default`` (all keys when None) if nothing
+        was requested; raises ValueError for unknown keys.
+        """
+        if not requested:
+            return list(default or self.spec)
+        if isinstance(requested, str):
+            requested = requested.split(',')
+        if not isinstance(requested, (list, tuple)):
+            raise ValueError('fields must be a list or a comma-separated string')
+        names = [str(name).strip() for name in requested if str(name).strip()]
+        unknown = [name for name in names if name not in self.spec]
+        if unknown or not names:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return names
+
+    def serialize(self, records, keys=None):
+        """List of dicts for ``records`` (in order), restricted to ``keys``."""
+        keys = keys or self.keys()
+        specs = [(key, self.spec[key]) for key in keys]
+        prefetch(records, [path for _key, spec in specs for path in _spec_paths(spec)])
+        batched = {key: spec.func(records) for key, spec in specs if isinstance(spec, Batched)}
+        return [
+            {key: batched[key].get(record.id) if key in batched else _value(record, spec) for key, spec in specs}
+            for record in records
+        ]
+
+    def serialize_one(self, record, keys=None):
+        return self.serialize(record, keys)[0]
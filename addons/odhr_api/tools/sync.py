@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Delta sync of the mobile offline cache.
+
+A sync cursor holds, for one model, the ``(write_date, id)`` of the last
+record sent and the ``(date, id)`` of the last tombstone sent.  Records are
+read in that key order from the position in the cursor, so a sync returns
+what changed since the previous one and costs nothing when nothing did.
+
+Deletions are read from the ``odhr.api.tombstone`` log; archived records
+come back as deletions too.  The first sync (no cursor) pages through the
+active records only and skips the log.
+
+``write_date`` is the start time of the writing transaction, which may
+commit after a later one: only changes older than SYNC_SETTLE seconds are
+sent, so that no late commit lands behind a cursor.
+"""
+import datetime
+
+from odoo.tools import SQL
+
+from .pagination import decode_cursor, encode_cursor
+
+SYNC_SETTLE = 10
+TOMBSTONE_RETENTION_DAYS = 90
+_EPOCH = '1970-01-01 00:00:00'
+
+
+class CursorExpired(ValueError):
+    """The cursor predates the tombstone retention: the client must resync."""
+
+
+def _parse(cursor):
+    values = decode_cursor(cursor)
+    if len(values) != 5:
+        raise ValueError('invalid cursor')
+    changed_at, changed_id, deleted_at, deleted_id, full = values
+    if not (isinstance(changed_at, str) and isinstance(deleted_at, str)
+            and all(isinstance(value, int) for value in (changed_id, deleted_id, full))):
+        raise ValueError('invalid cursor')
+    try:
+        datetime.datetime.fromisoformat(changed_at)
+        datetime.datetime.fromisoformat(deleted_at)
+    except ValueError:
+        raise ValueError('invalid cursor')
+    return changed_at, changed_id, deleted_at, deleted_id, bool(full)
+
+
+def _position(value, record_id):
+    # microseconds matter: several records share a write_date second
+    return [value.isoformat(sep=' '), record_id]
+
+
+def sync_changes(model, domain, cursor, limit, scope_id=None):
+    """Changes of ``model`` records matching ``domain`` after ``cursor``.
+
+    Returns ``(records, deleted_ids, next_cursor, has_more)``; ``records``
+    are active records to upsert.  Raises ValueError for an invalid cursor
+    and CursorExpired when tombstones it needs are gone.
+    """
+    cr = model.env.cr
+    cr.execute(
+        "SELECT (now() AT TIME ZONE 'UTC') - make_interval(secs => %s), (now() AT TIME ZONE 'UTC') - make_interval(days => %s)",
+        [SYNC_SETTLE, TOMBSTONE_RETENTION_DAYS],
+    )
+    boundary, retention = cr.fetchone()
+    if cursor:
+        changed_at, changed_id, deleted_at, deleted_id, full = _parse(cursor)
+        if not full and deleted_at < retention.isoformat(sep=' '):
+            raise CursorExpired('sync cursor expired')
+    else:
+        changed_at, changed_id, full = _EPOCH, 0, True
+        [deleted_at, deleted_id] = _position(boundary, 0)
+
+    model.flush_model(['write_date'])
+    query = model.with_context(active_test=full)._search(domain, order='write_date, id', limit=limit + 1)
+    table = model._table
+    query.add_where(SQL(
+        "(%s, %s) > (%s::timestamp, %s) AND %s < %s",
+        SQL.identifier(table, 'write_date'), SQL.identifier(table, 'id'), changed_at, changed_id,
+        SQL.identifier(table, 'write_date'), boundary,
+    ))
+    cr.execute(query.select(SQL.identifier(table, 'id'), SQL.identifier(table, 'write_date')))
+    rows = cr.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        [changed_at, changed_id] = _position(rows[-1][1], rows[-1][0])
+    records = model.browse([row[0] for row in rows])
+    deleted = []
+    if not full:
+        if 'active' in model._fields:
+            records.fetch(['active'])
+            deleted = records.filtered(lambda record: not record.active).ids
+            records = records.filtered('active')
+        cr.execute(SQL(
+            """
+            SELECT id, res_id, date
+              FROM odhr_api_tombstone
+             WHERE res_model = %s
+               AND (date, id) > (%s::timestamp, %s)
+               AND date < %s
+               %s
+          ORDER BY date, id
+             LIMIT %s
+            """,
+            model._name, deleted_at, deleted_id, boundary,
+            SQL("AND scope_id = %s", scope_id) if scope_id else SQL(),
+            limit + 1,
+        ))
+        tombstones = cr.fetchall()
+        has_more = has_more or len(tombstones) > limit
+        tombstones = tombstones[:limit]
+        if tombstones:
+            [deleted_at, deleted_id] = _position(tombstones[-1][2], tombstones[-1][0])
+        deleted += [row[1] for row in tombstones]
+    # the first sync turns into a delta sync once all records were sent
+    full = full and has_more
+    return records, deleted, encode_cursor([changed_at, changed_id, deleted_at, deleted_id, int(full)]), has_more
@@ -13,6 +13,7 @@
         'hr_contract',
         'hr_attendance',
         'hr_holidays',
+        'odhr_api',
     ],
     'data': [
         'security/ir.model.access.csv',
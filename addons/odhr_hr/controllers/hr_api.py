@@ -1,9 +1,81 @@
 # -*- coding: utf-8 -*-
 import json
-from base64 import b64decode, b64encode
 from odoo import http
+from odoo.exceptions import UserError
 from odoo.http import request, Response
-import time
+
+from odoo.addons.odhr_api.models.upload import UPLOAD_CHUNK_MAX
+from odoo.addons.odhr_api.tools import ratelimit
+from odoo.addons.odhr_api.tools.auth import authenticate
+from odoo.addons.odhr_api.tools.avatars import AVATAR_URL
+from odoo.addons.odhr_api.tools.conditional import CACHE_PRIVATE, CACHE_REFERENCE, cacheable, etag, not_modified, table_version
+from odoo.addons.odhr_api.tools.fastjson import dumps
+from odoo.addons.odhr_api.tools.pagination import fetch_page
+from odoo.addons.odhr_api.tools.serializers import Serializer
+
+EMPLOYEE = Serializer({
+    "id": "id",
+    "name": "name",
+    "work_email": "work_email",
+    "work_phone": "work_phone",
+    "mobile_phone": "mobile_phone",
+    "job_title": "job_title",
+    "department_id": "department_id",
+    "work_location_id": "work_location_id",
+    "emergency_contact_name": "emergency_contact_name",
+    "emergency_contact_phone": "emergency_contact_phone",
+    "probation_end_date": "probation_end_date",
+    "image_url": AVATAR_URL,
+    "image_1920": "image_1920",
+})
+# list pages leave the picture out
+EMPLOYEE_LIST_FIELDS = [key for key in EMPLOYEE.keys() if key != "image_1920"]
+DEPARTMENT = Serializer({
+    "id": "id",
+    "name": "name",
+    "complete_name": "complete_name",
+    "parent_id": "parent_id",
+    "manager_id": "manager_id",
+})
+CONTRACT = Serializer({
+    "id": "id",
+    "name": "name",
+    "employee_id": "employee_id",
+    "date_start": "date_start",
+    "date_end": "date_end",
+    "state": "state",
+    "job_title": "job_title",
+    "department_id": "department_id",
+    "company_id": "company_id",
+})
+ATTENDANCE = Serializer({
+    "id": "id",
+    "employee_id": "employee_id",
+    "check_in": "check_in",
+    "check_out": "check_out",
+    "worked_hours": "worked_hours",
+})
+LEAVE = Serializer({
+    "id": "id",
+    "name": "name",
+    "employee_id": "employee_id",
+    "holiday_status_id": "holiday_status_id",
+    "request_date_from": "request_date_from",
+    "request_date_to": "request_date_to",
+    "number_of_days": "number_of_days",
+    "state": "state",
+})
+# records whose files can be uploaded and streamed through the API
+ATTACHMENT_MODELS = {"hr.employee", "odhr.compliance.document"}
+IMAGE_SIZES = {"128": "image_128", "256": "image_256", "512": "image_512", "1024": "image_1024", "1920": "image_1920"}
+
+ATTACHMENT = Serializer({
+    "id": "id",
+    "name": "name",
+    "mimetype": "mimetype",
+    "create_date": "create_date",
+    "file_size": "file_size",
+})
 
 
 class OdhrHrApiController(http.Controller):
@@ -12,33 +84,24 @@ class OdhrHrApiController(http.Controller):
     Authentication:
     - Uses auth='user'. Mobile apps can authenticate via session (login) or HTTP Basic.
     - For Basic, use an Odoo user's login as username and an API key as password.
+    - Alternatively send ``Authorization: Bearer <token>`` with a token from /odhr/api/auth/token.
     """
 
-    # naive in-process per-IP rate limiting (best-effort; not shared across workers)
-    _RATE_WINDOW_SECONDS = 60
-    _RATE_MAX_REQUESTS = 120
-    _rate_store = {}
-
-    def _rate_limited(self, key: str):
-        now = int(time.time())
-        window = self._RATE_WINDOW_SECONDS
-        max_req = self._RATE_MAX_REQUESTS
-        entry = self._rate_store.get(key)
-        if not entry:
-            self._rate_store[key] = [1, now]
-            return False
-        count, start = entry
-        if now - start >= window:
-            self._rate_store[key] = [1, now]
-            return False
-        count += 1
-        self._rate_store[key] = [count, start]
-        return count > max_req
+    def _rate_limited(self, route: str):
+        """Per-IP token bucket for ``route``; limits and storage backend are
+        configured through system parameters (see odhr_api.tools.ratelimit)."""
+        ip = request.httprequest.remote_addr or 'unknown'
+        return ratelimit.route_limited(request.env, ip, route)
+
+    def _auth_error(self, reason, info):
+        if reason == 'rate_limited':
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        return Response(dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json")
 
     def _authenticate_basic(self):
-        """Authenticate using Basic Auth header and db query param.
+        """Authenticate using a Basic or Bearer Authorization header and db query param.
         Returns (ok: bool, reason: str, info: dict)
-        Sets the session user on success.
+        Sets the request user on success.
         """
         info = {}
         db = request.params.get('db') or request.httprequest.args.get('db')
@@ -52,41 +115,31 @@ class OdhrHrApiController(http.Controller):
                 if getattr(request.session, 'db', None) == db:
                     info['uid'] = request.session.uid
                     info['login'] = request.env.user.login
+                    if ratelimit.user_limited(request.env, info['uid'], info['login']):
+                        return False, 'rate_limited', info
                     return True, 'session', info
         except Exception:
             pass
 
-        auth = request.httprequest.headers.get('Authorization')
-        if not auth or not auth.lower().startswith('basic '):
-            return False, 'missing_authorization', info
-        try:
-            raw = b64decode(auth.split(' ', 1)[1]).decode('utf-8')
-            if ':' not in raw:
-                return False, 'malformed_authorization', info
-            login, password = raw.split(':', 1)
-            info['login'] = login
-            # Prefer the legacy signature authenticate(db, login, password)
-            # Fallback to setting session.db and calling authenticate(login, password)
-            try:
-                try:
-                    uid = request.session.authenticate(db, login, password)  # type: ignore[arg-type]
-                except TypeError:
-                    # Some versions expect session.db pre-set
-                    try:
-                        request.session.db = db
-                    except Exception:
-                        pass
-                    uid = request.session.authenticate(login, password)
-            except Exception as e2:
-                info['exception'] = str(e2)
-                return False, 'bad_credentials', info
-            if uid:
-                info['uid'] = uid
-                return True, 'ok', info
-            return False, 'bad_credentials', info
-        except Exception as e:
-            info['exception'] = str(e)
-            return False, 'exception', info
+        # Basic credentials go through the shared per-worker credential cache;
+        # bearer tokens come from /odhr/api/auth/token.
+        uid, reason = authenticate(db)
+        if uid:
+            info['uid'] = uid
+            info['login'] = request.env.user.login
+            if ratelimit.user_limited(request.env, uid, info['login']):
+                return False, 'rate_limited', info
+            return True, reason, info
+        return False, reason, info
+
+    def _search_page(self, Model, domain, params, order):
+        """Search one page of records (offset or ``cursor`` paging).
+
+        Nothing is counted unless the body asks for it with ``count``
+        (exact/estimate) or ``with_total``.
+        Returns (records, meta); raises ValueError for invalid paging parameters.
+        """
+        return fetch_page(Model, domain, order, params, default_limit=50, default_count="none")
 
     # ---- CORS helpers (for Expo Web) ----
     def _corsify(self, resp: Response):
@@ -113,58 +166,34 @@ class OdhrHrApiController(http.Controller):
         if request.httprequest.method == 'OPTIONS':
             return self._corsify(Response(status=204))
         # rate limit per IP per route
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/employees"):
-            return self._corsify(Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
+        if self._rate_limited("/odhr/api/employees"):
+            return self._corsify(Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return self._corsify(Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json"))
+            return self._corsify(self._auth_error(reason, info))
         """Return a paginated list of employees (HTTP JSON)."""
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return self._corsify(Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
-        limit = int(params.get("limit", 50))
-        offset = int(params.get("offset", 0))
+            return self._corsify(Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
         search = (params.get("search") or "").strip()
 
         domain = []
         if search:
             domain = ["|", ("name", "ilike", search), ("work_email", "ilike", search)]
 
-        fields = [
-            "name",
-            "work_email",
-            "work_phone",
-            "mobile_phone",
-            "job_title",
-            "department_id",
-            "work_location_id",
-            "emergency_contact_name",
-            "emergency_contact_phone",
-            "probation_end_date",
-        ]
-        employees = request.env["hr.employee"].sudo().search(domain, limit=limit, offset=offset)
-        data = employees.read(fields)
-        # Expand many2one fields to {id, name}
-        def m2o(val):
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return {"id": val[0], "name": val[1]}
-            return None
-
-        for rec in data:
-            if rec.get("department_id"):
-                rec["department_id"] = m2o(rec["department_id"])  # type: ignore
-            if rec.get("work_location_id"):
-                rec["work_location_id"] = m2o(rec["work_location_id"])  # type: ignore
+        try:
+            employees, meta = self._search_page(request.env["hr.employee"].sudo(), domain, params, "name, id")
+        except ValueError:
+            return self._corsify(Response(dumps({"error": "invalid_request", "message": "Invalid paging parameters"}), status=400, mimetype="application/json"))
+        data = EMPLOYEE.serialize(employees, EMPLOYEE_LIST_FIELDS)
         payload = {
             "count": len(data),
-            "limit": limit,
-            "offset": offset,
+            **meta,
             "items": data,
         }
-        return self._corsify(Response(json.dumps(payload), status=200, mimetype="application/json"))
+        return self._corsify(Response(dumps(payload), status=200, mimetype="application/json"))
 
     @http.route(
         "/odhr/api/employees/<int:employee_id>",
@@ -174,41 +203,17 @@ class OdhrHrApiController(http.Controller):
         csrf=False,
     )
     def employee_detail(self, employee_id, **kwargs):
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/employees/{employee_id}"):
-            return Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        if self._rate_limited("/odhr/api/employees/<int:employee_id>"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json")
+            return self._auth_error(reason, info)
         """Return details for a single employee by ID (HTTP JSON)."""
-        fields = [
-            "name",
-            "work_email",
-            "work_phone",
-            "mobile_phone",
-            "job_title",
-            "department_id",
-            "work_location_id",
-            "emergency_contact_name",
-            "emergency_contact_phone",
-            "probation_end_date",
-            "image_1920",
-        ]
         emp = request.env["hr.employee"].sudo().browse(employee_id)
         if not emp.exists():
-            return Response(json.dumps({"error": "not_found", "message": "Employee not found"}), status=404, mimetype="application/json")
-        rec = emp.read(fields)[0]
-
-        def m2o(val):
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return {"id": val[0], "name": val[1]}
-            return None
-
-        if rec.get("department_id"):
-            rec["department_id"] = m2o(rec["department_id"])  # type: ignore
-        if rec.get("work_location_id"):
-            rec["work_location_id"] = m2o(rec["work_location_id"])  # type: ignore
-        return Response(json.dumps(rec), status=200, mimetype="application/json")
+            return Response(dumps({"error": "not_found", "message": "Employee not found"}), status=404, mimetype="application/json")
+        rec = EMPLOYEE.serialize_one(emp)
+        return Response(dumps(rec), status=200, mimetype="application/json")
 
     @http.route(
         "/odhr/api/employees/create",
@@ -232,21 +237,20 @@ class OdhrHrApiController(http.Controller):
         # Handle CORS preflight
         if request.httprequest.method == 'OPTIONS':
             return self._corsify(Response(status=204))
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/employees/create"):
-            return self._corsify(Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
+        if self._rate_limited("/odhr/api/employees/create"):
+            return self._corsify(Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return self._corsify(Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json"))
+            return self._corsify(self._auth_error(reason, info))
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return self._corsify(Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
+            return self._corsify(Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
 
         # Validate required fields
         if not (params.get("name") and str(params.get("name")).strip()):
-            return self._corsify(Response(json.dumps({"error": "missing_params", "message": "name is required"}), status=400, mimetype="application/json"))
+            return self._corsify(Response(dumps({"error": "missing_params", "message": "name is required"}), status=400, mimetype="application/json"))
 
         # Build values, harden types
         vals = {
@@ -260,7 +264,7 @@ class OdhrHrApiController(http.Controller):
                 try:
                     vals[key] = int(params.get(key))
                 except Exception:
-                    return self._corsify(Response(json.dumps({"error": "invalid_param", "message": f"{key} must be an integer"}), status=400, mimetype="application/json"))
+                    return self._corsify(Response(dumps({"error": "invalid_param", "message": f"{key} must be an integer"}), status=400, mimetype="application/json"))
         # Optional image: store base64 string as image_1920
         if params.get("image_1920"):
             img = params.get("image_1920")
@@ -268,28 +272,11 @@ class OdhrHrApiController(http.Controller):
                 vals["image_1920"] = img
 
         emp = request.env["hr.employee"].sudo().create(vals)
-        fields = [
-            "name",
-            "work_email",
-            "work_phone",
-            "mobile_phone",
-            "job_title",
-            "department_id",
-            "work_location_id",
-            "image_1920",
-        ]
-        rec = emp.read(fields)[0]
-
-        def m2o(val):
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return {"id": val[0], "name": val[1]}
-            return None
-
-        if rec.get("department_id"):
-            rec["department_id"] = m2o(rec["department_id"])  # type: ignore
-        if rec.get("work_location_id"):
-            rec["work_location_id"] = m2o(rec["work_location_id"])  # type: ignore
-        return self._corsify(Response(json.dumps(rec), status=201, mimetype="application/json"))
+        rec = EMPLOYEE.serialize_one(emp, [
+            "id", "name", "work_email", "work_phone", "mobile_phone", "job_title",
+            "department_id", "work_location_id", "image_1920",
+        ])
+        return self._corsify(Response(dumps(rec), status=201, mimetype="application/json"))
 
     @http.route(
         "/odhr/api/ping",
@@ -299,13 +286,12 @@ class OdhrHrApiController(http.Controller):
         csrf=False,
     )
     def ping(self, **kwargs):
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/ping"):
-            return Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        if self._rate_limited("/odhr/api/ping"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
         ok, reason, info = self._authenticate_basic()
         status = 200 if ok else 401
         payload = {"ok": ok, "reason": reason, "info": info}
-        return Response(json.dumps(payload), status=status, mimetype="application/json")
+        return Response(dumps(payload), status=status, mimetype="application/json")
 
     # ----------------------
     # Additional HR Endpoints
@@ -319,46 +305,35 @@ class OdhrHrApiController(http.Controller):
         csrf=False,
     )
     def list_departments(self, **kwargs):
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/departments"):
-            return Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        if self._rate_limited("/odhr/api/departments"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json")
+            return self._auth_error(reason, info)
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
-        limit = int(params.get("limit", 50))
-        offset = int(params.get("offset", 0))
+            return Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
         search = (params.get("search") or "").strip()
 
         domain = []
         if search:
             domain = ["|", ("name", "ilike", search), ("complete_name", "ilike", search)]
 
-        fields = [
-            "name",
-            "complete_name",
-            "parent_id",
-            "manager_id",
-        ]
-        deps = request.env["hr.department"].sudo().search(domain, limit=limit, offset=offset)
-        data = deps.read(fields)
-
-        def m2o(val):
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return {"id": val[0], "name": val[1]}
-            return None
-
-        for rec in data:
-            if rec.get("parent_id"):
-                rec["parent_id"] = m2o(rec["parent_id"])  # type: ignore
-            if rec.get("manager_id"):
-                rec["manager_id"] = m2o(rec["manager_id"])  # type: ignore
-        payload = {"count": len(data), "limit": limit, "offset": offset, "items": data}
-        return Response(json.dumps(payload), status=200, mimetype="application/json")
+        # department managers are shown by name, so their changes count too
+        tag = etag("hr_departments", sorted(params.items()),
+                   table_version(request.env["hr.department"], relations=["manager_id"]))
+        resp = not_modified(tag, CACHE_REFERENCE)
+        if resp:
+            return resp
+        try:
+            deps, meta = self._search_page(request.env["hr.department"].sudo(), domain, params, "name, id")
+        except ValueError:
+            return Response(dumps({"error": "invalid_request", "message": "Invalid paging parameters"}), status=400, mimetype="application/json")
+        data = DEPARTMENT.serialize(deps)
+        payload = {"count": len(data), **meta, "items": data}
+        return cacheable(Response(dumps(payload), status=200, mimetype="application/json"), tag, CACHE_REFERENCE)
 
     @http.route(
         "/odhr/api/contracts",
@@ -368,17 +343,16 @@ class OdhrHrApiController(http.Controller):
         csrf=False,
     )
     def list_contracts(self, **kwargs):
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/contracts"):
-            return Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        if self._rate_limited("/odhr/api/contracts"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json")
+            return self._auth_error(reason, info)
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
+            return Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
         limit = int(params.get("limit", 50))
         offset = int(params.get("offset", 0))
         employee_id = params.get("employee_id")
@@ -390,30 +364,10 @@ class OdhrHrApiController(http.Controller):
         if active_only:
             domain.append(("state", "=", "open"))  # active/ongoing
 
-        fields = [
-            "name",
-            "employee_id",
-            "date_start",
-            "date_end",
-            "state",
-            "job_title",
-            "department_id",
-            "company_id",
-        ]
         contracts = request.env["hr.contract"].sudo().search(domain, limit=limit, offset=offset)
-        data = contracts.read(fields)
-
-        def m2o(val):
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return {"id": val[0], "name": val[1]}
-            return None
-
-        for rec in data:
-            for key in ("employee_id", "department_id", "company_id"):
-                if rec.get(key):
-                    rec[key] = m2o(rec[key])  # type: ignore
+        data = CONTRACT.serialize(contracts)
         payload = {"count": len(data), "limit": limit, "offset": offset, "items": data}
-        return Response(json.dumps(payload), status=200, mimetype="application/json")
+        return Response(dumps(payload), status=200, mimetype="application/json")
 
     @http.route(
         "/odhr/api/attendances",
@@ -426,19 +380,16 @@ class OdhrHrApiController(http.Controller):
         # Handle CORS preflight
         if request.httprequest.method == 'OPTIONS':
             return self._corsify(Response(status=204))
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/attendances"):
-            return self._corsify(Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
+        if self._rate_limited("/odhr/api/attendances"):
+            return self._corsify(Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return self._corsify(Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json"))
+            return self._corsify(self._auth_error(reason, info))
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return self._corsify(Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
-        limit = int(params.get("limit", 50))
-        offset = int(params.get("offset", 0))
+            return self._corsify(Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
         employee_id = params.get("employee_id")
         date_from = params.get("date_from")  # ISO string
         date_to = params.get("date_to")
@@ -451,25 +402,13 @@ class OdhrHrApiController(http.Controller):
         if date_to:
             domain.append(("check_in", "<=", date_to))
 
-        fields = [
-            "employee_id",
-            "check_in",
-            "check_out",
-            "worked_hours",
-        ]
-        recs = request.env["hr.attendance"].sudo().search(domain, limit=limit, offset=offset)
-        data = recs.read(fields)
-
-        def m2o(val):
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return {"id": val[0], "name": val[1]}
-            return None
-
-        for rec in data:
-            if rec.get("employee_id"):
-                rec["employee_id"] = m2o(rec["employee_id"])  # type: ignore
-        payload = {"count": len(data), "limit": limit, "offset": offset, "items": data}
-        return Response(json.dumps(payload), status=200, mimetype="application/json")
+        try:
+            recs, meta = self._search_page(request.env["hr.attendance"].sudo(), domain, params, "check_in desc, id desc")
+        except ValueError:
+            return Response(dumps({"error": "invalid_request", "message": "Invalid paging parameters"}), status=400, mimetype="application/json")
+        data = ATTENDANCE.serialize(recs)
+        payload = {"count": len(data), **meta, "items": data}
+        return Response(dumps(payload), status=200, mimetype="application/json")
 
     @http.route(
         "/odhr/api/attendances/create",
@@ -481,23 +420,22 @@ class OdhrHrApiController(http.Controller):
     def create_attendance(self, **kwargs):
         if request.httprequest.method == 'OPTIONS':
             return self._corsify(Response(status=204))
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/attendances/create"):
-            return self._corsify(Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
+        if self._rate_limited("/odhr/api/attendances/create"):
+            return self._corsify(Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return self._corsify(Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json"))
+            return self._corsify(self._auth_error(reason, info))
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return self._corsify(Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
+            return self._corsify(Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
 
         employee_id = params.get("employee_id")
         check_in = params.get("check_in")
         check_out = params.get("check_out")
         if not employee_id or not check_in:
-            return Response(json.dumps({"error": "missing_params", "message": "employee_id and check_in are required"}), status=400, mimetype="application/json")
+            return Response(dumps({"error": "missing_params", "message": "employee_id and check_in are required"}), status=400, mimetype="application/json")
         vals = {
             "employee_id": int(employee_id),
             "check_in": check_in,
@@ -505,16 +443,8 @@ class OdhrHrApiController(http.Controller):
         if check_out:
             vals["check_out"] = check_out
         att = request.env["hr.attendance"].sudo().create(vals)
-        data = att.read(["employee_id", "check_in", "check_out", "worked_hours"])[0]
-
-        def m2o(val):
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return {"id": val[0], "name": val[1]}
-            return None
-
-        if data.get("employee_id"):
-            data["employee_id"] = m2o(data["employee_id"])  # type: ignore
-        return self._corsify(Response(json.dumps(data), status=201, mimetype="application/json"))
+        data = ATTENDANCE.serialize_one(att)
+        return self._corsify(Response(dumps(data), status=201, mimetype="application/json"))
 
     @http.route(
         "/odhr/api/leaves",
@@ -526,19 +456,16 @@ class OdhrHrApiController(http.Controller):
     def list_leaves(self, **kwargs):
         if request.httprequest.method == 'OPTIONS':
             return self._corsify(Response(status=204))
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/leaves"):
-            return self._corsify(Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
+        if self._rate_limited("/odhr/api/leaves"):
+            return self._corsify(Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return self._corsify(Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json"))
+            return self._corsify(self._auth_error(reason, info))
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return self._corsify(Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
-        limit = int(params.get("limit", 50))
-        offset = int(params.get("offset", 0))
+            return self._corsify(Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
         employee_id = params.get("employee_id")
         state = (params.get("state") or "").strip()
         date_from = params.get("date_from")
@@ -554,30 +481,13 @@ class OdhrHrApiController(http.Controller):
         if date_to:
             domain.append(("request_date_to", "<=", date_to))
 
-        fields = [
-            "name",
-            "employee_id",
-            "holiday_status_id",
-            "request_date_from",
-            "request_date_to",
-            "number_of_days",
-            "state",
-        ]
-        recs = request.env["hr.leave"].sudo().search(domain, limit=limit, offset=offset)
-        data = recs.read(fields)
-
-        def m2o(val):
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return {"id": val[0], "name": val[1]}
-            return None
-
-        for rec in data:
-            if rec.get("employee_id"):
-                rec["employee_id"] = m2o(rec["employee_id"])  # type: ignore
-            if rec.get("holiday_status_id"):
-                rec["holiday_status_id"] = m2o(rec["holiday_status_id"])  # type: ignore
-        payload = {"count": len(data), "limit": limit, "offset": offset, "items": data}
-        return Response(json.dumps(payload), status=200, mimetype="application/json")
+        try:
+            recs, meta = self._search_page(request.env["hr.leave"].sudo(), domain, params, "date_from desc, id desc")
+        except ValueError:
+            return Response(dumps({"error": "invalid_request", "message": "Invalid paging parameters"}), status=400, mimetype="application/json")
+        data = LEAVE.serialize(recs)
+        payload = {"count": len(data), **meta, "items": data}
+        return Response(dumps(payload), status=200, mimetype="application/json")
 
     @http.route(
         "/odhr/api/leaves/create",
@@ -589,22 +499,21 @@ class OdhrHrApiController(http.Controller):
     def create_leave(self, **kwargs):
         if request.httprequest.method == 'OPTIONS':
             return self._corsify(Response(status=204))
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/leaves/create"):
-            return self._corsify(Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
+        if self._rate_limited("/odhr/api/leaves/create"):
+            return self._corsify(Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json"))
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return self._corsify(Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json"))
+            return self._corsify(self._auth_error(reason, info))
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return self._corsify(Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
+            return self._corsify(Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json"))
 
         required = ["employee_id", "holiday_status_id", "request_date_from", "request_date_to"]
         missing = [k for k in required if not params.get(k)]
         if missing:
-            return Response(json.dumps({"error": "missing_params", "message": f"Missing: {', '.join(missing)}"}), status=400, mimetype="application/json")
+            return Response(dumps({"error": "missing_params", "message": f"Missing: {', '.join(missing)}"}), status=400, mimetype="application/json")
 
         vals = {
             "employee_id": int(params["employee_id"]),
@@ -614,26 +523,8 @@ class OdhrHrApiController(http.Controller):
             "name": params.get("name") or "Leave Request",
         }
         leave = request.env["hr.leave"].sudo().create(vals)
-        data = leave.read([
-            "name",
-            "employee_id",
-            "holiday_status_id",
-            "request_date_from",
-            "request_date_to",
-            "number_of_days",
-            "state",
-        ])[0]
-
-        def m2o(val):
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return {"id": val[0], "name": val[1]}
-            return None
-
-        if data.get("employee_id"):
-            data["employee_id"] = m2o(data["employee_id"])  # type: ignore
-        if data.get("holiday_status_id"):
-            data["holiday_status_id"] = m2o(data["holiday_status_id"])  # type: ignore
-        return Response(json.dumps(data), status=201, mimetype="application/json")
+        data = LEAVE.serialize_one(leave)
+        return Response(dumps(data), status=201, mimetype="application/json")
 
     # ----------------------
     # Attachments & Images
@@ -647,18 +538,17 @@ class OdhrHrApiController(http.Controller):
         csrf=False,
     )
     def employee_image(self, employee_id, **kwargs):
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/employees/{employee_id}/image"):
-            return Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        if self._rate_limited("/odhr/api/employees/<int:employee_id>/image"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json")
+            return self._auth_error(reason, info)
         emp = request.env["hr.employee"].sudo().browse(employee_id)
         if not emp.exists():
-            return Response(json.dumps({"error": "not_found", "message": "Employee not found"}), status=404, mimetype="application/json")
+            return Response(dumps({"error": "not_found", "message": "Employee not found"}), status=404, mimetype="application/json")
         img = emp.image_1920 or False
         b64 = img.decode() if isinstance(img, (bytes, bytearray)) else img
-        return Response(json.dumps({"employee_id": employee_id, "image_1920": b64}), status=200, mimetype="application/json")
+        return Response(dumps({"employee_id": employee_id, "image_1920": b64}), status=200, mimetype="application/json")
 
     @http.route(
         "/odhr/api/employees/<int:employee_id>/attachments",
@@ -668,25 +558,23 @@ class OdhrHrApiController(http.Controller):
         csrf=False,
     )
     def employee_attachments(self, employee_id, **kwargs):
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/employees/{employee_id}/attachments"):
-            return Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        if self._rate_limited("/odhr/api/employees/<int:employee_id>/attachments"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json")
+            return self._auth_error(reason, info)
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
+            return Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
         limit = int(params.get("limit", 50))
         offset = int(params.get("offset", 0))
         domain = [("res_model", "=", "hr.employee"), ("res_id", "=", employee_id)]
-        fields = ["name", "mimetype", "create_date", "file_size"]
         atts = request.env["ir.attachment"].sudo().search(domain, limit=limit, offset=offset)
-        data = atts.read(fields)
+        data = ATTACHMENT.serialize(atts)
         payload = {"count": len(data), "limit": limit, "offset": offset, "items": data}
-        return Response(json.dumps(payload), status=200, mimetype="application/json")
+        return Response(dumps(payload), status=200, mimetype="application/json")
 
     @http.route(
         "/odhr/api/attachments/download",
@@ -696,33 +584,87 @@ class OdhrHrApiController(http.Controller):
         csrf=False,
     )
     def attachment_download(self, **kwargs):
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/attachments/download"):
-            return Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        if self._rate_limited("/odhr/api/attachments/download"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json")
+            return self._auth_error(reason, info)
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
+            return Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
         att_id = params.get("attachment_id")
         if not att_id:
-            return Response(json.dumps({"error": "missing_params", "message": "attachment_id required"}), status=400, mimetype="application/json")
+            return Response(dumps({"error": "missing_params", "message": "attachment_id required"}), status=400, mimetype="application/json")
         att = request.env["ir.attachment"].sudo().browse(int(att_id))
         if not att.exists():
-            return Response(json.dumps({"error": "not_found", "message": "Attachment not found"}), status=404, mimetype="application/json")
+            return Response(dumps({"error": "not_found", "message": "Attachment not found"}), status=404, mimetype="application/json")
         # Security consideration: ensure it's linked to an employee the user can access (here we rely on groups/rules)
         content = att.datas or False
         b64 = content.decode() if isinstance(content, (bytes, bytearray)) else content
-        return Response(json.dumps({
+        return Response(dumps({
             "id": att.id,
             "name": att.name,
             "mimetype": att.mimetype,
             "datas": b64,
         }), status=200, mimetype="application/json")
 
+    def _stream_response(self, stream, download=False):
+        """Binary response for an ``ir.binary`` stream.
+
+        Files are sent in chunks straight from the filestore, with
+        ``Content-Length``, checksum ``ETag`` and ``Range``/``If-Range``
+        support.  When Odoo runs with ``x_sendfile`` enabled the body is left
+        to the front proxy through ``X-Accel-Redirect`` (see nginx.conf.dev).
+        """
+        resp = stream.get_response(as_attachment=download)
+        resp.headers["Cache-Control"] = CACHE_PRIVATE
+        resp.headers["Accept-Ranges"] = "bytes"
+        return self._corsify(resp)
+
+    @http.route(
+        "/odhr/api/attachments/<int:attachment_id>/content",
+        type="http",
+        auth="public",
+        methods=["GET"],
+        csrf=False,
+    )
+    def attachment_content(self, attachment_id, download=None, **kwargs):
+        """Raw attachment bytes; replaces the base64 JSON of /odhr/api/attachments/download."""
+        if self._rate_limited("/odhr/api/attachments/<int:attachment_id>/content"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        ok, reason, info = self._authenticate_basic()
+        if not ok:
+            return self._auth_error(reason, info)
+        att = request.env["ir.attachment"].sudo().browse(attachment_id)
+        if not att.exists() or att.res_model not in ATTACHMENT_MODELS:
+            return Response(dumps({"error": "not_found", "message": "Attachment not found"}), status=404, mimetype="application/json")
+        stream = request.env["ir.binary"]._get_stream_from(att)
+        return self._stream_response(stream, download=download in ("1", "true"))
+
+    @http.route(
+        "/odhr/api/employees/<int:employee_id>/image/<string:size>",
+        type="http",
+        auth="public",
+        methods=["GET"],
+        csrf=False,
+    )
+    def employee_image_raw(self, employee_id, size, **kwargs):
+        """Employee picture as an image response; ``size`` is one of IMAGE_SIZES."""
+        if self._rate_limited("/odhr/api/employees/<int:employee_id>/image/<string:size>"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        ok, reason, info = self._authenticate_basic()
+        if not ok:
+            return self._auth_error(reason, info)
+        if size not in IMAGE_SIZES:
+            return Response(dumps({"error": "invalid_param", "message": f"size must be one of {', '.join(IMAGE_SIZES)}"}), status=400, mimetype="application/json")
+        emp = request.env["hr.employee"].sudo().browse(employee_id)
+        if not emp.exists():
+            return Response(dumps({"error": "not_found", "message": "Employee not found"}), status=404, mimetype="application/json")
+        stream = request.env["ir.binary"]._get_image_stream_from(emp, IMAGE_SIZES[size])
+        return self._stream_response(stream)
+
     @http.route(
         "/odhr/api/attachments/upload",
         type="http",
@@ -731,31 +673,29 @@ class OdhrHrApiController(http.Controller):
         csrf=False,
     )
     def attachment_upload(self, **kwargs):
-        ip = request.httprequest.remote_addr or 'unknown'
-        if self._rate_limited(f"{ip}:/odhr/api/attachments/upload"):
-            return Response(json.dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        if self._rate_limited("/odhr/api/attachments/upload"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
         ok, reason, info = self._authenticate_basic()
         if not ok:
-            return Response(json.dumps({"error": "unauthorized", "reason": reason, "info": info}), status=401, mimetype="application/json")
+            return self._auth_error(reason, info)
         try:
             raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
             params = json.loads(raw)
         except Exception:
-            return Response(json.dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
+            return Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
 
         required = ["res_model", "res_id", "name", "mimetype", "datas"]
         missing = [k for k in required if not params.get(k)]
         if missing:
-            return Response(json.dumps({"error": "missing_params", "message": f"Missing: {', '.join(missing)}"}), status=400, mimetype="application/json")
+            return Response(dumps({"error": "missing_params", "message": f"Missing: {', '.join(missing)}"}), status=400, mimetype="application/json")
 
         # Basic input hardening
-        allowed_models = {"hr.employee", "odhr.compliance.document"}
-        if params["res_model"] not in allowed_models:
-            return Response(json.dumps({"error": "invalid_model", "message": "Unsupported model"}), status=400, mimetype="application/json")
+        if params["res_model"] not in ATTACHMENT_MODELS:
+            return Response(dumps({"error": "invalid_model", "message": "Unsupported model"}), status=400, mimetype="application/json")
         datas_b64 = params["datas"]
         # Prevent overly large uploads (>5MB approx)
         if len(datas_b64) > 7_000_000:
-            return Response(json.dumps({"error": "file_too_large", "message": "Max 5MB"}), status=413, mimetype="application/json")
+            return Response(dumps({"error": "file_too_large", "message": "Max 5MB"}), status=413, mimetype="application/json")
 
         vals = {
             "res_model": params["res_model"],
@@ -765,4 +705,148 @@ class OdhrHrApiController(http.Controller):
             "datas": datas_b64,
         }
         att = request.env["ir.attachment"].sudo().create(vals)
-        return Response(json.dumps({"id": att.id, "name": att.name, "mimetype": att.mimetype}), status=201, mimetype="application/json")
+        return Response(dumps({"id": att.id, "name": att.name, "mimetype": att.mimetype}), status=201, mimetype="application/json")
+
+    # ----------------------
+    # Chunked uploads
+    # ----------------------
+
+    def _upload_for(self, token):
+        """Open or finished upload session ``token`` of the current user."""
+        return request.env["odhr.api.upload"].sudo().search([
+            ("token", "=", token),
+            ("user_id", "=", request.env.uid),
+        ], limit=1)
+
+    def _upload_state(self, upload):
+        return {
+            "upload_id": upload.token,
+            "offset": upload.received,
+            "size": upload.size,
+            "state": upload.state,
+            "chunk_size": UPLOAD_CHUNK_MAX,
+        }
+
+    @http.route(
+        "/odhr/api/uploads",
+        type="http",
+        auth="public",
+        methods=["POST"],
+        csrf=False,
+    )
+    def upload_init(self, **kwargs):
+        """Start a resumable upload.
+
+        Body JSON: res_model, res_id, name, size (bytes), optional mimetype and
+        sha1 (hex digest checked on finalize).  Then PUT the file in chunks to
+        /odhr/api/uploads/<upload_id>?offset=<n> and POST .../finalize.
+        """
+        if self._rate_limited("/odhr/api/uploads"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        ok, reason, info = self._authenticate_basic()
+        if not ok:
+            return self._auth_error(reason, info)
+        try:
+            raw = request.httprequest.get_data(cache=False, as_text=True) or "{}"
+            params = json.loads(raw)
+        except Exception:
+            return Response(dumps({"error": "invalid_request", "message": "Invalid JSON body"}), status=400, mimetype="application/json")
+
+        required = ["res_model", "res_id", "name", "size"]
+        missing = [k for k in required if not params.get(k)]
+        if missing:
+            return Response(dumps({"error": "missing_params", "message": f"Missing: {', '.join(missing)}"}), status=400, mimetype="application/json")
+        if params["res_model"] not in ATTACHMENT_MODELS:
+            return Response(dumps({"error": "invalid_model", "message": "Unsupported model"}), status=400, mimetype="application/json")
+        try:
+            res_id, size = int(params["res_id"]), int(params["size"])
+        except (TypeError, ValueError):
+            return Response(dumps({"error": "invalid_param", "message": "res_id and size must be integers"}), status=400, mimetype="application/json")
+        if size <= 0:
+            return Response(dumps({"error": "invalid_param", "message": "size must be positive"}), status=400, mimetype="application/json")
+        Upload = request.env["odhr.api.upload"].sudo()
+        max_size = Upload._max_size()
+        if size > max_size:
+            return Response(dumps({"error": "file_too_large", "message": f"Max {max_size} bytes"}), status=413, mimetype="application/json")
+        if not request.env[params["res_model"]].sudo().browse(res_id).exists():
+            return Response(dumps({"error": "not_found", "message": "Record not found"}), status=404, mimetype="application/json")
+        try:
+            with request.env.cr.savepoint():
+                upload = Upload.create({
+                    "res_model": params["res_model"],
+                    "res_id": res_id,
+                    "name": params["name"],
+                    "mimetype": params.get("mimetype"),
+                    "size": size,
+                    "checksum": params.get("sha1"),
+                    "user_id": request.env.uid,
+                })
+        except UserError as e:
+            return Response(dumps({"error": "invalid_param", "message": str(e)}), status=400, mimetype="application/json")
+        return Response(dumps(self._upload_state(upload)), status=201, mimetype="application/json")
+
+    @http.route(
+        "/odhr/api/uploads/<string:token>",
+        type="http",
+        auth="public",
+        methods=["GET", "PUT"],
+        csrf=False,
+    )
+    def upload_chunk(self, token, offset=None, **kwargs):
+        """GET: current offset of the upload, to resume after a failure.
+        PUT: raw chunk bytes (at most ``chunk_size``) to write at ``offset``.
+        """
+        if self._rate_limited("/odhr/api/uploads/<string:token>"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        ok, reason, info = self._authenticate_basic()
+        if not ok:
+            return self._auth_error(reason, info)
+        upload = self._upload_for(token)
+        if not upload:
+            return Response(dumps({"error": "not_found", "message": "Upload not found"}), status=404, mimetype="application/json")
+        if request.httprequest.method == "GET":
+            return Response(dumps(self._upload_state(upload)), status=200, mimetype="application/json")
+        try:
+            offset = int(offset)
+        except (TypeError, ValueError):
+            return Response(dumps({"error": "missing_params", "message": "offset query parameter required"}), status=400, mimetype="application/json")
+        if offset != upload.received:
+            return Response(dumps({"error": "offset_mismatch", **self._upload_state(upload)}), status=409, mimetype="application/json")
+        length = request.httprequest.content_length or 0
+        try:
+            upload.write_chunk(offset, request.httprequest.stream, length)
+        except UserError as e:
+            return Response(dumps({"error": "invalid_chunk", "message": str(e), **self._upload_state(upload)}), status=400, mimetype="application/json")
+        return Response(dumps(self._upload_state(upload)), status=200, mimetype="application/json")
+
+    @http.route(
+        "/odhr/api/uploads/<string:token>/finalize",
+        type="http",
+        auth="public",
+        methods=["POST"],
+        csrf=False,
+    )
+    def upload_finalize(self, token, **kwargs):
+        if self._rate_limited("/odhr/api/uploads/<string:token>/finalize"):
+            return Response(dumps({"error": "rate_limited", "message": "Too many requests"}), status=429, mimetype="application/json")
+        ok, reason, info = self._authenticate_basic()
+        if not ok:
+            return self._auth_error(reason, info)
+        upload = self._upload_for(token)
+        if not upload:
+            return Response(dumps({"error": "not_found", "message": "Upload not found"}), status=404, mimetype="application/json")
+        if upload.state == "done":
+            # finalize is idempotent for clients retrying after a lost response
+            att = upload.attachment_id
+        else:
+            try:
+                att = upload.finalize()
+            except UserError as e:
+                return Response(dumps({"error": "invalid_upload", "message": str(e), **self._upload_state(upload)}), status=400, mimetype="application/json")
+        return Response(dumps({
+            "id": att.id,
+            "name": att.name,
+            "mimetype": att.mimetype,
+            "file_size": att.file_size,
+            "checksum": att.checksum,
+        }), status=201, mimetype="application/json")
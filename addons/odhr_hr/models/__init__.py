@@ -3,3 +3,4 @@ from . import hr_employee
 from . import compliance_document
 from . import onboarding
 from . import offboarding
+from . import team_kpi
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+
+OPEN_STATES = ['draft', 'in_progress']
+
+
+class OdhrApiTeamKpi(models.Model):
+    _inherit = 'odhr.api.team.kpi'
+
+    open_onboarding = fields.Integer()
+    open_offboarding = fields.Integer()
+
+    @api.model
+    def _kpi_records(self, manager, today, indirect=False):
+        kpis = super()._kpi_records(manager, today, indirect)
+        team = kpis['headcount']
+        for kpi, model in (('open_onboarding', 'odhr.onboarding.checklist'),
+                           ('open_offboarding', 'odhr.offboarding.checklist')):
+            kpis[kpi] = self.env[model].sudo().search([
+                ('employee_id', 'in', team.ids), ('state', 'in', OPEN_STATES),
+            ]).employee_id
+        return kpis
+
+
+class OnboardingChecklist(models.Model):
+    _name = 'odhr.onboarding.checklist'
+    _inherit = ['odhr.onboarding.checklist', 'odhr.api.team.kpi.mixin']
+    _odhr_kpi_fields = ('employee_id', 'state')
+
+
+class OffboardingChecklist(models.Model):
+    _name = 'odhr.offboarding.checklist'
+    _inherit = ['odhr.offboarding.checklist', 'odhr.api.team.kpi.mixin']
+    _odhr_kpi_fields = ('employee_id', 'state')
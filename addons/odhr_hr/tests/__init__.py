@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import test_basic
+from . import test_streaming
+from . import test_upload
@@ -12,3 +12,14 @@ class TestOdhrBasic(TransactionCase):
     def test_probation_cron(self):
         # Should not raise
         self.env['hr.employee'].cron_notify_probation_end()
+
+    def test_team_kpi_checklists(self):
+        Employee = self.env['hr.employee']
+        manager = Employee.create({'name': 'KPI Manager'})
+        hire = Employee.create({'name': 'KPI Hire', 'parent_id': manager.id})
+        Kpi = self.env['odhr.api.team.kpi']
+        self.assertEqual(Kpi.get_snapshot(manager).open_onboarding, 0)
+        checklist = self.env['odhr.onboarding.checklist'].create({'name': 'Welcome', 'employee_id': hire.id})
+        self.assertEqual(Kpi.get_snapshot(manager).open_onboarding, 1)
+        checklist.action_done()
+        self.assertEqual(Kpi.get_snapshot(manager).open_onboarding, 0)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import tagged
+
+from odoo.addons.odhr_api.tests.common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrStreaming(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.employee = self._api_user('stream')
+        self.content = bytes(range(256)) * 64
+        self.attachment = self.env['ir.attachment'].create({
+            'name': 'contract.bin',
+            'raw': self.content,
+            'res_model': 'hr.employee',
+            'res_id': self.employee.id,
+        })
+
+    def _get(self, path, **headers):
+        return self.url_open(self._url(path), headers={**self.headers, **headers})
+
+    def test_attachment_content(self):
+        path = f'attachments/{self.attachment.id}/content'
+        resp = self._get(path)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, self.content)
+        self.assertEqual(resp.headers['Content-Length'], str(len(self.content)))
+        tag = resp.headers['ETag']
+        self.assertIn(self.attachment.checksum, tag)
+
+        resp = self._get(path, Range='bytes=100-199')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.content, self.content[100:200])
+
+        # a stale If-Range validator gets the whole file
+        resp = self._get(path, Range='bytes=100-199', **{'If-Range': '"stale"'})
+        self.assertEqual(resp.status_code, 200)
+
+        self.assertEqual(self._get(path, **{'If-None-Match': tag}).status_code, 304)
+
+    def test_attachment_other_model(self):
+        other = self.env['ir.attachment'].create({'name': 'other.txt', 'raw': b'x', 'res_model': 'res.partner', 'res_id': 1})
+        self.assertEqual(self._get(f'attachments/{other.id}/content').status_code, 404)
+
+    def test_employee_image(self):
+        resp = self._get(f'employees/{self.employee.id}/image/128')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.headers['Content-Type'].startswith('image/'))
+        self.assertEqual(self._get(f'employees/{self.employee.id}/image/77').status_code, 400)
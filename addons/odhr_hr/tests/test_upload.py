@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+
+from odoo.tests.common import tagged
+
+from odoo.addons.odhr_api.tests.common import OdhrApiCase
+
+
+@tagged('-at_install', 'post_install')
+class TestOdhrChunkedUpload(OdhrApiCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.employee = self._api_user('upload')
+        self.content = b''.join(i.to_bytes(4, 'little') for i in range(50000))
+
+    def _url(self, path, **params):
+        return super()._url(path) + ''.join(f'&{key}={value}' for key, value in params.items())
+
+    def _init(self, **extra):
+        body = {
+            'res_model': 'hr.employee',
+            'res_id': self.employee.id,
+            'name': 'scan.bin',
+            'mimetype': 'application/octet-stream',
+            'size': len(self.content),
+            **extra,
+        }
+        resp = self.url_open(self._url('uploads'), data=json.dumps(body), headers=self.headers)
+        self.assertEqual(resp.status_code, 201)
+        return resp.json()['upload_id']
+
+    def _put(self, upload_id, offset, chunk):
+        return self.opener.put(
+            self.base_url() + self._url(f'uploads/{upload_id}', offset=offset),
+            data=chunk, headers=dict(self.headers, **{'Content-Type': 'application/octet-stream'}), timeout=12,
+        )
+
+    def test_resumable_upload(self):
+        upload_id = self._init(sha1=hashlib.sha1(self.content).hexdigest())
+        half = len(self.content) // 2
+        self.assertEqual(self._put(upload_id, 0, self.content[:half]).json()['offset'], half)
+
+        # a retried or out-of-order chunk is refused with the offset to resume from
+        resp = self._put(upload_id, 0, self.content[:half])
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()['offset'], half)
+        resp = self.url_open(self._url(f'uploads/{upload_id}'), headers=self.headers)
+        self.assertEqual(resp.json()['offset'], half)
+
+        self.assertEqual(self._put(upload_id, half, self.content[half:]).json()['offset'], len(self.content))
+        resp = self.url_open(self._url(f'uploads/{upload_id}/finalize'), data='{}', headers=self.headers)
+        self.assertEqual(resp.status_code, 201)
+        attachment = self.env['ir.attachment'].browse(resp.json()['id'])
+        self.assertEqual(attachment.raw, self.content)
+        self.assertEqual(attachment.res_id, self.employee.id)
+        self.assertEqual(attachment.file_size, len(self.content))
+
+    def test_checksum_mismatch(self):
+        upload_id = self._init(sha1='0' * 40)
+        self.assertEqual(self._put(upload_id, 0, self.content).status_code, 200)
+        resp = self.url_open(self._url(f'uploads/{upload_id}/finalize'), data='{}', headers=self.headers)
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(self.env['ir.attachment'].search([('name', '=', 'scan.bin')]))
+
+    def test_incomplete_upload(self):
+        upload_id = self._init()
+        self._put(upload_id, 0, self.content[:100])
+        resp = self.url_open(self._url(f'uploads/{upload_id}/finalize'), data='{}', headers=self.headers)
+        self.assertEqual(resp.status_code, 400)
+
+    def test_lost_spool(self):
+        upload_id = self._init()
+        self.assertEqual(self._put(upload_id, 0, self.content).status_code, 200)
+        upload = self.env['odhr.api.upload'].search([('token', '=', upload_id)])
+        os.unlink(upload._spool_path())
+        resp = self.url_open(self._url(f'uploads/{upload_id}/finalize'), data='{}', headers=self.headers)
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()['state'], 'failed')
+        self.assertIn('restart the upload', resp.json()['message'])
+
+    def test_invalid_size(self):
+        body = {'res_model': 'hr.employee', 'res_id': self.employee.id, 'name': 'scan.bin'}
+        url = self._url('uploads')
+        resp = self.url_open(url, data=json.dumps({**body, 'size': -1}), headers=self.headers)
+        self.assertEqual(resp.status_code, 400)
+        self.env['ir.config_parameter'].sudo().set_param('odhr_api.upload_max_size', 10)
+        resp = self.url_open(url, data=json.dumps({**body, 'size': 11}), headers=self.headers)
+        self.assertEqual(resp.status_code, 413)
+        self.assertFalse(self.env['odhr.api.upload'].search([('res_id', '=', self.employee.id)]))
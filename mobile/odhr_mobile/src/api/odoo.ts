@@ -17,15 +17,23 @@ function basicAuth(login: string, apiKey: string) {
   return 'Basic ' + buff.toString('base64');
 }
 
+// Last payload and ETag of GET responses; the server answers 304 while they are current.
+const etagCache = new Map<string, { etag: string; data: any }>();
+
 async function httpJson<T>(url: string, method: 'POST' | 'GET', body: any | undefined, headers: Record<string, string>) {
+  const cached = method === 'GET' ? etagCache.get(url) : undefined;
   const resp = await fetch(url, {
     method,
     headers: {
       'Content-Type': 'application/json',
+      ...(cached ? { 'If-None-Match': cached.etag } : {}),
       ...headers,
     },
     body: body ? JSON.stringify(body) : undefined,
   });
+  if (resp.status === 304 && cached) {
+    return cached.data as T;
+  }
   let data: any = null;
   const text = await resp.text();
   try {
@@ -39,9 +47,24 @@ async function httpJson<T>(url: string, method: 'POST' | 'GET', body: any | unde
     err.data = data;
     throw err;
   }
+  const etag = resp.headers.get('ETag');
+  if (method === 'GET' && etag) {
+    etagCache.set(url, { etag, data });
+  }
   return data as T;
 }
 
+// ===== Batch =====
+export type BatchRequest = { id: string; method: 'GET' | 'POST'; path: string; body?: any };
+export type BatchResponse = { id: string; status: number; body: any };
+
+// Run several /odhr/api calls in one HTTP round trip (authenticated once server-side).
+export async function batch(cfg: OdooConfig, requests: BatchRequest[]) {
+  const url = `${cfg.baseUrl}/odhr/api/batch?db=${encodeURIComponent(cfg.db)}`;
+  const res = await httpJson<{ responses: BatchResponse[] }>(url, 'POST', { requests }, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+  return res.responses;
+}
+
 // ===== Common Types =====
 export type Id = number;
 export type DateString = string; // ISO 8601
@@ -52,8 +75,22 @@ export type Paginated<T> = {
   items: T[];
   limit: number;
   offset: number;
+  has_more?: boolean;
+  total_estimated?: boolean;
+};
+
+// Keyset page: pass `cursor: null` for the first page, then the returned `next_cursor`.
+export type CursorPage<T> = {
+  items: T[];
+  limit: number;
+  next_cursor: string | null;
+  has_more: boolean;
+  total?: number; // only with `with_total: true` or `count`
+  total_estimated?: boolean;
 };
 
+export type CursorParams = { cursor?: string | null; with_total?: boolean; count?: 'exact' | 'estimate' | 'none' };
+
 export type Success = { ok: true };
 
 // ===== Auth / Session =====
@@ -92,10 +129,12 @@ export type Employee = {
   manager_name?: string;
   work_location_id?: Id | null;
   join_date?: DateString;
-  image_128?: string; // base64 preview
-  image_1920?: string; // base64 full
+  image_url?: string; // avatar endpoint, authenticated like every API call
+  image_1920?: string; // base64 full, write-only (profile update)
 };
 
+export type EmployeeField = Exclude<keyof Employee, 'image_1920'>;
+
 export type EmployeeUpdate = Partial<
   Pick<
     Employee,
@@ -126,7 +165,7 @@ export async function getEmployeeById(cfg: OdooConfig, id: Id) {
 
 export async function searchEmployees(
   cfg: OdooConfig,
-  params: { q?: string; department_id?: Id; manager_id?: Id; limit?: number; offset?: number } = {}
+  params: { q?: string; department_id?: Id; manager_id?: Id; limit?: number; offset?: number; fields?: EmployeeField[] } = {}
 ) {
   const url = `${cfg.baseUrl}/odhr/api/employees/search?db=${encodeURIComponent(cfg.db)}`;
   return httpJson<Paginated<Employee>>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
@@ -137,9 +176,20 @@ export type TeamNode = {
   members: Employee[];
 };
 
-export async function getTeamStructure(cfg: OdooConfig, manager_id?: Id) {
+export async function getTeamStructure(cfg: OdooConfig, manager_id?: Id, include_indirect?: boolean) {
   const url = `${cfg.baseUrl}/odhr/api/employees/team?db=${encodeURIComponent(cfg.db)}`;
-  return httpJson<TeamNode>(url, 'POST', { manager_id }, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+  return httpJson<TeamNode>(url, 'POST', { manager_id, include_indirect }, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+}
+
+export type OrgTreeItem = Employee & { depth: number };
+
+// Whole subtree in one call: items are linked to their manager by manager_id
+export async function getOrgTree(
+  cfg: OdooConfig,
+  params: { manager_id?: Id; depth?: number; fields?: EmployeeField[] } = {}
+) {
+  const url = `${cfg.baseUrl}/odhr/api/employees/tree?db=${encodeURIComponent(cfg.db)}`;
+  return httpJson<{ manager: Employee; items: OrgTreeItem[] }>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
 }
 
 export async function createEmployee(cfg: OdooConfig, payload: {
@@ -174,7 +224,7 @@ export type AttendanceEntry = {
 
 export async function attendanceCheckIn(
   cfg: OdooConfig,
-  payload: { lat?: number; lng?: number; manual?: boolean; reason?: string | null }
+  payload: { uid?: string; lat?: number; lng?: number; manual?: boolean; reason?: string | null }
 ) {
   const url = `${cfg.baseUrl}/odhr/api/attendance/checkin?db=${encodeURIComponent(cfg.db)}`;
   return httpJson<AttendanceEntry>(url, 'POST', payload, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
@@ -182,32 +232,59 @@ export async function attendanceCheckIn(
 
 export async function attendanceCheckOut(
   cfg: OdooConfig,
-  payload: { lat?: number; lng?: number; manual?: boolean; reason?: string | null }
+  payload: { uid?: string; lat?: number; lng?: number; manual?: boolean; reason?: string | null }
 ) {
   const url = `${cfg.baseUrl}/odhr/api/attendance/checkout?db=${encodeURIComponent(cfg.db)}`;
   return httpJson<AttendanceEntry>(url, 'POST', payload, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
 }
 
+export type AttendancePunch = {
+  uid: string;
+  kind: 'checkin' | 'checkout';
+  at: string; // ISO 8601, e.g. 2024-03-04T08:00:00.000Z
+  lat?: number;
+  lng?: number;
+};
+
+export type AttendancePunchResult = {
+  uid: string | null;
+  status: 'created' | 'duplicate' | 'error';
+  error?: string;
+  attendance?: AttendanceEntry;
+};
+
+export async function attendanceBulk(cfg: OdooConfig, items: AttendancePunch[]) {
+  const url = `${cfg.baseUrl}/odhr/api/attendance/bulk?db=${encodeURIComponent(cfg.db)}`;
+  return httpJson<{ results: AttendancePunchResult[] }>(url, 'POST', { items }, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+}
+
 export async function attendanceHistory(
   cfg: OdooConfig,
-  params: { from?: DateString; to?: DateString; period?: 'daily' | 'weekly' | 'monthly'; limit?: number; offset?: number } = {}
+  params: { from?: DateString; to?: DateString; period?: 'daily' | 'weekly' | 'monthly'; limit?: number; offset?: number } & CursorParams = {}
 ) {
   const url = `${cfg.baseUrl}/odhr/api/attendance/history?db=${encodeURIComponent(cfg.db)}`;
-  return httpJson<Paginated<AttendanceEntry>>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+  return httpJson<Paginated<AttendanceEntry> & Partial<CursorPage<AttendanceEntry>>>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
 }
 
-export type AttendanceAnalytics = {
+export type AttendanceTotals = {
   total_hours: number;
   overtime_hours: number;
   late_count: number;
   early_leave_count: number;
   days_present: number;
+};
+
+export type AttendanceAnalytics = AttendanceTotals & {
+  from: DateString;
+  to: DateString;
+  employee_count: number;
   days_absent: number;
+  periods?: (AttendanceTotals & { start: DateString })[];
 };
 
 export async function attendanceAnalytics(
   cfg: OdooConfig,
-  params: { from?: DateString; to?: DateString }
+  params: { from?: DateString; to?: DateString; period?: 'week' | 'month' | 'year'; employee_id?: Id; team?: boolean; include_indirect?: boolean }
 ) {
   const url = `${cfg.baseUrl}/odhr/api/attendance/analytics?db=${encodeURIComponent(cfg.db)}`;
   return httpJson<AttendanceAnalytics>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
@@ -230,8 +307,19 @@ export type LeaveRequest = {
 export type LeaveBalance = {
   type_id: Id;
   type_name: string;
-  remaining: number;
   unit: 'days' | 'hours';
+  // null for leave types without allocation
+  allocated: number | null;
+  taken: number;
+  pending: number;
+  remaining: number | null;
+  virtual_remaining: number | null;
+};
+
+export type LeaveBalanceMatrix = {
+  types: { id: Id; name: string; unit: 'days' | 'hours' }[];
+  columns: ('allocated' | 'taken' | 'pending' | 'remaining' | 'virtual_remaining')[];
+  rows: { employee_id: Id; employee_name: string; balances: (number | null)[][] }[];
 };
 
 export async function listLeaveTypes(cfg: OdooConfig) {
@@ -260,6 +348,11 @@ export async function leaveBalances(cfg: OdooConfig) {
   return httpJson<LeaveBalance[]>(url, 'GET', undefined, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
 }
 
+export async function teamLeaveBalances(cfg: OdooConfig, params: { manager_id?: Id; include_indirect?: boolean } = {}) {
+  const url = `${cfg.baseUrl}/odhr/api/leave/balances/team?db=${encodeURIComponent(cfg.db)}`;
+  return httpJson<LeaveBalanceMatrix>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+}
+
 export async function approveLeave(cfg: OdooConfig, leave_id: Id) {
   const url = `${cfg.baseUrl}/odhr/api/leave/${leave_id}/approve?db=${encodeURIComponent(cfg.db)}`;
   return httpJson<LeaveRequest>(url, 'POST', {}, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
@@ -272,12 +365,29 @@ export async function rejectLeave(cfg: OdooConfig, leave_id: Id, reason?: string
 
 export async function teamLeaveCalendar(
   cfg: OdooConfig,
-  params: { from: DateString; to: DateString; team_manager_id?: Id }
+  params: { from: DateString; to: DateString; team_manager_id?: Id; include_indirect?: boolean }
 ) {
   const url = `${cfg.baseUrl}/odhr/api/leave/calendar?db=${encodeURIComponent(cfg.db)}`;
   return httpJson<LeaveRequest[]>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
 }
 
+export type TeamLeaveDays = {
+  from: DateString;
+  to: DateString;
+  employees: { id: Id; name: string }[];
+  types: { id: Id; name: string }[];
+  days: { date: DateString; off: { employee_id: Id; leave_id: Id; type_id: Id; state: string }[] }[];
+};
+
+// Who is off on each day of the range; days without anyone off are omitted
+export async function teamLeaveDays(
+  cfg: OdooConfig,
+  params: { from: DateString; to: DateString; team_manager_id?: Id; include_indirect?: boolean }
+) {
+  const url = `${cfg.baseUrl}/odhr/api/leave/calendar?db=${encodeURIComponent(cfg.db)}`;
+  return httpJson<TeamLeaveDays>(url, 'POST', { ...params, mode: 'days' }, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+}
+
 // ===== Payroll / Payslips =====
 export type Payslip = {
   id: Id;
@@ -301,11 +411,47 @@ export async function getPayslipDetails(cfg: OdooConfig, id: Id) {
 }
 
 export async function getPayslipPDF(cfg: OdooConfig, id: Id) {
-  const url = `${cfg.baseUrl}/odhr/api/payroll/payslips/${id}/pdf?db=${encodeURIComponent(cfg.db)}`;
-  // Returns base64 PDF string to render/download client-side
+  const url = `${cfg.baseUrl}/odhr/api/payroll/payslips/${id}/pdf?db=${encodeURIComponent(cfg.db)}&format=json`;
+  // Returns base64 PDF string to render/download client-side (without format=json the endpoint streams the PDF)
   return httpJson<{ filename: string; pdf_base64: string }>(url, 'GET', undefined, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
 }
 
+// ===== Offline sync =====
+export type SyncModel = 'employees' | 'departments' | 'leave_types' | 'attendances' | 'leaves';
+export type SyncResult<T = Record<string, unknown>> = {
+  items: T[];
+  deleted: Id[];
+  cursor: string;
+  has_more: boolean;
+  reset: boolean;
+};
+
+export async function syncChanges(cfg: OdooConfig, cursors: Partial<Record<SyncModel, string | null>>, limit?: number) {
+  const url = `${cfg.baseUrl}/odhr/api/sync?db=${encodeURIComponent(cfg.db)}`;
+  return httpJson<{ models: Partial<Record<SyncModel, SyncResult>> }>(url, 'POST', { models: cursors, limit }, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+}
+
+// ===== Report jobs =====
+export type ReportJob = {
+  id: Id;
+  type: 'payslip_pdf' | 'attendance_export';
+  state: 'queued' | 'done' | 'failed';
+  error: string | null;
+  created_at: string;
+  done_at: string | null;
+  download_url: string | null;
+};
+
+export async function enqueueReportJob(cfg: OdooConfig, type: ReportJob['type'], params: Record<string, unknown>) {
+  const url = `${cfg.baseUrl}/odhr/api/jobs?db=${encodeURIComponent(cfg.db)}`;
+  return httpJson<ReportJob>(url, 'POST', { type, params }, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+}
+
+export async function getReportJob(cfg: OdooConfig, id: Id) {
+  const url = `${cfg.baseUrl}/odhr/api/jobs/${id}?db=${encodeURIComponent(cfg.db)}`;
+  return httpJson<ReportJob>(url, 'GET', undefined, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+}
+
 // ===== Announcements / News =====
 export type Announcement = {
   id: Id;
@@ -331,12 +477,24 @@ export async function registerDeviceToken(cfg: OdooConfig, payload: { platform:
 }
 
 // ===== Manager/Admin actions (stubs aligned to RBAC) =====
+export type TeamKpi = 'headcount' | 'present_today' | 'on_leave_today' | 'pending_approvals' | 'open_onboarding' | 'open_offboarding';
+
+export type TeamOverview = { manager_id: Id; include_indirect: boolean; day: DateString; computed_at: string } & Partial<Record<TeamKpi, number>>;
+
 export async function managerTeamOverview(
   cfg: OdooConfig,
-  params: { manager_id?: Id; from?: DateString; to?: DateString }
+  params: { manager_id?: Id; include_indirect?: boolean }
 ) {
   const url = `${cfg.baseUrl}/odhr/api/manager/team_overview?db=${encodeURIComponent(cfg.db)}`;
-  return httpJson<any>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+  return httpJson<TeamOverview>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
+}
+
+export async function managerTeamDrilldown(
+  cfg: OdooConfig,
+  params: { manager_id?: Id; include_indirect?: boolean; drilldown: TeamKpi }
+) {
+  const url = `${cfg.baseUrl}/odhr/api/manager/team_overview?db=${encodeURIComponent(cfg.db)}`;
+  return httpJson<{ kpi: TeamKpi; model: 'hr.employee' | 'hr.leave'; items: any[] }>(url, 'POST', params, { Authorization: basicAuth(cfg.login, cfg.apiKey) });
 }
 
 export async function approveExpense(cfg: OdooConfig, expense_id: Id) {
@@ -9,7 +9,7 @@ import { listAttendances, AttendanceItem, AttendancesResponse } from '../service
 import { useAuth } from '../contexts/AuthContext';
 import { attendanceCheckIn, attendanceCheckOut } from '../api/odoo';
 import { getCurrentPosition } from '../services/geo';
-import { enqueueAttendanceAction } from '../services/offline';
+import { enqueueAttendanceAction, newUid } from '../services/offline';
 
  type Props = any;
 
@@ -38,16 +38,21 @@ export default function AttendanceListScreen({ navigation }: Props) {
   async function doCheck(kind: 'in' | 'out') {
     if (!cfg) return;
     setActionMsg(null);
+    const ts = Date.now();
+    // the same uid is used if the punch has to be queued: a request that
+    // timed out after being recorded is not recorded twice
+    const uid = newUid();
+    let payload: { lat?: number; lng?: number } = {};
     try {
       const pos = await getCurrentPosition();
-      const payload = { lat: pos?.lat, lng: pos?.lng };
-      if (kind === 'in') await attendanceCheckIn(cfg, payload);
-      else await attendanceCheckOut(cfg, payload);
+      payload = { lat: pos?.lat, lng: pos?.lng };
+      if (kind === 'in') await attendanceCheckIn(cfg, { ...payload, uid });
+      else await attendanceCheckOut(cfg, { ...payload, uid });
       setActionMsg(kind === 'in' ? 'Checked in' : 'Checked out');
       await load();
     } catch (e: any) {
-      // Offline or failed: enqueue for later
-      await enqueueAttendanceAction({ kind: kind === 'in' ? 'checkin' : 'checkout', payload: { manual: true, reason: 'offline' }, ts: Date.now() });
+      // Offline or failed: enqueue for later, keeping the time and place of the punch
+      await enqueueAttendanceAction({ uid, kind: kind === 'in' ? 'checkin' : 'checkout', payload: { ...payload, manual: true, reason: 'offline' }, ts });
       setActionMsg('No network; queued for sync');
     }
   }
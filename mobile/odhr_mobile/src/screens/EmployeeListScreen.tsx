@@ -2,7 +2,7 @@ import React, { useEffect, useState, useCallback } from 'react';
 import { View, Text, FlatList, StyleSheet, ActivityIndicator, RefreshControl } from 'react-native';
 import type { NativeStackScreenProps } from '@react-navigation/native-stack';
 import { RootStackParamList } from '../../App';
-import { listEmployees, EmployeeSummary } from '../services/api';
+import { listEmployees, imageRequestBase, EmployeeSummary } from '../services/api';
 import { clearCredentials } from '../services/storage';
 import { Header } from '../ui/components/Header';
 import { SearchBar } from '../ui/components/SearchBar';
@@ -21,6 +21,7 @@ export default function EmployeeListScreen({ navigation }: Props) {
   const [offset, setOffset] = useState(0);
   const [hasMore, setHasMore] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [avatarBase, setAvatarBase] = useState<{ origin: string; headers?: Record<string, string> } | null>(null);
 
   const PAGE_SIZE = 20;
 
@@ -51,6 +52,7 @@ export default function EmployeeListScreen({ navigation }: Props) {
   useEffect(() => {
     // initial load
     load(true);
+    imageRequestBase().then(setAvatarBase).catch(() => setAvatarBase(null));
   }, []);
 
   const onRefresh = useCallback(async () => {
@@ -73,6 +75,7 @@ export default function EmployeeListScreen({ navigation }: Props) {
       name={item.name}
       jobTitle={item.job_title}
       email={item.work_email}
+      avatarSource={avatarBase && item.image_url ? { uri: avatarBase.origin + item.image_url, headers: avatarBase.headers } : undefined}
       onPress={() => navigation.navigate('EmployeeDetail', { id: item.id, name: item.name })}
     />
   );
@@ -1,12 +1,12 @@
 import React, { useEffect, useState } from 'react';
 import { View, Text, StyleSheet, RefreshControl, ScrollView } from 'react-native';
 import { useAuth } from '../contexts/AuthContext';
-import { managerTeamOverview } from '../api/odoo';
+import { managerTeamOverview, TeamOverview } from '../api/odoo';
 
 export default function ManagerDashboardScreen() {
   const { cfg, hasRole } = useAuth();
   const [loading, setLoading] = useState(false);
-  const [data, setData] = useState<{ team_size: number; today_attendance_count: number; open_leaves_count: number } | null>(null);
+  const [data, setData] = useState<TeamOverview | null>(null);
 
   async function load() {
     if (!cfg) return;
@@ -31,10 +31,14 @@ export default function ManagerDashboardScreen() {
     <ScrollView style={styles.container} refreshControl={<RefreshControl refreshing={loading} onRefresh={load} />} contentContainerStyle={{ padding: 16 }}>
       <Text style={styles.title}>Team Overview</Text>
       <View style={styles.card}>
-        <Text style={styles.kpi}>Team size: {data?.team_size ?? '-'}</Text>
-        <Text style={styles.kpi}>Attendance today: {data?.today_attendance_count ?? '-'}</Text>
-        <Text style={styles.kpi}>Open leaves: {data?.open_leaves_count ?? '-'}</Text>
+        <Text style={styles.kpi}>Team size: {data?.headcount ?? '-'}</Text>
+        <Text style={styles.kpi}>Present today: {data?.present_today ?? '-'}</Text>
+        <Text style={styles.kpi}>On leave today: {data?.on_leave_today ?? '-'}</Text>
+        <Text style={styles.kpi}>Pending approvals: {data?.pending_approvals ?? '-'}</Text>
+        {data?.open_onboarding !== undefined && <Text style={styles.kpi}>Open onboarding: {data.open_onboarding}</Text>}
+        {data?.open_offboarding !== undefined && <Text style={styles.kpi}>Open offboarding: {data.open_offboarding}</Text>}
       </View>
+      {data && <Text style={styles.updated}>Updated {new Date(data.computed_at).toLocaleTimeString()}</Text>}
     </ScrollView>
   );
 }
@@ -44,5 +48,6 @@ const styles = StyleSheet.create({
   title: { fontSize: 18, fontWeight: '700', marginBottom: 12 },
   card: { padding: 16, borderWidth: 1, borderColor: '#eee', borderRadius: 8 },
   kpi: { fontSize: 16, marginBottom: 8 },
+  updated: { marginTop: 8, color: '#888', fontSize: 12 },
   center: { flex: 1, alignItems: 'center', justifyContent: 'center' },
 });
@@ -89,8 +89,23 @@ export type EmployeeSummary = {
   emergency_contact_name?: string;
   emergency_contact_phone?: string;
   probation_end_date?: string | null;
+  image_url?: string; // content-addressed: safe to cache for good
 };
 
+// Server origin and auth headers to load authenticated API images such as `image_url`.
+export async function imageRequestBase() {
+  const { baseUrl } = await getCredentials();
+  const base = baseUrl || CONFIG.API_BASE_URL;
+  let origin = base.replace(/\/$/, '');
+  try {
+    origin = new URL(base).origin;
+  } catch {
+    // keep the raw base URL
+  }
+  const { Authorization } = await buildHeaders();
+  return { origin, headers: Authorization ? { Authorization } : undefined };
+}
+
 export type EmployeesResponse = {
   count: number;
   limit: number;
@@ -1,16 +1,25 @@
 import * as SecureStore from 'expo-secure-store';
 import { Platform } from 'react-native';
 import type { OdooConfig } from '../api/odoo';
-import { attendanceCheckIn, attendanceCheckOut } from '../api/odoo';
+import { attendanceBulk } from '../api/odoo';
 
 const KEY = 'odhr_offline_queue';
 
 type AttendanceAction = {
+  // client-generated id: the server ignores a punch it already recorded
+  uid?: string;
   kind: 'checkin' | 'checkout';
   payload: { lat?: number; lng?: number; manual?: boolean; reason?: string | null };
   ts: number;
 };
 
+// server limit of punches per bulk request
+const BULK_MAX = 100;
+
+export function newUid() {
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+}
+
 type Queue = AttendanceAction[];
 
 async function getQueue(): Promise<Queue> {
@@ -39,23 +48,38 @@ async function setQueue(q: Queue) {
 
 export async function enqueueAttendanceAction(a: AttendanceAction) {
   const q = await getQueue();
-  q.push(a);
+  q.push({ ...a, uid: a.uid || newUid() });
   await setQueue(q);
 }
 
 export async function flushAttendanceQueue(cfg: OdooConfig) {
-  const q = await getQueue();
+  let q = await getQueue();
   if (!q.length) return;
+  // punches queued by older app versions get their id before the first send
+  if (q.some((item) => !item.uid)) {
+    q = q.map((item) => (item.uid ? item : { ...item, uid: newUid() }));
+    await setQueue(q);
+  }
   const remaining: Queue = [];
-  for (const item of q) {
+  for (let start = 0; start < q.length; start += BULK_MAX) {
+    const chunk = q.slice(start, start + BULK_MAX);
     try {
-      if (item.kind === 'checkin') {
-        await attendanceCheckIn(cfg, item.payload);
-      } else {
-        await attendanceCheckOut(cfg, item.payload);
-      }
+      const { results } = await attendanceBulk(
+        cfg,
+        chunk.map((item) => ({
+          uid: item.uid as string,
+          kind: item.kind,
+          at: new Date(item.ts).toISOString(),
+          lat: item.payload.lat,
+          lng: item.payload.lng,
+        }))
+      );
+      // created, duplicate and rejected punches are done; only conflicts are retried
+      chunk.forEach((item, i) => {
+        if (results[i]?.status === 'error' && results[i]?.error === 'Concurrent punch, retry') remaining.push(item);
+      });
     } catch {
-      remaining.push(item);
+      remaining.push(...chunk);
     }
   }
   await setQueue(remaining);
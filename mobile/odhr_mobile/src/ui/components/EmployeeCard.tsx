@@ -7,15 +7,17 @@ export type EmployeeCardProps = {
   jobTitle?: string;
   email?: string;
   avatarBase64?: string | false;
+  // remote avatar (e.g. from imageSource()); preferred over avatarBase64
+  avatarSource?: { uri: string; headers?: Record<string, string> };
   onPress?: () => void;
 };
 
-export function EmployeeCard({ name, jobTitle, email, avatarBase64, onPress }: EmployeeCardProps) {
-  const avatarUri = avatarBase64 ? `data:image/png;base64,${avatarBase64}` : undefined;
+export function EmployeeCard({ name, jobTitle, email, avatarBase64, avatarSource, onPress }: EmployeeCardProps) {
+  const source = avatarSource || (avatarBase64 ? { uri: `data:image/png;base64,${avatarBase64}` } : undefined);
   return (
     <TouchableOpacity style={styles.card} onPress={onPress} activeOpacity={0.9}>
-      {avatarUri ? (
-        <Image source={{ uri: avatarUri }} style={styles.avatar} />
+      {source ? (
+        <Image source={{ ...source, cache: 'force-cache' }} style={styles.avatar} />
       ) : (
         <View style={[styles.avatar, styles.placeholder]} />
       )}
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Shift-start load test of the attendance punch endpoints.
+
+Creates (once) N users with an employee each, then has all of them check
+in at the same instant through /odhr/api/attendance/checkin, optionally
+twice (a retried tap), and reports throughput, latency percentiles and
+any employee left with more than one open attendance.
+
+    python3 scripts/attendance_load.py --url http://localhost:8069 --db odhr \\
+        --admin-password admin --employees 500 --setup
+
+Run Odoo with workers (``--workers``) and a db_maxconn large enough for the
+expected concurrency; the threads of this script are the clients.  Only
+the standard library is used.
+"""
+import argparse
+import base64
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import xmlrpc.client
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+LOGIN = 'odhr_load_{:04d}'
+PASSWORD = 'odhr_load_pwd'
+
+
+def rpc(args):
+    common = xmlrpc.client.ServerProxy(f'{args.url}/xmlrpc/2/common')
+    uid = common.authenticate(args.db, args.admin_login, args.admin_password, {})
+    models = xmlrpc.client.ServerProxy(f'{args.url}/xmlrpc/2/object', allow_none=True)
+
+    def call(model, method, *params, **kw):
+        return models.execute_kw(args.db, uid, args.admin_password, model, method, list(params), kw)
+    return call
+
+
+def setup(args, call):
+    logins = [LOGIN.format(i) for i in range(args.employees)]
+    existing = {u['login'] for u in call('res.users', 'search_read', [('login', 'in', logins)], fields=['login'])}
+    missing = [login for login in logins if login not in existing]
+    for login in missing:
+        user_id = call('res.users', 'create', {'name': login, 'login': login, 'password': PASSWORD})
+        call('hr.employee', 'create', {'name': login, 'user_id': user_id})
+    print(f'{len(missing)} users created, {len(existing)} already present')
+
+
+def close_open(args, call):
+    """Check everybody out so that runs start from the same state."""
+    employees = call('hr.employee', 'search', [('user_id.login', '=like', 'odhr_load_%')])
+    open_ids = call('hr.attendance', 'search', [('employee_id', 'in', employees), ('check_out', '=', False)])
+    if open_ids:
+        call('hr.attendance', 'write', open_ids, {'check_out': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())})
+    return employees
+
+
+def punch(args, index, barrier, uid):
+    credentials = base64.b64encode(f'{LOGIN.format(index)}:{PASSWORD}'.encode()).decode()
+    request = urllib.request.Request(
+        f'{args.url}/odhr/api/attendance/checkin?db={args.db}',
+        data=json.dumps({'uid': uid}).encode(),
+        headers={'Authorization': f'Basic {credentials}', 'Content-Type': 'application/json'},
+        method='POST',
+    )
+    barrier.wait()
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=args.timeout) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception as e:
+        status = type(e).__name__
+    return status, time.perf_counter() - start
+
+
+def run(args, call):
+    employees = close_open(args, call)
+    tag = int(time.time())
+    jobs = [(i, f'load-{tag}-{i}') for i in range(args.employees)] * args.repeat
+    barrier = threading.Barrier(len(jobs))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        results = list(pool.map(lambda job: punch(args, job[0], barrier, job[1]), jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _status, latency in results)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f'{len(jobs)} punches in {elapsed:.2f}s: {len(jobs) / elapsed:.1f} punches/s')
+    print(f'latency p50 {quantiles[49] * 1000:.0f} ms, p95 {quantiles[94] * 1000:.0f} ms, '
+          f'p99 {quantiles[98] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms')
+    print('statuses:', dict(Counter(status for status, _latency in results)))
+
+    groups = call('hr.attendance', 'read_group',
+                  [('employee_id', 'in', employees), ('check_out', '=', False)], ['employee_id'], ['employee_id'])
+    doubled = [g for g in groups if g['employee_id_count'] > 1]
+    opened = sum(g['employee_id_count'] for g in groups)
+    print(f'{opened} open attendances for {args.employees} employees, {len(doubled)} employees with several')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://localhost:8069')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--admin-login', default='admin')
+    parser.add_argument('--admin-password', required=True)
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=1, help='punches per employee (2 simulates retried taps)')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--setup', action='store_true', help='create the load test users first')
+    args = parser.parse_args()
+    call = rpc(args)
+    if args.setup:
+        setup(args, call)
+    run(args, call)
+
+
+if __name__ == '__main__':
+    main()